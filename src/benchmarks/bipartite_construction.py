@@ -0,0 +1,87 @@
+"""Scaling benchmark of construct_bipartite_graph on random target graphs.
+
+For each size we build random regular target graphs and time the
+incremental construction against the original one, which recomputes the
+projection for every edge, checking that both return the same graphs.
+
+Usage:
+    python benchmarks/bipartite_construction.py [--qubits 16 32 64 128]
+"""
+
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+
+from corral_crowding.bipartite import (
+    _construct_bipartite_graph_reference,
+    construct_bipartite_graph,
+)
+
+
+def timed(construct, graph, max_degree_A, max_degree_B):
+    start = time.perf_counter()
+    result = construct(graph, max_degree_A, max_degree_B)
+    return result, time.perf_counter() - start
+
+
+def same_result(a, b):
+    if a[0] is None or b[0] is None:
+        return a[0] is None and b[0] is None
+    return all(
+        list(x.nodes()) == list(y.nodes()) and list(x.edges()) == list(y.edges())
+        for x, y in zip(a, b)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--max-degree-a", type=int, default=4)
+    parser.add_argument("--max-degree-b", type=int, default=4)
+    parser.add_argument("--graphs", type=int, default=3)
+    parser.add_argument(
+        "--reference-limit",
+        type=int,
+        default=128,
+        help="largest size at which the original construction is timed",
+    )
+    args = parser.parse_args()
+    print(
+        f"{'qubits':>6} {'built':>5} {'incremental':>12} {'original':>10}"
+        f" {'speedup':>8} {'same':>5}"
+    )
+    for num_qubits in args.qubits:
+        fast_times, reference_times, built, same = [], [], 0, True
+        for seed in range(args.graphs):
+            graph = nx.random_regular_graph(args.degree, num_qubits, seed=seed)
+            result, elapsed = timed(
+                construct_bipartite_graph,
+                graph,
+                args.max_degree_a,
+                args.max_degree_b,
+            )
+            fast_times.append(elapsed)
+            built += result[0] is not None
+            if num_qubits <= args.reference_limit:
+                reference, elapsed = timed(
+                    _construct_bipartite_graph_reference,
+                    graph,
+                    args.max_degree_a,
+                    args.max_degree_b,
+                )
+                reference_times.append(elapsed)
+                same &= same_result(result, reference)
+        fast = np.mean(fast_times)
+        if reference_times:
+            reference = np.mean(reference_times)
+            columns = f"{reference:>9.3f}s {reference / fast:>7.1f}x {str(same):>5}"
+        else:
+            columns = f"{'-':>10} {'-':>8} {'-':>5}"
+        print(f"{num_qubits:>6} {built:>5} {fast:>11.3f}s {columns}")
+
+
+if __name__ == "__main__":
+    main()
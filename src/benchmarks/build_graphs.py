@@ -0,0 +1,67 @@
+"""Build time of the snail/qubit graphs of large random topologies.
+
+Every SNAIL couples ``--snail-degree`` random qubits. We time build_graphs
+on Python lists against build_coupling_graphs on NumPy arrays, with both
+outputs, and check that the qubit connectivities agree.
+
+Usage:
+    python benchmarks/build_graphs.py [--qubits 1000 4000 16000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from corral_crowding.topologies import build_coupling_graphs, build_graphs
+
+
+def timed(build, *args, **kwargs):
+    start = time.perf_counter()
+    result = build(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[1000, 4000, 16000])
+    parser.add_argument("--snail-degree", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    print(
+        f"{'qubits':>6} {'snails':>6} {'lists':>9} {'arrays':>9}"
+        f" {'cmap':>9} {'couplings':>9} {'same':>5}"
+    )
+    for num_qubits in args.qubits:
+        num_snails = num_qubits // 2
+        snails = np.arange(num_snails)
+        qubits = num_snails + np.arange(num_qubits)
+        members = np.stack(
+            [
+                rng.choice(qubits, args.snail_degree, replace=False)
+                for _ in range(num_snails)
+            ]
+        )
+        edges = np.stack([np.repeat(snails, args.snail_degree), members.ravel()], 1)
+        (_, reference), list_time = timed(
+            build_graphs, snails.tolist(), qubits.tolist(), edges.tolist()
+        )
+        (_, connectivity), array_time = timed(
+            build_coupling_graphs, snails, qubits, edges
+        )
+        _, cmap_time = timed(
+            build_coupling_graphs, snails, qubits, edges, coupling_map=True
+        )
+        same = {tuple(sorted(edge)) for edge in reference.edge_list()} == set(
+            connectivity.edge_list()
+        )
+        print(
+            f"{num_qubits:>6} {num_snails:>6} {list_time * 1e3:>7.1f}ms"
+            f" {array_time * 1e3:>7.1f}ms {cmap_time * 1e3:>7.1f}ms"
+            f" {connectivity.num_edges():>9} {str(same):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
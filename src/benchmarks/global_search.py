@@ -0,0 +1,69 @@
+"""Benchmark of the global search strategies against multi-start local search.
+
+Every strategy gets the same evaluation budget, and the multi-start methods
+get as many restarts as fit in it. For each seed we report the best total
+cost, the CPU time and the best cost reached per CPU-second.
+
+Usage:
+    python benchmarks/global_search.py [--qubits 6 7 8] [--budget 20000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from corral_crowding.allocation_optimizer import GateFidelityOptimizer
+from corral_crowding.global_search import GLOBAL_STRATEGIES
+from corral_crowding.module_graph import QuantumModuleGraph
+
+
+def run(optimizer, name, budget, seed):
+    start = time.process_time()
+    if name in GLOBAL_STRATEGIES:
+        frequencies, _ = optimizer.global_optimize(
+            name, max_evaluations=budget, seed=seed, verbose=False
+        )
+    else:
+        # restarts of roughly the same total budget as the global strategies
+        evaluations_per_restart = 600 if name == "Nelder-Mead" else 120
+        frequencies, _ = optimizer.optimize_frequencies(
+            max(1, budget // evaluations_per_restart),
+            seed=seed,
+            method=name,
+            verbose=False,
+        )
+    return optimizer.compute_total_infidelity(frequencies), time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[6, 7, 8])
+    parser.add_argument("--budget", type=int, default=20000)
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        default=["Nelder-Mead", "SLSQP", *GLOBAL_STRATEGIES],
+    )
+    args = parser.parse_args()
+    print(
+        f"{'qubits':>6} {'method':>22} {'mean cost':>10} {'best cost':>10}"
+        f" {'cpu time':>9}"
+    )
+    for num_qubits in args.qubits:
+        optimizer = GateFidelityOptimizer(
+            QuantumModuleGraph(num_qubits), lambdaq=0.08, eta=1.8, g3=60e6
+        )
+        for name in args.methods:
+            costs, times = zip(
+                *(run(optimizer, name, args.budget, seed) for seed in range(args.seeds))
+            )
+            print(
+                f"{num_qubits:>6} {name:>22} {np.mean(costs):>10.4g}"
+                f" {np.min(costs):>10.4g} {np.mean(times):>8.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark of the exact MILP frequency allocation against the module size.
+
+For each number of qubits we report the solve time, the separation of the
+optimal (or best found) allocation, the remaining MIP gap and the separation
+of the Golomb-ruler warm start.
+
+Usage:
+    python benchmarks/milp_allocation.py [--qubits 3 4 5 6 7 8] [--time-limit 60]
+"""
+
+import argparse
+
+from corral_crowding.milp_allocation import (
+    gate_separation,
+    golomb_seed,
+    maximize_gate_separation,
+)
+from corral_crowding.module_graph import QuantumModuleGraph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[3, 4, 5, 6, 7, 8])
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--min-bare-space", type=float, default=0.2)
+    parser.add_argument("--solvers", nargs="+", default=["auto", "highs"])
+    args = parser.parse_args()
+    print(
+        f"{'qubits':>6} {'solver':>6} {'status':>10} {'time':>8}"
+        f" {'sep (MHz)':>10} {'gap':>8} {'seed (MHz)':>10}"
+    )
+    for num_qubits in args.qubits:
+        seed = golomb_seed(num_qubits, min_bare_space_ghz=args.min_bare_space)
+        seed_separation = float("nan") if seed is None else gate_separation(seed)
+        for solver in args.solvers:
+            result = maximize_gate_separation(
+                QuantumModuleGraph(num_qubits),
+                min_bare_space_ghz=args.min_bare_space,
+                time_limit=args.time_limit,
+                solver=solver,
+            )
+            print(
+                f"{num_qubits:>6} {result.solver:>6} {result.status:>10}"
+                f" {result.runtime:>7.2f}s {result.fun * 1e3:>10.2f}"
+                f" {result.mip_gap:>8.2g} {seed_separation * 1e3:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
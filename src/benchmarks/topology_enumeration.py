@@ -0,0 +1,63 @@
+"""Counts and enumeration times of non-isomorphic snail/qubit topologies.
+
+For each (qubits, SNAILs) pair we enumerate every connected topology within
+the degree limits, report how many there are, how long the enumeration took
+and the best average qubit distance found.
+
+Usage:
+    python benchmarks/topology_enumeration.py [--sizes 8:4 10:5] [--limit 1000]
+"""
+
+import argparse
+import time
+from itertools import islice
+
+from corral_crowding.topology_enumeration import (
+    enumerate_topologies,
+    topology_key,
+    topology_metrics,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["6:3", "8:4", "10:5"])
+    parser.add_argument("--max-degree-qubit", type=int, default=2)
+    parser.add_argument("--max-degree-snail", type=int, default=4)
+    parser.add_argument("--min-degree-snail", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    print(
+        f"{'qubits':>6} {'snails':>6} {'count':>7} {'time':>8} {'per topo':>9}"
+        f" {'avg dist':>8}  best"
+    )
+    for size in args.sizes:
+        num_qubits, num_snails = map(int, size.split(":"))
+        start = time.perf_counter()
+        topologies = list(
+            islice(
+                enumerate_topologies(
+                    num_qubits,
+                    num_snails,
+                    args.max_degree_qubit,
+                    args.max_degree_snail,
+                    args.min_degree_snail,
+                ),
+                args.limit,
+            )
+        )
+        elapsed = time.perf_counter() - start
+        scored = [
+            (topology_metrics(topology)["average_distance"], topology_key(topology))
+            for topology in topologies
+        ]
+        distance, best = min(scored, default=(float("nan"), "-"))
+        per_topology = elapsed / max(len(topologies), 1)
+        print(
+            f"{num_qubits:>6} {num_snails:>6} {len(topologies):>7} {elapsed:>7.2f}s"
+            f" {per_topology * 1e3:>7.2f}ms {distance:>8.3f}  {best}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""SWAP counts of library circuits transpiled onto the generated topologies.
+
+Runs transpile_benchmarks on QFT and quantum volume circuits for every
+topology family, then prints the mean counts per (topology, circuit). The
+results table is reused, so a second run only transpiles missing points.
+
+Usage:
+    python benchmarks/transpile_benchmark.py [--qubits 8 12] [--workers 4]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import QFTGate, quantum_volume
+
+from corral_crowding import topologies
+from corral_crowding.transpile_benchmark import transpile_benchmarks
+
+TOPOLOGIES = {
+    "ring": topologies.ring_topology(16),
+    "square": topologies.square_topology(4, 4),
+    "tworing": topologies.tworing_topology(16),
+    "hex": topologies.hex_topology(4, 4),
+    "corral": topologies.corral_topology(8),
+    "denselattice": topologies.denselattice_topology(5, 7),
+}
+
+
+def library_circuits(sizes, seed):
+    circuits = {}
+    for size in sizes:
+        qft = QuantumCircuit(size)
+        qft.append(QFTGate(size), range(size))
+        circuits[f"qft{size}"] = qft.decompose()
+        circuits[f"qv{size}"] = quantum_volume(size, seed=seed).decompose()
+    return circuits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[8, 12])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--isa", default="cx")
+    parser.add_argument("--output", default="transpile_benchmark.csv")
+    args = parser.parse_args()
+    circuits = library_circuits(args.qubits, seed=0)
+    start = time.perf_counter()
+    table = transpile_benchmarks(
+        circuits,
+        TOPOLOGIES,
+        args.output,
+        seeds=range(args.seeds),
+        workers=args.workers,
+        isa=args.isa,
+    )
+    print(f"{time.perf_counter() - start:.1f}s for {len(table['key'])} points")
+    print(
+        f"{'topology':>12} {'circuit':>8} {'swaps':>7} {'swap path':>9}"
+        f" {args.isa:>7} {args.isa + ' path':>7}"
+    )
+    for name in TOPOLOGIES:
+        for circuit in circuits:
+            rows = (
+                (table["topology"] == name)
+                & (table["circuit"] == circuit)
+                & (table["isa"] == args.isa)
+            )
+            if not rows.any():
+                continue
+            print(
+                f"{name:>12} {circuit:>8}"
+                f" {np.mean(table['swap_count'][rows]):>7.1f}"
+                f" {np.mean(table['swap_longest_path'][rows]):>9.1f}"
+                f" {np.mean(table['two_qubit_gate_count'][rows]):>7.1f}"
+                f" {np.mean(table['two_qubit_longest_path'][rows]):>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Adaptive grid refinement for fitting simulated infidelity curves."""
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+
+def _midpoints(x, spacing):
+    if spacing == "log":
+        return np.sqrt(x[:-1] * x[1:])
+    return (x[:-1] + x[1:]) / 2
+
+
+def _interpolate(x, y, x_new, spacing):
+    """Interpolates linearly in (log x, log y) or (x, log y) space."""
+    if spacing == "log":
+        x, x_new = np.log(x), np.log(x_new)
+    return np.exp(np.interp(x_new, x, np.log(np.maximum(y, np.finfo(float).tiny))))
+
+
+def adaptive_fit(
+    simulate,
+    model,
+    lower,
+    upper,
+    p0,
+    initial_points=9,
+    rtol=1e-2,
+    max_points=64,
+    spacing="log",
+    bounds=(-np.inf, np.inf),
+):
+    """Samples ``simulate`` on an adaptively refined grid and fits ``model``.
+
+    Starting from ``initial_points`` between ``lower`` and ``upper``, every
+    unresolved interval is split at its midpoint. An interval is resolved
+    once the simulated value at its midpoint agrees, to within ``rtol``
+    relative error, with both the current ``model`` fit (fit residual) and
+    the interpolation between its endpoints (curvature).
+
+    Refinement stops when every interval is resolved, when refitting moves
+    the model by at most ``rtol`` relative error over the sampled points
+    (the fit has converged), when the largest fit residual at the new
+    midpoints is no smaller than at the previous ones (the model cannot fit
+    the curve any better), or when ``max_points`` simulations were spent.
+    If fewer simulations are left than unresolved intervals, the intervals
+    with the largest error are split first.
+
+    Args:
+        simulate: Callable mapping an array of x values to the simulated curve.
+        model: ``curve_fit`` model ``model(x, *params)``.
+        lower: Lower end of the sampled range.
+        upper: Upper end of the sampled range.
+        p0: Initial guess for the first fit.
+        initial_points: Size of the starting grid.
+        rtol: Target relative residual, interpolation error and fit change.
+        max_points: Simulation budget.
+        spacing: ``"log"`` for geometric grids and midpoints, else ``"linear"``.
+        bounds: Parameter bounds forwarded to ``curve_fit``.
+
+    Returns:
+        Tuple ``(params, diagnostics)``; ``diagnostics`` holds the sampled
+        ``x`` and ``y``, the relative ``residuals`` of the final fit, the
+        ``max_residual``, the ``num_simulations``, the ``stop`` reason
+        (``"resolved"``, ``"fit"``, ``"residual"`` or ``"budget"``) and
+        whether the fit ``converged``, i.e. stopped before the budget.
+    """
+    if spacing == "log":
+        x = np.geomspace(lower, upper, initial_points)
+    else:
+        x = np.linspace(lower, upper, initial_points)
+    y = np.asarray(simulate(x), dtype=float)
+    params, _ = curve_fit(model, x, y, p0=p0, bounds=bounds)
+
+    # intervals are identified by their left endpoint; unsampled intervals
+    # have an infinite error so the initial grid is refined evenly
+    active = np.ones(len(x) - 1, dtype=bool)
+    error = np.full(len(x) - 1, np.inf)
+    previous_residual = np.inf
+    while True:
+        left = np.flatnonzero(active)
+        if not len(left):
+            stop = "resolved"
+            break
+        budget = max_points - len(x)
+        if budget <= 0:
+            stop = "budget"
+            break
+        if len(left) > budget:
+            width = np.diff(np.log(x) if spacing == "log" else x)[left]
+            left = np.sort(left[np.lexsort((-width, -error[left]))[:budget]])
+        x_mid = _midpoints(x, spacing)[left]
+        y_mid = np.asarray(simulate(x_mid), dtype=float)
+
+        scale = np.maximum(np.abs(y_mid), np.finfo(float).tiny)
+        fit_residual = np.abs(model(x_mid, *params) - y_mid) / scale
+        curvature = np.abs(_interpolate(x, y, x_mid, spacing) - y_mid) / scale
+        midpoint_error = np.maximum(fit_residual, curvature)
+
+        # old interval i moves right by the number of splits before it, a
+        # split interval becomes two halves that share its midpoint error
+        position = np.arange(len(active)) + np.searchsorted(
+            left, np.arange(len(active))
+        )
+        split_active = np.zeros(len(active) + len(left), dtype=bool)
+        split_error = np.zeros(len(active) + len(left))
+        split_active[position] = active
+        split_error[position] = error
+        for half in (position[left], position[left] + 1):
+            split_active[half] = midpoint_error > rtol
+            split_error[half] = midpoint_error
+        active, error = split_active, split_error
+        x = np.insert(x, left + 1, x_mid)
+        y = np.insert(y, left + 1, y_mid)
+
+        previous_fit = model(x, *params)
+        params, _ = curve_fit(model, x, y, p0=p0, bounds=bounds)
+        fit_change = np.abs(model(x, *params) - previous_fit) / np.maximum(
+            np.abs(previous_fit), np.finfo(float).tiny
+        )
+        if np.max(fit_change) <= rtol:
+            stop = "fit"
+            break
+        if np.max(fit_residual) >= previous_residual:
+            stop = "residual"
+            break
+        previous_residual = np.max(fit_residual)
+
+    residuals = np.abs(model(x, *params) - y) / np.maximum(
+        np.abs(y), np.finfo(float).tiny
+    )
+    diagnostics = {
+        "x": x,
+        "y": y,
+        "residuals": residuals,
+        "max_residual": np.max(residuals),
+        "num_simulations": len(x),
+        "stop": stop,
+        "converged": stop != "budget",
+    }
+    return params, diagnostics
@@ -1,3 +1,5 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 # import networkx
 import lovelyplots
 import networkx as nx
@@ -9,13 +11,90 @@ from scipy.optimize import minimize
 from scipy.stats import gmean
 from tqdm import tqdm
 
-from corral_crowding.detuning_fit import compute_infidelity_parameters, decay_fit
+from corral_crowding.crowding_cost import ChipCost, CrowdingCost
+from corral_crowding.detuning_fit import (
+    compute_infidelity_parameters,
+    compute_infidelity_parameters_adaptive,
+    decay_fit,
+)
+from corral_crowding.fit_cache import (
+    cached_infidelity_parameters,
+    cached_infidelity_parameters_adaptive,
+    cached_speedlimit_infidelity_params,
+    cached_speedlimit_infidelity_params_adaptive,
+)
+from corral_crowding.global_search import GLOBAL_STRATEGIES
+from corral_crowding.golomb import golomb_ruler
 from corral_crowding.module_graph import QuantumModuleGraph
 from corral_crowding.speedlimit_fit import (
     lifetime_decay_fit,
     speedlimit_infidelity_params,
+    speedlimit_infidelity_params_adaptive,
 )
 
+# (use_cache, adaptive_grid) -> (infidelity fit, speed-limit fit)
+_FIT_FUNCTIONS = {
+    (False, False): (compute_infidelity_parameters, speedlimit_infidelity_params),
+    (True, False): (
+        cached_infidelity_parameters,
+        cached_speedlimit_infidelity_params,
+    ),
+    (False, True): (
+        compute_infidelity_parameters_adaptive,
+        speedlimit_infidelity_params_adaptive,
+    ),
+    (True, True): (
+        cached_infidelity_parameters_adaptive,
+        cached_speedlimit_infidelity_params_adaptive,
+    ),
+}
+
+
+def fit_crosstalk_params(lambdaq, eta, g3, use_cache=True, adaptive_grid=False):
+    """Fits the spectator infidelity curves used by GateFidelityOptimizer.
+
+    Returns:
+        Tuple ``(infidelity_params, extra)`` where ``extra`` is the adaptive
+        fit diagnostics, or the simulated curves on the fixed 64-point grid.
+    """
+    infidelity_fit, _ = _FIT_FUNCTIONS[(use_cache, adaptive_grid)]
+    if adaptive_grid:
+        return infidelity_fit(lambdaq=lambdaq, eta=eta, alpha=120e6, g3=g3)
+    detuning_list = np.linspace(50, 1000, 64)
+    return infidelity_fit(detuning_list, lambdaq=lambdaq, eta=eta, alpha=120e6, g3=g3)
+
+
+def fit_speedlimit_params(
+    snail_bounds, T_1, g3, lambdaq, use_cache=True, adaptive_grid=False
+):
+    """Fits the lifetime-loss curve at the center of ``snail_bounds``."""
+    _, speedlimit_fit = _FIT_FUNCTIONS[(use_cache, adaptive_grid)]
+    avg_snail = (snail_bounds[0] + snail_bounds[1]) / 2
+    return speedlimit_fit(
+        f_SNAIL=avg_snail, t_f_calib=250e-9, T1=T_1, g3=g3, lambdaq=lambdaq
+    )
+
+
+GRADIENT_METHODS = ("L-BFGS-B", "SLSQP")
+# global strategies that need CrowdingCost.value_and_grad or incremental
+SINGLE_SNAIL_STRATEGIES = ("basinhopping", "annealing", "coordinate_descent")
+# relaxation widths (GHz) of the continuation used by the gradient methods
+GRADIENT_SMOOTHNESS = (0.05, 0.01, 0.002)
+INITIAL_GUESSES = ("random", "golomb")
+
+
+# set once per pool worker by _init_worker, see optimize_frequencies
+_WORKER_OPTIMIZER = None
+
+
+def _init_worker(optimizer):
+    global _WORKER_OPTIMIZER
+    _WORKER_OPTIMIZER = optimizer
+
+
+def _restart_worker(index, seed_sequence, restart_kwargs):
+    return _WORKER_OPTIMIZER._seeded_restart(index, seed_sequence, **restart_kwargs)
+
 
 class GateFidelityOptimizer:
     def __init__(
@@ -31,6 +110,10 @@ class GateFidelityOptimizer:
         snail_bounds=(4.2, 4.7),
         drop_k=0,  # 0 for best, 1 to drop worst, 2 to drop 2 worst, etc
         use_lifetime=False,
+        use_cache=True,  # reuse QuTiP fits, in memory unless enable_disk_cache
+        adaptive_grid=False,  # refine detuning grids instead of fixed linspaces
+        infidelity_params=None,  # precomputed fits skip the QuTiP simulations
+        speedlimit_params=None,
     ):
         self.lambdaq = lambdaq
         self.eta = eta
@@ -44,15 +127,44 @@ class GateFidelityOptimizer:
         self.best_cost = np.inf
         self.drop_k = drop_k
 
-        detuning_list = np.linspace(50, 1000, 64)
-        self.infidelity_params, _ = compute_infidelity_parameters(
-            detuning_list, lambdaq=lambdaq, eta=eta, alpha=120e6, g3=g3
-        )
+        self.fit_diagnostics = None
+        if infidelity_params is not None:
+            self.infidelity_params = infidelity_params
+        else:
+            self.infidelity_params, diagnostics = fit_crosstalk_params(
+                lambdaq, eta, g3, use_cache=use_cache, adaptive_grid=adaptive_grid
+            )
+            if adaptive_grid:
+                self.fit_diagnostics = dict(diagnostics)
         ###
         self.use_lifetime = use_lifetime
-        avg_snail = (snail_bounds[0] + snail_bounds[1]) / 2
-        self.speedlimit_params, _ = speedlimit_infidelity_params(
-            f_SNAIL=avg_snail, t_f_calib=250e-9, T1=T_1, g3=g3, lambdaq=lambdaq
+        if speedlimit_params is not None:
+            self.speedlimit_params = speedlimit_params
+        else:
+            self.speedlimit_params, diagnostics = fit_speedlimit_params(
+                snail_bounds,
+                T_1,
+                g3,
+                lambdaq,
+                use_cache=use_cache,
+                adaptive_grid=adaptive_grid,
+            )
+            if adaptive_grid:
+                self.fit_diagnostics = {
+                    **(self.fit_diagnostics or {}),
+                    "speedlimit": diagnostics,
+                }
+        # a chip of several modules is scored by ChipCost, which also counts
+        # the spectators of neighbouring modules
+        cost_class = CrowdingCost if module.num_snails == 1 else ChipCost
+        self.cost_engine = cost_class(
+            module,
+            self.infidelity_params,
+            self.speedlimit_params,
+            alpha=alpha,
+            min_bare_space_ghz=min_bare_space_ghz,
+            drop_k=drop_k,
+            use_lifetime=use_lifetime,
         )
 
     def _unit_crosstalk(self, intended_freq, spectator_key, spectator_freq):
@@ -130,6 +242,29 @@ class GateFidelityOptimizer:
         return gate_infidelity
 
     def compute_total_infidelity(self, frequencies):
+        return self.cost_engine(frequencies)
+
+    def incremental_cost(self, frequencies):
+        """IncrementalCost of ``frequencies`` for single-frequency moves."""
+        return self.cost_engine.incremental(frequencies)
+
+    def compute_total_infidelity_batch(self, frequencies, chunk_size=None):
+        """Scores a population of allocations in one vectorized call.
+
+        Args:
+            frequencies: Array of shape (n_candidates, n_qubits + n_snails),
+                each row ``[*qubit_freqs, *snail_freqs]`` in GHz.
+            chunk_size: Optional number of candidates evaluated per chunk.
+
+        Returns:
+            Tuple ``(total_cost, gate_infidelities)``; ``total_cost`` has shape
+            (n_candidates,) and ``gate_infidelities`` (n_candidates, n_edges),
+            with columns ordered as ``self.cost_engine.edge_labels``.
+        """
+        return self.cost_engine.evaluate_batch(frequencies, chunk_size=chunk_size)
+
+    def _compute_total_infidelity_reference(self, frequencies):
+        """Scalar reference implementation of compute_total_infidelity."""
         qubit_frequencies, snail_frequency = frequencies[:-1], frequencies[-1]
         interaction_data = self.module_graph.get_interaction_frequencies(
             qubit_frequencies, snail_frequency
@@ -148,28 +283,234 @@ class GateFidelityOptimizer:
         )
         return two_qubit_crowding + one_qubit_crowding
 
-    def optimize_frequencies(self, attempts=128):
+    def _random_initial_guess(self, rng=np.random):
         qubit_count = self.module_graph.num_qubits
-        self.best_cost = np.inf
-        for _ in tqdm(range(attempts)):
-            initial_guess = np.append(
-                np.random.uniform(
-                    self.qubit_bounds[0], self.qubit_bounds[1], qubit_count
-                ),
-                np.random.uniform(self.snail_bounds[0], self.snail_bounds[1]),
-            )
+        return np.append(
+            rng.uniform(self.qubit_bounds[0], self.qubit_bounds[1], qubit_count),
+            rng.uniform(*self.snail_bounds, self.module_graph.num_snails),
+        )
+
+    def _golomb_initial_guess(self, rng=np.random):
+        # a randomly mirrored, scaled and shifted Golomb ruler keeps every
+        # gate frequency distinct; the jitter is a quarter of a ruler unit
+        qubit_count = self.module_graph.num_qubits
+        marks = golomb_ruler(qubit_count).astype(float)
+        length = max(marks[-1], 1.0)
+        marks /= length
+        if rng.uniform() < 0.5:
+            marks = 1.0 - marks
+        low, high = self.qubit_bounds
+        span = rng.uniform(0.75, 1.0) * (high - low)
+        offset = low + rng.uniform(0.0, high - low - span)
+        jitter = rng.normal(0.0, 0.25 * span / length, qubit_count)
+        qubits = offset + marks * span + jitter
+        return np.append(
+            np.clip(rng.permutation(qubits), low, high),
+            rng.uniform(*self.snail_bounds, self.module_graph.num_snails),
+        )
+
+    def _initial_guess(self, rng=np.random, init="random"):
+        if init == "golomb":
+            return self._golomb_initial_guess(rng)
+        return self._random_initial_guess(rng)
+
+    def _bounds(self):
+        module = self.module_graph
+        return [self.qubit_bounds] * module.num_qubits + [
+            self.snail_bounds
+        ] * module.num_snails
+
+    def _run_restart(
+        self, initial_guess, method="Nelder-Mead", smoothness=GRADIENT_SMOOTHNESS
+    ):
+        bounds = self._bounds()
+        if method == "Nelder-Mead":
             result = minimize(
                 self.compute_total_infidelity,
                 initial_guess,
-                bounds=[self.qubit_bounds] * qubit_count + [self.snail_bounds],
+                bounds=bounds,
                 method="Nelder-Mead",
             )
-            temp_result = np.mean(self.get_final_infidelities(result.x))
-            if temp_result < self.best_cost:
-                self.best_cost = temp_result
-                self.best_frequencies = result.x
-                best_result = result
-        print(best_result.message)
+        elif method in GRADIENT_METHODS:
+            # continuation: each stage starts from the optimum of a smoother cost
+            result = None
+            x = initial_guess
+            for width in smoothness:
+                result = minimize(
+                    self.cost_engine.value_and_grad,
+                    x,
+                    args=(width,),
+                    jac=True,
+                    bounds=bounds,
+                    method=method,
+                )
+                x = result.x
+        else:
+            raise ValueError(f"Unknown optimization method: {method}")
+        cost = np.mean(self.get_final_infidelities(result.x))
+        return cost, result.x, result.message
+
+    def _seeded_restart(self, index, seed_sequence, init="random", **restart_kwargs):
+        rng = np.random.default_rng(seed_sequence)
+        return (
+            index,
+            *self._run_restart(self._initial_guess(rng, init), **restart_kwargs),
+        )
+
+    def _run_restarts_parallel(
+        self, seeds, workers, target_cost, verbose=True, **restart_kwargs
+    ):
+        results = []
+        # the optimizer (with its fitted infidelity_params) is pickled once per
+        # worker by the initializer, only (index, seed) travels with each task
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self,)
+        )
+        try:
+            futures = [
+                executor.submit(_restart_worker, index, seed_sequence, restart_kwargs)
+                for index, seed_sequence in enumerate(seeds)
+            ]
+            for future in tqdm(
+                as_completed(futures), total=len(futures), disable=not verbose
+            ):
+                results.append(future.result())
+                if target_cost is not None and results[-1][1] <= target_cost:
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return results
+
+    def optimize_frequencies(
+        self,
+        attempts=128,
+        workers=None,
+        seed=None,
+        target_cost=None,
+        verbose=True,
+        method="Nelder-Mead",
+        smoothness=GRADIENT_SMOOTHNESS,
+        init="random",
+    ):
+        """Multi-start local search over the qubit and SNAIL frequencies.
+
+        Args:
+            attempts: Number of random restarts.
+            workers: Run restarts concurrently in a process pool of this size.
+            seed: Seed for the restarts. Each restart draws its initial guess
+                from its own child ``SeedSequence``, so a seeded run returns the
+                same best_frequencies/best_cost for any number of workers. With
+                neither ``seed`` nor ``workers`` the global ``np.random`` state
+                is used.
+            target_cost: Stop early once a restart reaches this cost; pending
+                restarts are cancelled.
+            verbose: Show the progress bar and the best optimizer message.
+            method: ``"Nelder-Mead"`` on the exact cost, or ``"L-BFGS-B"`` /
+                ``"SLSQP"`` using the analytic gradient of a smoothed cost
+                (CrowdingCost.value_and_grad, single-SNAIL modules only).
+            smoothness: Relaxation widths in GHz for the gradient methods,
+                minimized in turn from the smoothest; ``None`` as the last
+                width polishes on the exact piecewise cost.
+            init: Initial guesses, ``"random"`` (uniform in the bounds) or
+                ``"golomb"`` (qubits on a randomly mirrored, scaled and
+                jittered Golomb ruler from corral_crowding.golomb, so no two
+                gates start at the same frequency).
+
+        Returns:
+            Tuple ``(best_frequencies, best_cost)``, or ``(None, inf)`` if no
+            restart reached a finite cost.
+        """
+        if smoothness is None or np.isscalar(smoothness):
+            smoothness = (smoothness,)
+        if init not in INITIAL_GUESSES:
+            raise ValueError(f"Unknown initial guess: {init}")
+        if method in GRADIENT_METHODS and self.module_graph.num_snails > 1:
+            raise ValueError(f"{method} needs a single-SNAIL module")
+        restart_kwargs = {"method": method, "smoothness": tuple(smoothness)}
+        self.best_cost = np.inf
+        results = []
+        if workers is None and seed is None:
+            for index in tqdm(range(attempts), disable=not verbose):
+                initial_guess = self._initial_guess(np.random, init)
+                results.append(
+                    (index, *self._run_restart(initial_guess, **restart_kwargs))
+                )
+                if target_cost is not None and results[-1][1] <= target_cost:
+                    break
+        else:
+            restart_kwargs["init"] = init
+            seeds = np.random.SeedSequence(seed).spawn(attempts)
+            if workers is None or workers == 1:
+                for index in tqdm(range(attempts), disable=not verbose):
+                    results.append(
+                        self._seeded_restart(index, seeds[index], **restart_kwargs)
+                    )
+                    if target_cost is not None and results[-1][1] <= target_cost:
+                        break
+            else:
+                results = self._run_restarts_parallel(
+                    seeds, workers, target_cost, verbose, **restart_kwargs
+                )
+
+        # reduce by (cost, restart index) so completion order does not matter
+        finite = [result for result in results if result[1] < np.inf]
+        if not finite:
+            if verbose:
+                print("No restart reached a finite cost.")
+            self.best_frequencies, self.best_cost = None, np.inf
+            return self.best_frequencies, self.best_cost
+        _, self.best_cost, self.best_frequencies, message = min(
+            finite, key=lambda result: (result[1], result[0])
+        )
+        if verbose:
+            print(message)
+        return self.best_frequencies, self.best_cost
+
+    def global_optimize(
+        self,
+        strategy="differential_evolution",
+        max_evaluations=20000,
+        seed=None,
+        verbose=True,
+        **options,
+    ):
+        """Global search over the qubit and SNAIL frequencies.
+
+        Args:
+            strategy: ``"differential_evolution"``, ``"basinhopping"``,
+                ``"cma-es"``, or the single-frequency move searches
+                ``"annealing"`` and ``"coordinate_descent"`` (see
+                corral_crowding.global_search). SINGLE_SNAIL_STRATEGIES
+                need a single-SNAIL module.
+            max_evaluations: Budget of cost evaluations, so strategies and
+                seeds can be compared at equal cost.
+            seed: Seed of the strategy's sampler.
+            verbose: Print the search result.
+            **options: Forwarded to the strategy.
+
+        Returns:
+            Tuple ``(best_frequencies, best_cost)`` as optimize_frequencies,
+            ``(None, inf)`` if the budget is too small for the strategy to
+            score any allocation.
+        """
+        if strategy not in GLOBAL_STRATEGIES:
+            raise ValueError(f"Unknown global strategy: {strategy}")
+        if strategy in SINGLE_SNAIL_STRATEGIES and self.module_graph.num_snails > 1:
+            raise ValueError(f"{strategy} needs a single-SNAIL module")
+        bounds = np.array(self._bounds())
+        result = GLOBAL_STRATEGIES[strategy](
+            self.cost_engine, bounds, max_evaluations, seed=seed, **options
+        )
+        if verbose:
+            print(f"{result.message} ({result.nfev} evaluations)")
+        if result.x is None:
+            # the budget did not cover a single population or line search
+            if verbose:
+                print("No allocation was scored within the budget.")
+            self.best_frequencies, self.best_cost = None, np.inf
+            return self.best_frequencies, self.best_cost
+        self.best_frequencies = result.x
+        self.best_cost = np.mean(self.get_final_infidelities(result.x))
         return self.best_frequencies, self.best_cost
 
     def get_final_infidelities(self, freqs=None):
@@ -182,19 +523,8 @@ class GateFidelityOptimizer:
         else:
             temp_freqs = freqs
 
-        qubit_frequencies, snail_frequency = (
-            temp_freqs[:-1],
-            temp_freqs[-1],
-        )
-        interaction_data = self.module_graph.get_interaction_frequencies(
-            qubit_frequencies, snail_frequency
-        )
-        gate_infidelities = {
-            edge: self._compute_gate_infidelity(edge, interaction_data)[1]
-            for edge in list(interaction_data["qubit-qubit"])
-        }
-
-        return sorted(gate_infidelities.values(), reverse=True)[self.drop_k :]
+        _, gate_infidelities = self.cost_engine.gate_infidelities(temp_freqs)
+        return sorted(gate_infidelities[0], reverse=True)[self.drop_k :]
 
         # avg_gate_infidelity = gmean(list(gate_infidelities.values()))
         # return avg_gate_infidelity
@@ -203,6 +533,9 @@ class GateFidelityOptimizer:
         if self.best_frequencies is None:
             print("No optimized frequencies available.")
             return
+        if self.module_graph.num_snails > 1:
+            self._report_chip_results()
+            return
 
         qubit_frequencies, snail_frequency = (
             self.best_frequencies[:-1],
@@ -252,3 +585,30 @@ class GateFidelityOptimizer:
         self.module_graph.plot_interaction_frequencies(
             qubit_frequencies, snail_frequency
         )
+
+    def _report_chip_results(self):
+        num_qubits = self.module_graph.num_qubits
+        qubit_frequencies = self.best_frequencies[:num_qubits]
+        snail_frequencies = self.best_frequencies[num_qubits:]
+        if not self.use_lifetime:
+            print("Lifetime loss not considered.")
+        print("Qubit Frequencies:", qubit_frequencies, "GHz")
+        print("SNAIL Frequencies:", snail_frequencies, "GHz")
+        crowding, with_lifetime = self.cost_engine.gate_infidelities(
+            self.best_frequencies
+        )
+        for label, no_lifetime, lifetime in zip(
+            self.cost_engine.edge_labels, crowding[0], with_lifetime[0]
+        ):
+            print(
+                f"  Gate {label}: fidelity (no lifetime loss): {1 - no_lifetime:.6e},"
+                f" fidelity (with lifetime loss): {1 - lifetime:.6e}"
+            )
+        print(
+            "Average Infidelity (geometric mean):",
+            gmean(self.get_final_infidelities()),
+        )
+        self.module_graph.plot_graph(qubit_frequencies, snail_frequencies)
+        self.module_graph.plot_interaction_frequencies(
+            qubit_frequencies, snail_frequencies
+        )
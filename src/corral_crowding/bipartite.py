@@ -1,7 +1,10 @@
 import heapq
 import logging
+import math
 import random
-from itertools import chain
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from itertools import chain, combinations
 
 import matplotlib.pyplot as plt
 
@@ -10,6 +13,8 @@ import networkx as nx
 import numpy as np
 from networkx.algorithms import bipartite
 from networkx.drawing.layout import bipartite_layout
+from scipy.optimize import Bounds, LinearConstraint, OptimizeResult, milp
+from scipy.sparse import csr_array
 
 # drawing graphs using matplotlib
 from networkx.drawing.nx_pylab import draw_kamada_kawai as draw
@@ -92,6 +97,16 @@ def plot_graphs(
     plt.show()
 
 
+def _same_labeled_graph(G, H):
+    """Whether ``G`` and ``H`` have the same nodes and the same edges."""
+    return (
+        G.number_of_nodes() == H.number_of_nodes()
+        and G.number_of_edges() == H.number_of_edges()
+        and all(node in H for node in G)
+        and all(H.has_edge(u, v) for u, v in G.edges())
+    )
+
+
 def _get_induced_projected_edges(G, a, b):
     # we want to return all edges (ai, aj)
     # NOTE use set() so order doesn't matter
@@ -117,7 +132,621 @@ def _get_candidate_edges(G, A_nodes, B_nodes, max_degree_A, max_degree_B):
     )
 
 
-def construct_bipartite_graph(G_A_projected, max_degree_A, max_degree_B):
+def construct_bipartite_graph(
+    G_A_projected,
+    max_degree_A,
+    max_degree_B,
+    method="greedy",
+    time_limit=60,
+    seed=None,
+):
+    """Builds a bipartite graph whose projection onto A is ``G_A_projected``.
+
+    Same construction and outputs as _construct_bipartite_graph_reference,
+    but the bipartite adjacency, the projection onto A and the B nodes with
+    spare degree are kept as sets and updated with every added edge, so
+    each step only touches the B nodes that can take a candidate edge.
+    The result is replayed into a networkx graph in the reference's node
+    and edge order.
+
+    With a ``seed`` the edges are taken in a random order and orientation,
+    and ties between B nodes of equal degree (step 1) and between nodes of
+    equal remaining degree (step 2) are broken at random instead of by
+    label. ``method="exact"`` returns the fewest B nodes found by
+    exact_bipartite_graph and ``method="portfolio"`` the best of the
+    randomized orders tried by portfolio_bipartite_graph, both within
+    ``time_limit`` seconds.
+
+    Returns:
+        Tuple ``(G_rebuilt, G_A, G_B)`` of the bipartite graph and its two
+        projections, or ``(None, None, None)`` if no graph is found.
+    """
+    assert max_degree_B >= 2
+    if method == "exact":
+        result = exact_bipartite_graph(
+            G_A_projected, max_degree_A, max_degree_B, time_limit=time_limit
+        )
+        return result.graphs if result.success else (None, None, None)
+    if method == "portfolio":
+        result = portfolio_bipartite_graph(
+            G_A_projected, max_degree_A, max_degree_B, deadline=time_limit, seed=seed
+        )
+        return result.graphs if result.success else (None, None, None)
+    if method != "greedy":
+        raise ValueError(f"Unknown method: {method}")
+    if not is_possibly_realizable(G_A_projected, max_degree_A, max_degree_B):
+        return None, None, None
+    # working copy, delete edges from this as satisfied
+    G_A_projected_stack = [set((i, j)) for i, j in G_A_projected.edges()]
+
+    _num_A = len(G_A_projected.nodes())
+    A_nodes = list(G_A_projected.nodes())
+    B_nodes = [1 + _num_A, 2 + _num_A]
+
+    target = {a: set(G_A_projected.adj[a]) for a in A_nodes}
+    adjacency = {node: set() for node in chain(A_nodes, B_nodes)}
+    projected = {a: set() for a in A_nodes}  # A nodes sharing a B node
+    open_B = set(B_nodes)  # degree < max_degree_B
+    roomy_B = set(B_nodes)  # degree < max_degree_B - 1
+    empty_B = set(B_nodes)
+    edges = []
+    # tie-break keys: the labels themselves, or random ones with a seed
+    rng = random.Random(seed)
+    if seed is None:
+        priority = {node: node for node in chain(A_nodes, B_nodes)}
+    else:
+        rng.shuffle(G_A_projected_stack)
+        G_A_projected_stack = [
+            rng.sample(list(edge), 2) for edge in G_A_projected_stack
+        ]
+        priority = {node: rng.random() for node in chain(A_nodes, B_nodes)}
+
+    def add_b():
+        b = _num_A + len(B_nodes) + 1
+        priority[b] = b if seed is None else rng.random()
+        B_nodes.append(b)
+        adjacency[b] = set()
+        open_B.add(b)
+        empty_B.add(b)
+        roomy_B.add(b)
+        return b
+
+    def add_edge(a, b):
+        for other in adjacency[b]:
+            projected[a].add(other)
+            projected[other].add(a)
+        adjacency[a].add(b)
+        adjacency[b].add(a)
+        edges.append((a, b))
+        degree = len(adjacency[b])
+        empty_B.discard(b)
+        if degree >= max_degree_B:
+            open_B.discard(b)
+        if degree >= max_degree_B - 1:
+            roomy_B.discard(b)
+
+    def induced_valid(a, b):
+        # every A node on b would become a projected neighbour of a
+        return adjacency[b] <= target[a]
+
+    ai, aj = G_A_projected_stack.pop()
+    add_edge(ai, B_nodes[0])
+    add_edge(aj, B_nodes[0])
+
+    # Step 1, satisfy the projection
+    while G_A_projected_stack:
+        ai, aj = G_A_projected_stack.pop()
+        if aj in projected[ai]:
+            continue
+        if not empty_B:
+            add_b()
+
+        free_i = len(adjacency[ai]) < max_degree_A
+        free_j = len(adjacency[aj]) < max_degree_A
+        # a b already on one side that can take the other, or an unused b
+        # with room for both edges; greedy on the highest degree(b)
+        options = set()
+        if free_j:
+            options.update(b for b in adjacency[ai] & open_B if b not in adjacency[aj])
+        if free_i:
+            options.update(b for b in adjacency[aj] & open_B if b not in adjacency[ai])
+        if free_i and free_j:
+            options.update(
+                b for b in roomy_B if ai not in adjacency[b] and aj not in adjacency[b]
+            )
+        for b in sorted(options, key=lambda b: (-len(adjacency[b]), priority[b])):
+            if all(b in adjacency[a] or induced_valid(a, b) for a in (ai, aj)):
+                for a in (ai, aj):
+                    if b not in adjacency[a]:
+                        add_edge(a, b)
+                break
+        else:
+            return None, None, None
+
+    # Step 2: fill the remaining degrees, exactly as the reference does;
+    # without a seed (remaining, label, label) orders as (remaining, label)
+    A_heap = [
+        (max_degree_A - len(adjacency[a]), priority[a], a)
+        for a in A_nodes
+        if len(adjacency[a]) < max_degree_A
+    ]
+    heapq.heapify(A_heap)
+    B_heap = [
+        (max_degree_B - len(adjacency[b]), priority[b], b)
+        for b in B_nodes
+        if len(adjacency[b]) < max_degree_B
+    ]
+    heapq.heapify(B_heap)
+    while A_heap:
+        a_remaining, _, a = heapq.heappop(A_heap)
+        assigned = False
+        for b_remaining, _, b in B_heap:
+            if induced_valid(a, b):
+                add_edge(a, b)
+                assigned = True
+                if b_remaining - 1 > 0:
+                    heapq.heappush(B_heap, (b_remaining - 1, priority[b], b))
+                if a_remaining - 1 > 0:
+                    heapq.heappush(A_heap, (a_remaining - 1, priority[a], a))
+                break
+        if not assigned:
+            new_b = add_b()
+            add_edge(a, new_b)
+            heapq.heappush(B_heap, (max_degree_B - 1, priority[new_b], new_b))
+
+    G_rebuilt = nx.Graph()
+    G_rebuilt.add_nodes_from(A_nodes, bipartite=0)
+    G_rebuilt.add_nodes_from(B_nodes, bipartite=1)
+    G_rebuilt.add_edges_from(edges)
+
+    # if there is a node B with degree 0, remove it
+    for b in B_nodes:
+        if G_rebuilt.degree(b) == 0:
+            G_rebuilt.remove_node(b)
+            B_nodes.remove(b)
+
+    # Step 3. Validation
+    # A keeps its labels, so the projection must have the very same edges
+    G_A = nx.bipartite.projected_graph(G_rebuilt, A_nodes)
+    G_B = nx.bipartite.projected_graph(G_rebuilt, B_nodes)
+    if not _same_labeled_graph(G_A, G_A_projected):
+        # if this is ever raised, the logic of the algorithm is flawed
+        raise ValueError("G_A_projected is not isomorphic to G_A")
+
+    return G_rebuilt, G_A, G_B
+
+
+# neighbourhoods up to this size get exact independence and clique numbers
+_EXACT_NEIGHBOURHOOD = 16
+
+
+def _independence_number(candidates, adjacency):
+    """Size of a largest independent set within the ``candidates`` bitmask."""
+    if not candidates:
+        return 0
+    low = candidates & -candidates
+    rest = candidates ^ low
+    neighbours = adjacency[low.bit_length() - 1]
+    taken = 1 + _independence_number(rest & ~neighbours, adjacency)
+    if not rest & neighbours:
+        return taken
+    return max(taken, _independence_number(rest, adjacency))
+
+
+def _greedy_independent_set(candidates, adjacency):
+    """Size of a maximal independent set within ``candidates``."""
+    size = 0
+    while candidates:
+        low = candidates & -candidates
+        candidates &= ~(low | adjacency[low.bit_length() - 1])
+        size += 1
+    return size
+
+
+def _snail_demands(G_A_projected, max_degree_B, max_degree_A=None):
+    """Fewest B nodes per A node, and the most A nodes one B node can couple.
+
+    An A node of degree ``d`` needs ``ceil(d / (max_degree_B - 1))`` B
+    nodes, and one per node of an independent set of its neighbourhood,
+    since non-adjacent neighbours cannot share a B node. The A nodes of a
+    B node form a clique, so it couples at most the clique number of them.
+    With ``max_degree_A`` the search stops at the first A node above it and
+    returns ``None``.
+    """
+    nodes = list(G_A_projected.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = [0] * len(nodes)
+    for u, v in G_A_projected.edges():
+        if u != v:
+            adjacency[index[u]] |= 1 << index[v]
+            adjacency[index[v]] |= 1 << index[u]
+    demands = []
+    clique_size = 2 if any(adjacency) else 0
+    for node, neighbours in zip(nodes, adjacency):
+        degree = bin(neighbours).count("1")
+        demand = math.ceil(degree / (max_degree_B - 1))
+        if max_degree_A is not None and demand > max_degree_A:
+            return None
+        if degree > _EXACT_NEIGHBOURHOOD:
+            demand = max(demand, _greedy_independent_set(neighbours, adjacency))
+            clique_size = max_degree_B
+        elif degree:
+            demand = max(demand, _independence_number(neighbours, adjacency))
+            if clique_size < max_degree_B:
+                complement = {
+                    i: neighbours & ~adjacency[i] & ~(1 << i)
+                    for i in map(index.get, G_A_projected.adj[node])
+                }
+                clique_size = max(
+                    clique_size, 1 + _independence_number(neighbours, complement)
+                )
+        if max_degree_A is not None and demand > max_degree_A:
+            return None
+        demands.append(demand)
+    return demands, min(clique_size, max_degree_B)
+
+
+def snail_lower_bound(G_A_projected, max_degree_B):
+    """Lower bound on the number of B nodes realizing ``G_A_projected``.
+
+    Each A node needs the B nodes counted by _snail_demands, each B node
+    joins at most ``max_degree_B`` A nodes and covers at most ``C(k, 2)``
+    edges, with ``k`` the most A nodes a B node can couple.
+    """
+    num_edges = G_A_projected.number_of_edges()
+    if not num_edges:
+        return 0
+    demands, clique_size = _snail_demands(G_A_projected, max_degree_B)
+    return max(
+        math.ceil(num_edges / math.comb(clique_size, 2)),
+        max(demands),
+        math.ceil(sum(demands) / max_degree_B),
+    )
+
+
+def is_possibly_realizable(G_A_projected, max_degree_A, max_degree_B):
+    """Fast necessary conditions for realizing ``G_A_projected``.
+
+    ``False`` proves that no bipartite graph with these degree limits
+    projects onto ``G_A_projected``: some A node needs more than
+    ``max_degree_A`` B nodes (see _snail_demands). ``True`` only means the
+    checks pass.
+    """
+    return _snail_demands(G_A_projected, max_degree_B, max_degree_A) is not None
+
+
+def _realize(A_nodes, cliques):
+    """Bipartite graph with one B node per clique of A nodes."""
+    _num_A = len(A_nodes)
+    B_nodes = [_num_A + 1 + k for k in range(len(cliques))]
+    G_rebuilt = nx.Graph()
+    G_rebuilt.add_nodes_from(A_nodes, bipartite=0)
+    G_rebuilt.add_nodes_from(B_nodes, bipartite=1)
+    G_rebuilt.add_edges_from(
+        (a, b) for b, clique in zip(B_nodes, cliques) for a in clique
+    )
+    G_A = nx.bipartite.projected_graph(G_rebuilt, A_nodes)
+    G_B = nx.bipartite.projected_graph(G_rebuilt, B_nodes)
+    return G_rebuilt, G_A, G_B
+
+
+def exact_bipartite_graph(
+    G_A_projected, max_degree_A, max_degree_B, time_limit=60, mip_gap=0.0
+):
+    """Bipartite realization of ``G_A_projected`` with the fewest B nodes.
+
+    Every B node (SNAIL) joins a clique of at most ``max_degree_B`` A nodes,
+    every A node joins at most ``max_degree_A`` B nodes, and the cliques must
+    cover every edge, so this is a degree-bounded edge clique cover, solved
+    as an ILP with SciPy's HiGHS ``milp``. The greedy
+    construct_bipartite_graph, without its hanging B nodes, is the warm
+    start: it sets the number of B slots and is returned if the solver
+    finds nothing better in time. Slots are used in order and edge ``i``
+    may only be covered by slots ``0..i``, which removes the relabelings of
+    a solution.
+
+    Args:
+        G_A_projected: Target qubit connectivity.
+        max_degree_A: Maximum number of B nodes per A node.
+        max_degree_B: Maximum number of A nodes per B node.
+        time_limit: Solver time limit in seconds.
+        mip_gap: Relative optimality gap at which the solver stops.
+
+    Returns:
+        OptimizeResult with ``graphs`` (``G_rebuilt, G_A, G_B`` as
+        construct_bipartite_graph), the number of B nodes ``fun``, its
+        ``lower_bound`` and relative ``mip_gap``, ``greedy_snails``, the
+        ``status`` (``"optimal"``, ``"time_limit"`` or ``"infeasible"``) and
+        the ``runtime``.
+    """
+    assert max_degree_B >= 2
+    began = time.perf_counter()
+    A_nodes = list(G_A_projected.nodes())
+    index = {a: i for i, a in enumerate(A_nodes)}
+    edges = [(index[u], index[v]) for u, v in G_A_projected.edges() if u != v]
+    lower_bound = snail_lower_bound(G_A_projected, max_degree_B)
+
+    def result(cliques, status, lower_bound, greedy_snails):
+        if cliques is None:
+            return OptimizeResult(
+                graphs=(None, None, None),
+                fun=np.nan,
+                lower_bound=lower_bound,
+                mip_gap=np.nan,
+                greedy_snails=greedy_snails,
+                status=status,
+                runtime=time.perf_counter() - began,
+                success=False,
+            )
+        graphs = _realize(A_nodes, [[A_nodes[a] for a in c] for c in cliques])
+        if not _same_labeled_graph(graphs[1], G_A_projected):
+            raise ValueError("G_A_projected is not isomorphic to G_A")
+        lower_bound = min(lower_bound, len(cliques))
+        return OptimizeResult(
+            graphs=graphs,
+            fun=len(cliques),
+            lower_bound=lower_bound,
+            mip_gap=(len(cliques) - lower_bound) / max(len(cliques), 1),
+            greedy_snails=greedy_snails,
+            status=status,
+            runtime=time.perf_counter() - began,
+            success=True,
+        )
+
+    if not edges:
+        return result([], "optimal", 0, 0)
+    if not is_possibly_realizable(G_A_projected, max_degree_A, max_degree_B):
+        return result(None, "infeasible", lower_bound, np.nan)
+    G_greedy, _, _ = construct_bipartite_graph(
+        G_A_projected, max_degree_A, max_degree_B
+    )
+    greedy = None
+    if G_greedy is not None:
+        # hanging B nodes (one A neighbour) add nothing to the projection
+        greedy = [
+            sorted(index[a] for a in G_greedy.adj[b])
+            for b, side in G_greedy.nodes(data="bipartite")
+            if side == 1 and G_greedy.degree(b) >= 2
+        ]
+        # step 2 of the greedy can overfill a B node, then it is no warm start
+        memberships = np.bincount(
+            [a for clique in greedy for a in clique], minlength=len(A_nodes)
+        )
+        if any(len(clique) > max_degree_B for clique in greedy) or np.any(
+            memberships > max_degree_A
+        ):
+            greedy = None
+    greedy_snails = np.nan if greedy is None else len(greedy)
+    if greedy is not None and len(greedy) <= lower_bound:
+        return result(greedy, "optimal", lower_bound, greedy_snails)
+
+    # variables: x[a, k] (A node a on slot k), z[k] (slot used), and
+    # w[e, k] (slot k covers edge e, only for k <= e)
+    num_A, num_edges = len(A_nodes), len(edges)
+    slots = num_edges if greedy is None else len(greedy)
+    x = np.arange(num_A * slots).reshape(num_A, slots)
+    z = num_A * slots + np.arange(slots)
+    w_keys = [(e, k) for e in range(num_edges) for k in range(min(e + 1, slots))]
+    w = {key: z[-1] + 1 + i for i, key in enumerate(w_keys)}
+    num_variables = z[-1] + 1 + len(w_keys)
+
+    rows, lower, upper = [], [], []
+
+    def add(coefficients, lb, ub):
+        rows.append(coefficients)
+        lower.append(lb)
+        upper.append(ub)
+
+    for (e, k), variable in w.items():
+        u, v = edges[e]
+        add({variable: 1.0, x[u, k]: -1.0}, -np.inf, 0)
+        add({variable: 1.0, x[v, k]: -1.0}, -np.inf, 0)
+    for e in range(num_edges):
+        add({w[e, k]: 1.0 for k in range(min(e + 1, slots))}, 1, np.inf)
+    adjacency = [set() for _ in A_nodes]
+    for u, v in edges:
+        adjacency[u].add(v)
+        adjacency[v].add(u)
+    active = [a for a in range(num_A) if adjacency[a]]
+    for u, v in combinations(active, 2):
+        if v not in adjacency[u]:
+            for k in range(slots):
+                add({x[u, k]: 1.0, x[v, k]: 1.0}, -np.inf, 1)
+    for k in range(slots):
+        add({**{x[a, k]: 1.0 for a in active}, z[k]: -max_degree_B}, -np.inf, 0)
+        if k:
+            add({z[k]: 1.0, z[k - 1]: -1.0}, -np.inf, 0)
+    for a in active:
+        add({x[a, k]: 1.0 for k in range(slots)}, -np.inf, max_degree_A)
+    add({z[k]: 1.0 for k in range(slots)}, lower_bound, np.inf)
+
+    data, indices, indptr = [], [], [0]
+    for row in rows:
+        indices += list(row)
+        data += list(row.values())
+        indptr.append(len(indices))
+    matrix = csr_array((data, indices, indptr), shape=(len(rows), num_variables))
+    upper_bounds = np.ones(num_variables)
+    upper_bounds[x[[a for a in range(num_A) if not adjacency[a]]]] = 0
+    c = np.zeros(num_variables)
+    c[z] = 1.0
+    solution = milp(
+        c,
+        constraints=LinearConstraint(matrix, lower, upper),
+        integrality=np.ones(num_variables),
+        bounds=Bounds(np.zeros(num_variables), upper_bounds),
+        options={"time_limit": time_limit, "mip_rel_gap": mip_gap, "disp": False},
+    )
+    dual_bound = getattr(solution, "mip_dual_bound", None)
+    if dual_bound is not None and np.isfinite(dual_bound):
+        lower_bound = max(lower_bound, math.ceil(dual_bound - 1e-6))
+    status = {0: "optimal", 1: "time_limit", 2: "infeasible"}.get(
+        solution.status, "error"
+    )
+    if solution.x is None:
+        return result(greedy, status, lower_bound, greedy_snails)
+    members = solution.x[x] > 0.5
+    cliques = [
+        list(np.flatnonzero(members[:, k]))
+        for k in range(slots)
+        if solution.x[z[k]] > 0.5 and members[:, k].sum() >= 2
+    ]
+    if greedy is not None and len(greedy) <= len(cliques):
+        cliques = greedy
+    return result(cliques, status, lower_bound, greedy_snails)
+
+
+def _coupling_snails(G_rebuilt, B_nodes):
+    """Number of B nodes joining at least two A nodes."""
+    return sum(G_rebuilt.degree(b) >= 2 for b in B_nodes)
+
+
+def _portfolio_attempt(index, seed, G_A_projected, max_degree_A, max_degree_B):
+    try:
+        graphs = construct_bipartite_graph(
+            G_A_projected, max_degree_A, max_degree_B, seed=seed
+        )
+    except ValueError:
+        return index, seed, (None, None, None), None
+    if graphs[0] is None:
+        return index, seed, graphs, None
+    return index, seed, graphs, _coupling_snails(graphs[0], graphs[2].nodes())
+
+
+def portfolio_bipartite_graph(
+    G_A_projected,
+    max_degree_A,
+    max_degree_B,
+    attempts=64,
+    workers=None,
+    seed=None,
+    deadline=None,
+    first_valid=False,
+):
+    """Best of many randomized greedy constructions.
+
+    Attempt 0 is the plain construct_bipartite_graph; every other attempt
+    runs it with its own seed, i.e. a random edge order and orientation and
+    random tie-breaks, which often succeeds where the labelled order fails
+    and may need fewer B nodes. Attempts are ranked by the B nodes joining
+    at least two A nodes, as exact_bipartite_graph counts them, and the
+    search stops early once an attempt reaches snail_lower_bound.
+
+    Args:
+        G_A_projected: Target qubit connectivity.
+        max_degree_A: Maximum number of B nodes per A node.
+        max_degree_B: Maximum number of A nodes per B node.
+        attempts: Number of constructions to try.
+        workers: Run the attempts concurrently in a process pool of this size.
+        seed: Seed for the attempts. Attempt ``i`` gets the ``i``-th child of
+            ``SeedSequence(seed)``, ties between equally good attempts go to
+            the lowest index, and an early stop keeps exactly the attempts up
+            to the lowest index that triggers it, so a run without
+            ``deadline`` returns the same graphs and seed for any number of
+            workers.
+        deadline: Stop after this many seconds and return the best attempt
+            finished so far. Pending attempts are cancelled, but with
+            ``workers`` the attempts already running are not interrupted:
+            they keep their worker processes busy after the function
+            returns, until each construction finishes.
+        first_valid: Return the valid realization of the lowest index instead
+            of the one with the fewest B nodes.
+
+    Returns:
+        OptimizeResult with ``graphs`` (``G_rebuilt, G_A, G_B`` as
+        construct_bipartite_graph, or ``None`` three times), the number of
+        coupling B nodes ``fun``, the ``seed`` of the winning attempt (``None`` for
+        the plain greedy), the number of attempts ``nit`` that finished,
+        ``successes``, ``runtime`` and ``success``.
+    """
+    start = time.perf_counter()
+    children = np.random.SeedSequence(seed).spawn(attempts - 1)
+    seeds = [None] + [int(child.generate_state(1)[0]) for child in children]
+    lower_bound = snail_lower_bound(G_A_projected, max_degree_B)
+    if not is_possibly_realizable(G_A_projected, max_degree_A, max_degree_B):
+        seeds = []  # no attempt can succeed
+    results = []
+
+    def stops(result):
+        if result[3] is None:
+            return False
+        return first_valid or result[3] <= lower_bound
+
+    if workers is None:
+        for index, attempt_seed in enumerate(seeds):
+            if deadline is not None and time.perf_counter() - start > deadline:
+                break
+            result = _portfolio_attempt(
+                index, attempt_seed, G_A_projected, max_degree_A, max_degree_B
+            )
+            results.append(result)
+            if stops(result):
+                break
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(
+                    _portfolio_attempt,
+                    index,
+                    attempt_seed,
+                    G_A_projected,
+                    max_degree_A,
+                    max_degree_B,
+                )
+                for index, attempt_seed in enumerate(seeds)
+            ]
+            stopped = None
+            for future in as_completed(futures, timeout=deadline):
+                results.append(future.result())
+                if stops(results[-1]):
+                    stopped = results[-1][0]
+                    break
+            if stopped is not None:
+                # stop where the serial loop would: at the lowest index that
+                # meets the rule, so finish the attempts before it
+                finished = {result[0] for result in results}
+                for index in range(stopped):
+                    if index in finished:
+                        continue
+                    remaining = (
+                        None
+                        if deadline is None
+                        else max(0.0, deadline - (time.perf_counter() - start))
+                    )
+                    results.append(futures[index].result(timeout=remaining))
+                    if stops(results[-1]):
+                        stopped = index
+                        break
+                results = [result for result in results if result[0] <= stopped]
+        except TimeoutError:
+            pass
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    valid = [result for result in results if result[3] is not None]
+    if first_valid:
+        best = min(valid, key=lambda result: result[0], default=None)
+    else:
+        # fewest coupling B nodes, then fewest hanging ones
+        best = min(
+            valid,
+            key=lambda result: (result[3], len(result[2][2]), result[0]),
+            default=None,
+        )
+    return OptimizeResult(
+        graphs=best[2] if best else (None, None, None),
+        fun=best[3] if best else None,
+        seed=best[1] if best else None,
+        nit=len(results),
+        successes=len(valid),
+        runtime=time.perf_counter() - start,
+        success=best is not None,
+    )
+
+
+def _construct_bipartite_graph_reference(G_A_projected, max_degree_A, max_degree_B):
+    """Original construct_bipartite_graph, rebuilding the projection per edge."""
     assert max_degree_B >= 2
     # working copy, delete edges from this as satisfied
     G_A_projected_stack = [set((i, j)) for i, j in G_A_projected.edges()]
@@ -0,0 +1,302 @@
+"""Joint frequency allocation of multi-module chips.
+
+A chip is a snail/qubit topology as in corral_crowding.topologies: every
+SNAIL drives the gates between the qubits coupled to it (a module), and
+qubits can be shared between modules. On top of the single-module terms,
+every gate sees the modes of the neighbouring modules, those sharing a qubit
+with its own, through the weaker "snail-qubit (inter)" and "qubit-sub
+(inter)" fits.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import gmean
+from tqdm import tqdm
+
+from corral_crowding.allocation_optimizer import (
+    fit_crosstalk_params,
+    fit_speedlimit_params,
+)
+from corral_crowding.crowding_cost import ChipCost
+from corral_crowding.global_search import cma_es_search, differential_evolution_search
+from corral_crowding.module_graph import QuantumModuleGraph
+
+BLOCK_STRATEGIES = {
+    "cma-es": cma_es_search,
+    "differential_evolution": differential_evolution_search,
+}
+
+
+class _BlockCost:
+    """Cost of one module's frequencies with the rest of the chip fixed."""
+
+    def __init__(self, restricted, variables, frequencies):
+        self.restricted = restricted
+        self.variables = variables
+        self.frequencies = np.asarray(frequencies, dtype=float)
+
+    def total_infidelities(self, block_frequencies):
+        block_frequencies = np.atleast_2d(block_frequencies)
+        frequencies = np.repeat(self.frequencies[None], len(block_frequencies), 0)
+        frequencies[:, self.variables] = block_frequencies
+        return self.restricted.total_infidelities(frequencies)
+
+    def __call__(self, block_frequencies):
+        return self.total_infidelities(block_frequencies)[0]
+
+
+def block_colors(interactions):
+    """Greedy coloring of modules so same-colored blocks never interact.
+
+    Args:
+        interactions: For each module, the modules whose block shares a
+            cost term with its own, as from ChipCost.block_interactions.
+    """
+    colors = {}
+    order = sorted(range(len(interactions)), key=lambda s: -len(interactions[s]))
+    for snail in order:
+        taken = {colors[b] for b in interactions[snail] if b in colors}
+        colors[snail] = next(c for c in itertools.count() if c not in taken)
+    groups = [[] for _ in range(max(colors.values(), default=-1) + 1)]
+    for snail in sorted(colors):
+        groups[colors[snail]].append(snail)
+    return groups
+
+
+# set once per pool worker by _init_worker, see ChipOptimizer
+_WORKER_OPTIMIZER = None
+
+
+def _init_worker(optimizer):
+    global _WORKER_OPTIMIZER
+    _WORKER_OPTIMIZER = optimizer
+
+
+def _block_worker(snail, frequencies, seed_sequence, strategy, budget):
+    return _WORKER_OPTIMIZER._optimize_block(
+        snail, frequencies, seed_sequence, strategy, budget
+    )
+
+
+class ChipOptimizer:
+    """Frequency allocation of a multi-module chip.
+
+    Alternates over modules, re-optimizing each module's qubit and SNAIL
+    frequencies against the rest of the chip (block-coordinate descent).
+    Modules whose blocks share no cost term are independent and are
+    optimized concurrently, one color class at a time. A block result is
+    kept only if it lowers the full chip cost, so the cost never increases.
+
+    Args:
+        snails: SNAIL node ids of the topology (e.g. ``topologies.corral[0]``).
+        qubits: Qubit node ids of the topology.
+        edges: (qubit, snail) coupling pairs of the topology.
+        lambdaq, eta, g3, alpha, min_bare_space_ghz, T_1, qubit_bounds,
+        snail_bounds, drop_k, use_lifetime, use_cache, infidelity_params,
+        speedlimit_params: As for GateFidelityOptimizer.
+    """
+
+    def __init__(
+        self,
+        snails,
+        qubits,
+        edges,
+        lambdaq,
+        eta,
+        g3,
+        alpha=0.12,
+        min_bare_space_ghz=0.2,
+        T_1=120e-6,
+        qubit_bounds=(3.3, 5.7),
+        snail_bounds=(4.2, 4.7),
+        drop_k=0,
+        use_lifetime=False,
+        use_cache=True,
+        infidelity_params=None,
+        speedlimit_params=None,
+    ):
+        self.qubit_bounds = qubit_bounds
+        self.snail_bounds = snail_bounds
+        self.drop_k = drop_k
+        self.use_lifetime = use_lifetime
+        if infidelity_params is None:
+            infidelity_params, _ = fit_crosstalk_params(
+                lambdaq, eta, g3, use_cache=use_cache
+            )
+        if speedlimit_params is None:
+            speedlimit_params, _ = fit_speedlimit_params(
+                snail_bounds, T_1, g3, lambdaq, use_cache=use_cache
+            )
+        self.infidelity_params = infidelity_params
+        self.speedlimit_params = speedlimit_params
+        self.module_graph = QuantumModuleGraph.from_topology(snails, qubits, edges)
+        self.cost_engine = ChipCost(
+            self.module_graph,
+            infidelity_params,
+            speedlimit_params,
+            alpha=alpha,
+            min_bare_space_ghz=min_bare_space_ghz,
+            drop_k=drop_k,
+            use_lifetime=use_lifetime,
+        )
+        self.bounds = np.array(
+            [qubit_bounds] * len(qubits) + [snail_bounds] * len(snails), dtype=float
+        )
+        self.best_frequencies = None
+        self.best_cost = np.inf
+        self.sweep_costs = []
+
+    def compute_total_infidelity(self, frequencies):
+        return self.cost_engine(frequencies)
+
+    def _optimize_block(self, snail, frequencies, seed_sequence, strategy, budget):
+        engine = self.cost_engine
+        variables = engine.block_variables(snail)
+        block = _BlockCost(engine.restrict(snail), variables, frequencies)
+        options = {"initial": frequencies[variables]} if strategy == "cma-es" else {}
+        result = BLOCK_STRATEGIES[strategy](
+            block,
+            self.bounds[variables],
+            budget,
+            seed=np.random.default_rng(seed_sequence),
+            **options,
+        )
+        # the restricted cost leaves drop_k out, so judge on the full cost
+        current = engine(frequencies)
+        if result.x is not None:
+            candidate = frequencies.copy()
+            candidate[variables] = result.x
+            cost = engine(candidate)
+            if cost < current:
+                return snail, result.x, cost
+        return snail, frequencies[variables], current
+
+    def _merge_blocks(self, frequencies, cost, results):
+        """Applies the block results of one color, keeping the cost monotone.
+
+        Blocks of one color change disjoint terms, so their improvements
+        add up, except through ``drop_k``; if the combined move is worse,
+        the blocks are applied one at a time, each only if it helps.
+        """
+        engine = self.cost_engine
+        merged = frequencies.copy()
+        for snail, values, _ in results:
+            merged[engine.block_variables(snail)] = values
+        merged_cost = engine(merged)
+        if merged_cost <= cost:
+            return merged, merged_cost
+        for snail, values, _ in results:
+            candidate = frequencies.copy()
+            candidate[engine.block_variables(snail)] = values
+            candidate_cost = engine(candidate)
+            if candidate_cost < cost:
+                frequencies, cost = candidate, candidate_cost
+        return frequencies, cost
+
+    def optimize_frequencies(
+        self,
+        sweeps=8,
+        workers=None,
+        seed=None,
+        strategy="cma-es",
+        block_evaluations=2000,
+        initial=None,
+        tol=1e-9,
+        verbose=True,
+    ):
+        """Block-coordinate descent over the modules of the chip.
+
+        Args:
+            sweeps: Maximum passes over all modules.
+            workers: Process pool size for the independent blocks; ``None``
+                runs in-process. Results do not depend on it.
+            seed: Seed of the initial allocation and the block searches.
+            strategy: Block search, ``"cma-es"`` or ``"differential_evolution"``.
+            block_evaluations: Evaluation budget of each block search.
+            initial: Starting allocation; uniform random within bounds if None.
+            tol: Stop once a sweep improves the cost by less than this.
+            verbose: Show progress.
+
+        Returns:
+            Tuple ``(best_frequencies, best_cost)`` of the best allocation
+            seen, the cost being the mean final gate infidelity as for
+            GateFidelityOptimizer. The chip cost after every sweep is kept
+            in ``sweep_costs``.
+        """
+        if strategy not in BLOCK_STRATEGIES:
+            raise ValueError(f"Unknown block strategy: {strategy}")
+        engine = self.cost_engine
+        root = np.random.SeedSequence(seed)
+        rng = np.random.default_rng(root.spawn(1)[0])
+        if initial is None:
+            frequencies = rng.uniform(self.bounds[:, 0], self.bounds[:, 1])
+        else:
+            frequencies = np.array(initial, dtype=float)
+        colors = block_colors(engine.block_interactions())
+        cost = engine(frequencies)
+        best_frequencies, best_cost = frequencies, cost
+        self.sweep_costs = []
+
+        executor = None
+        if workers and workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self,)
+            )
+        try:
+            for sweep_seed in tqdm(root.spawn(sweeps), disable=not verbose):
+                previous = cost
+                for group, group_seed in zip(colors, sweep_seed.spawn(len(colors))):
+                    tasks = [
+                        (snail, frequencies, block_seed, strategy, block_evaluations)
+                        for snail, block_seed in zip(
+                            group, group_seed.spawn(len(group))
+                        )
+                    ]
+                    if executor is None:
+                        results = [self._optimize_block(*task) for task in tasks]
+                    else:
+                        results = list(executor.map(_block_worker, *zip(*tasks)))
+                    frequencies, cost = self._merge_blocks(frequencies, cost, results)
+                self.sweep_costs.append(cost)
+                if cost < best_cost:
+                    best_frequencies, best_cost = frequencies, cost
+                if verbose:
+                    print(f"sweep cost {cost:.6g}")
+                if previous - cost < tol:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        self.best_frequencies = best_frequencies
+        self.best_cost = np.mean(self.get_final_infidelities(best_frequencies))
+        return self.best_frequencies, self.best_cost
+
+    def get_final_infidelities(self, freqs=None):
+        freqs = self.best_frequencies if freqs is None else freqs
+        _, gate_infidelities = self.cost_engine.gate_infidelities(freqs)
+        return sorted(gate_infidelities[0], reverse=True)[self.drop_k :]
+
+    def report_results(self):
+        if self.best_frequencies is None:
+            print("No optimized frequencies available.")
+            return
+        engine = self.cost_engine
+        qubit_frequencies = self.best_frequencies[: engine.num_qubits]
+        snail_frequencies = self.best_frequencies[engine.num_qubits :]
+        print("Qubit Frequencies:", qubit_frequencies, "GHz")
+        print("SNAIL Frequencies:", snail_frequencies, "GHz")
+        crowding, with_lifetime = engine.gate_infidelities(self.best_frequencies)
+        for label, no_lifetime, lifetime in zip(
+            engine.edge_labels, crowding[0], with_lifetime[0]
+        ):
+            print(
+                f"  Gate {label}: fidelity (no lifetime loss): {1 - no_lifetime:.6e},"
+                f" fidelity (with lifetime loss): {1 - lifetime:.6e}"
+            )
+        print(
+            "Average Infidelity (geometric mean):",
+            gmean(self.get_final_infidelities()),
+        )
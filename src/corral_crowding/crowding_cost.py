@@ -0,0 +1,1014 @@
+"""Array-based evaluation of the frequency-crowding cost."""
+
+import numpy as np
+from scipy.special import expit
+
+from corral_crowding.detuning_fit import decay_fit
+from corral_crowding.speedlimit_fit import lifetime_decay_fit
+
+SPECTATOR_TYPES = ("qubit-qubit", "snail-qubit", "qubit-sub")
+# ChipCost adds the modes of neighbouring modules
+CHIP_SPECTATOR_TYPES = (
+    *SPECTATOR_TYPES,
+    "snail-qubit (inter)",
+    "qubit-sub (inter)",
+)
+# spectators further than this from a driven gate contribute exactly zero
+CROSSTALK_WINDOW_GHZ = 0.8
+# (spectator x gate) terms per candidate above which windowing is tried
+WINDOWED_MIN_TERMS = 4096
+# share of terms inside the window above which the dense path is faster
+WINDOWED_MAX_FILL = 0.4
+
+
+def _sequential_sum(values, axis=0):
+    """Sums along ``axis`` strictly left to right.
+
+    NumPy's ``sum`` uses pairwise summation, which can differ from Python's
+    ``sum`` in the last bit. ``cumsum`` accumulates in order, so the last
+    partial sum reproduces the scalar loops exactly.
+    """
+    if values.shape[axis] == 0:
+        return np.zeros(np.delete(values.shape, axis))
+    return np.cumsum(values, axis=axis).take(-1, axis=axis)
+
+
+def drop_worst_total(gate_infidelities, bare_infidelities, drop_k):
+    """Sum of all but the ``drop_k`` worst gates plus the bare penalties.
+
+    Sums run along the last axis, gates worst first, in the order of the
+    scalar reference implementation.
+    """
+    worst_first = -np.sort(-gate_infidelities, axis=-1)
+    return _sequential_sum(worst_first[..., drop_k:], axis=-1) + _sequential_sum(
+        bare_infidelities, axis=-1
+    )
+
+
+def crosstalk_penalty(distance, x0, x1, is_qubit_qubit, alpha):
+    """The ``_unit_crosstalk`` penalty, broadcast over arrays.
+
+    Args:
+        distance: Detuning of the spectator from the driven gate in GHz.
+        x0: ``decay_fit`` amplitude of each spectator's interaction type.
+        x1: ``decay_fit`` offset of each spectator's interaction type.
+        is_qubit_qubit: Whether the anharmonicity step applies.
+        alpha: Qubit anharmonicity in GHz.
+    """
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        decay = decay_fit(distance * 1e3, x0, x1)
+    return np.where(
+        distance < 0.05,
+        0.5,
+        np.where(
+            is_qubit_qubit & (distance < alpha),
+            0.2,
+            np.where(distance > CROSSTALK_WINDOW_GHZ, 0.0, decay),
+        ),
+    )
+
+
+class CrowdingCost:
+    """Compiled-once evaluator of the GateFidelityOptimizer cost function.
+
+    The module graph is parsed a single time into index arrays for the driven
+    gates and every spectator term, so each evaluation is a handful of NumPy
+    broadcasts instead of nested dict construction and scalar penalty calls.
+    Terms are accumulated in the same order as the scalar reference
+    implementation, so results agree with it to the last bit up to the
+    rounding of ``** 2`` (libm ``pow`` on scalars, a multiply on arrays).
+    """
+
+    def __init__(
+        self,
+        module,
+        infidelity_params,
+        speedlimit_params,
+        alpha=0.12,
+        min_bare_space_ghz=0.2,
+        drop_k=0,
+        use_lifetime=False,
+        windowed=None,
+    ):
+        if module.num_snails != 1:
+            raise ValueError("CrowdingCost models a single SNAIL, use ChipCost")
+        self.num_qubits = module.num_qubits
+        self.alpha = alpha
+        self.min_bare_space_ghz = min_bare_space_ghz
+        self.drop_k = drop_k
+        self.use_lifetime = use_lifetime
+        self.speedlimit_params = speedlimit_params
+
+        # same edge order as QuantumModuleGraph.interaction_frequencies
+        self.qubit_pairs = np.asarray(module.qubit_pairs, dtype=int).reshape(-1, 2)
+        self.snail_qubits = np.asarray(module.snail_qubits, dtype=int)
+        self.edge_labels = [(f"Q{u}", f"Q{v}") for u, v in self.qubit_pairs]
+
+        num_edges = len(self.qubit_pairs)
+        counts = {
+            "qubit-qubit": num_edges,
+            "snail-qubit": len(self.snail_qubits),
+            "qubit-sub": self.num_qubits,
+        }
+        x0, x1 = [], []
+        for key in SPECTATOR_TYPES:
+            if not counts[key]:
+                continue
+            params = infidelity_params.get(key)
+            if params is None:
+                raise KeyError(f"Unknown interaction type: {key}")
+            x0.append(np.full(counts[key], params[0]))
+            x1.append(np.full(counts[key], params[1]))
+        # shape (n_spectators, 1, 1) to broadcast against (batch, gates)
+        self._x0 = np.concatenate(x0 or [np.empty(0)])[:, None, None]
+        self._x1 = np.concatenate(x1 or [np.empty(0)])[:, None, None]
+
+        num_spectators = sum(counts.values())
+        is_qubit_qubit = np.zeros(num_spectators, dtype=bool)
+        is_qubit_qubit[:num_edges] = True
+        self._is_qubit_qubit = is_qubit_qubit[:, None, None]
+
+        # a driven gate is never its own spectator
+        self_mask = np.zeros((num_spectators, num_edges), dtype=bool)
+        self_mask[:num_edges] = np.eye(num_edges, dtype=bool)
+        self._self_mask = self_mask[:, None, :]
+        # a qubit mode is never its own bare spectator (last row is the SNAIL)
+        bare_mask = np.zeros((self.num_qubits + 1, self.num_qubits), dtype=bool)
+        bare_mask[: self.num_qubits] = np.eye(self.num_qubits, dtype=bool)
+        self._bare_mask = bare_mask[:, None, :]
+
+        if windowed is None:
+            windowed = num_spectators * num_edges >= WINDOWED_MIN_TERMS
+        self.windowed = windowed
+
+    def _split(self, frequencies):
+        frequencies = np.atleast_2d(np.asarray(frequencies, dtype=float))
+        return frequencies[..., :-1], frequencies[..., -1]
+
+    def interaction_frequencies(self, frequencies):
+        """Returns driven gate and spectator frequencies for a batch of allocations.
+
+        Args:
+            frequencies: Array of shape (n_candidates, n_qubits + 1), SNAIL last.
+
+        Returns:
+            Tuple ``(gates, spectators)`` of shapes (n_candidates, n_edges) and
+            (n_candidates, n_spectators); spectators are ordered as
+            ``SPECTATOR_TYPES``.
+        """
+        qubits, snail = self._split(frequencies)
+        u, v = self.qubit_pairs.T
+        gates = np.abs(qubits[:, u] - qubits[:, v])
+        snail_qubit = np.abs(qubits[:, self.snail_qubits] - snail[:, None])
+        spectators = np.concatenate([gates, snail_qubit, qubits / 2], axis=1)
+        return gates, spectators
+
+    def _piecewise_penalty(self, distance, x0, x1, is_qubit_qubit):
+        return crosstalk_penalty(distance, x0, x1, is_qubit_qubit, self.alpha)
+
+    def _windowed_crowding(self, gates, spectators):
+        """Crowding sums over only the spectators within the crosstalk window.
+
+        Driven gates of every candidate are sorted once and each spectator
+        binary-searches the gates within ``CROSSTALK_WINDOW_GHZ`` of it, so
+        only terms that can be nonzero are evaluated. Terms are generated
+        spectator by spectator and accumulated with ``bincount``, which adds
+        sequentially, so every gate sums its spectators in the original order
+        and the skipped zeros leave the result bit-identical to the dense
+        path. Returns None when the window keeps too many terms to pay off.
+        """
+        num_candidates, num_edges = gates.shape
+        num_spectators = spectators.shape[1]
+        if not num_edges or not num_spectators:
+            return np.zeros((num_candidates, num_edges))
+        order = np.argsort(gates, axis=1, kind="stable")
+        sorted_gates = np.take_along_axis(gates, order, axis=1)
+
+        # offset candidates apart so one searchsorted covers the whole batch;
+        # the margin absorbs the rounding of the offset, and terms that land
+        # just outside the window evaluate to exactly zero anyway
+        low = min(gates.min(), spectators.min())
+        stride = max(gates.max(), spectators.max()) - low + 4 * CROSSTALK_WINDOW_GHZ
+        shift = (np.arange(num_candidates) * stride - low)[:, None]
+        margin = 4 * np.spacing(stride * num_candidates)
+        keys = (sorted_gates + shift).ravel()
+        centers = (spectators + shift).ravel()
+        start = np.searchsorted(
+            keys, centers - CROSSTALK_WINDOW_GHZ - margin, side="left"
+        )
+        stop = np.searchsorted(
+            keys, centers + CROSSTALK_WINDOW_GHZ + margin, side="right"
+        )
+        counts = stop - start
+        if counts.sum() > WINDOWED_MAX_FILL * gates.size * num_spectators:
+            return None
+
+        # expand every spectator's window into (spectator, gate) pairs
+        spectator_index = np.repeat(np.arange(num_candidates * num_spectators), counts)
+        first = np.repeat(start - np.cumsum(counts) + counts, counts)
+        position = first + np.arange(len(spectator_index))
+        candidate = position // num_edges
+        edge = order.ravel()[position]
+        spectator = spectator_index % num_spectators
+
+        distance = np.abs(gates[candidate, edge] - spectators.ravel()[spectator_index])
+        penalty = self._piecewise_penalty(
+            distance,
+            self._x0[spectator, 0, 0],
+            self._x1[spectator, 0, 0],
+            self._is_qubit_qubit[spectator, 0, 0],
+        )
+        # a driven gate is never its own spectator
+        penalty[spectator == edge] = 0.0
+        return np.bincount(
+            candidate * num_edges + edge,
+            weights=penalty,
+            minlength=num_candidates * num_edges,
+        ).reshape(num_candidates, num_edges)
+
+    def gate_infidelities(self, frequencies):
+        """Per-gate crowding infidelity, without and with lifetime loss.
+
+        Args:
+            frequencies: Array of shape (n_candidates, n_qubits + 1), SNAIL last.
+
+        Returns:
+            Tuple of two arrays of shape (n_candidates, n_edges).
+        """
+        gates, spectators = self.interaction_frequencies(frequencies)
+        crowding = None
+        if self.windowed:
+            crowding = self._windowed_crowding(gates, spectators)
+        if crowding is None:
+            # (n_spectators, n_candidates, n_edges)
+            distance = np.abs(gates[None, :, :] - spectators.T[:, :, None])
+            penalty = self._piecewise_penalty(
+                distance, self._x0, self._x1, self._is_qubit_qubit
+            )
+            penalty = np.where(self._self_mask, 0.0, penalty)
+            crowding = _sequential_sum(penalty, axis=0)
+
+        if self.use_lifetime:
+            _, snail = self._split(frequencies)
+            lifetime_distance = np.abs(gates - snail[:, None] / 2) * 1e3
+            lifetime = lifetime_decay_fit(lifetime_distance, *self.speedlimit_params)
+        else:
+            lifetime = 0
+        # combine coherent and incoherent errors as (1-infidelity)(1-lifetime loss)
+        return crowding, 1 - (1 - crowding) * (1 - lifetime)
+
+    def bare_infidelities(self, frequencies):
+        """Per-qubit bare-mode spacing penalty, shape (n_candidates, n_qubits)."""
+        qubits, snail = self._split(frequencies)
+        spectators = np.concatenate([qubits, snail[:, None]], axis=1)
+        distance = np.abs(qubits[None, :, :] - spectators.T[:, :, None])
+        cost = np.where(
+            distance < self.min_bare_space_ghz,
+            1.0 - distance / self.min_bare_space_ghz,
+            0,
+        )
+        cost = np.where(self._bare_mask, 0.0, cost)
+        return _sequential_sum(cost, axis=0)
+
+    def _spectator_penalty(self, distance, smoothness=None):
+        """Spectator penalty of shape (n_spectators, n_edges) and its slope.
+
+        With ``smoothness`` (GHz) the 50 MHz, ``alpha`` and 800 MHz steps of
+        the penalty become logistic ramps of that width, which recovers the
+        piecewise penalty as ``smoothness`` goes to zero. Without it the slope
+        is the derivative of the piecewise penalty, zero on its plateaus.
+        """
+        x0, x1 = self._x0[:, :, 0], self._x1[:, :, 0]
+        is_qubit_qubit = self._is_qubit_qubit[:, :, 0]
+        self_mask = self._self_mask[:, 0, :]
+        if smoothness is None:
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                decay = decay_fit(distance * 1e3, x0, x1)
+                decay_slope = -8e3 * x0 / (distance * 1e3 + x1) ** 3
+            strong = distance < 0.05
+            anharmonic = ~strong & is_qubit_qubit & (distance < self.alpha)
+            tail = ~strong & ~anharmonic & (distance <= 0.8)
+            penalty = np.where(
+                strong, 0.5, np.where(anharmonic, 0.2, np.where(tail, decay, 0.0))
+            )
+            slope = np.where(tail, decay_slope, 0.0)
+        else:
+            # the decay fit is only trusted beyond the strong-crosstalk step
+            clipped = np.maximum(distance, 0.05) * 1e3
+            decay = decay_fit(clipped, x0, x1)
+            decay_slope = np.where(
+                distance > 0.05, -8e3 * x0 / (clipped + x1) ** 3, 0.0
+            )
+            strong = expit((0.05 - distance) / smoothness)
+            anharmonic = np.where(
+                is_qubit_qubit, expit((self.alpha - distance) / smoothness), 0.0
+            )
+            window = expit((0.8 - distance) / smoothness)
+            tail = decay * window
+            tail_slope = decay_slope * window - decay * window * (1 - window) / (
+                smoothness
+            )
+            inner = 0.2 * anharmonic + (1 - anharmonic) * tail
+            inner_slope = (
+                -anharmonic * (1 - anharmonic) / smoothness * (0.2 - tail)
+                + (1 - anharmonic) * tail_slope
+            )
+            penalty = 0.5 * strong + (1 - strong) * inner
+            slope = (
+                -strong * (1 - strong) / smoothness * (0.5 - inner)
+                + (1 - strong) * inner_slope
+            )
+        return np.where(self_mask, 0.0, penalty), np.where(self_mask, 0.0, slope)
+
+    def _bare_penalty(self, distance, smoothness=None):
+        """Bare spacing penalty of shape (n_qubits + 1, n_qubits) and its slope.
+
+        With ``smoothness`` the hinge ``max(0, 1 - d / min_bare_space_ghz)`` is
+        replaced by a softplus whose knee is ``smoothness`` GHz wide.
+        """
+        spacing = self.min_bare_space_ghz
+        if smoothness is None:
+            close = distance < spacing
+            cost = np.where(close, 1.0 - distance / spacing, 0.0)
+            slope = np.where(close, -1.0 / spacing, 0.0)
+        else:
+            width = smoothness / spacing
+            hinge = (1.0 - distance / spacing) / width
+            cost = width * np.logaddexp(0.0, hinge)
+            slope = -expit(hinge) / spacing
+        bare_mask = self._bare_mask[:, 0, :]
+        return np.where(bare_mask, 0.0, cost), np.where(bare_mask, 0.0, slope)
+
+    def value_and_grad(self, frequencies, smoothness=None):
+        """Total cost of one allocation and its gradient.
+
+        The gradient is analytic: penalty slopes are chained through the
+        absolute differences that define the gate, spectator and bare
+        frequencies, and through the lifetime term. The ``drop_k`` worst
+        gates are excluded from the gradient as they are from the cost.
+        Kinks of the absolute values (coincident frequencies) get a zero
+        subgradient.
+
+        Args:
+            frequencies: Allocation ``[*qubit_freqs, snail_freq]`` in GHz.
+            smoothness: Width in GHz of the smooth relaxation of the piecewise
+                penalties. ``None`` differentiates the exact cost, whose value
+                then matches ``total_infidelities`` up to summation order.
+
+        Returns:
+            Tuple ``(cost, gradient)``, the gradient of shape (n_qubits + 1,).
+        """
+        qubits, snail = self._split(frequencies)
+        qubits, snail = qubits[0], snail[0]
+        u, v = self.qubit_pairs.T
+        num_edges, num_snail_qubits = len(u), len(self.snail_qubits)
+
+        gate_sign = np.sign(qubits[u] - qubits[v])
+        gates = np.abs(qubits[u] - qubits[v])
+        snail_qubit_sign = np.sign(qubits[self.snail_qubits] - snail)
+        spectators = np.concatenate(
+            [gates, np.abs(qubits[self.snail_qubits] - snail), qubits / 2]
+        )
+        offset = gates[None, :] - spectators[:, None]
+        penalty, slope = self._spectator_penalty(np.abs(offset), smoothness)
+        crowding = penalty.sum(axis=0)
+        # derivative of every penalty with respect to its driven gate frequency
+        gate_slope = slope * np.sign(offset)
+
+        if self.use_lifetime:
+            x0, x1 = self.speedlimit_params
+            lifetime_offset = gates - snail / 2
+            lifetime_distance = np.abs(lifetime_offset) * 1e3
+            lifetime = lifetime_decay_fit(lifetime_distance, x0, x1)
+            lifetime_slope = (
+                -x0 / (x1 + lifetime_distance) ** 2 * 1e3 * np.sign(lifetime_offset)
+            )
+        else:
+            lifetime = np.zeros(num_edges)
+            lifetime_slope = np.zeros(num_edges)
+        gate_infidelities = 1 - (1 - crowding) * (1 - lifetime)
+
+        keep = np.ones(num_edges, dtype=bool)
+        keep[np.argsort(-gate_infidelities, kind="stable")[: self.drop_k]] = False
+        crowding_weight = keep * (1 - lifetime)
+        lifetime_weight = keep * (1 - crowding)
+
+        gate_grad = (gate_slope * crowding_weight).sum(
+            axis=0
+        ) + lifetime_weight * lifetime_slope
+        spectator_grad = -(gate_slope @ crowding_weight)
+        snail_grad = -0.5 * np.dot(lifetime_weight, lifetime_slope)
+
+        # qubit-qubit spectators are the gate frequencies themselves
+        gate_grad = gate_grad + spectator_grad[:num_edges]
+        qubit_grad = np.zeros(self.num_qubits)
+        np.add.at(qubit_grad, u, gate_grad * gate_sign)
+        np.add.at(qubit_grad, v, -gate_grad * gate_sign)
+        snail_qubit_grad = (
+            spectator_grad[num_edges : num_edges + num_snail_qubits] * snail_qubit_sign
+        )
+        np.add.at(qubit_grad, self.snail_qubits, snail_qubit_grad)
+        snail_grad -= snail_qubit_grad.sum()
+        qubit_grad += spectator_grad[num_edges + num_snail_qubits :] / 2
+
+        # rows are bare spectators (qubits, then the SNAIL), columns qubits
+        bare_spectators = np.append(qubits, snail)
+        bare_offset = qubits[None, :] - bare_spectators[:, None]
+        bare_cost, bare_slope = self._bare_penalty(np.abs(bare_offset), smoothness)
+        bare_slope = bare_slope * np.sign(bare_offset)
+        qubit_grad += bare_slope.sum(axis=0)
+        qubit_grad -= bare_slope[:-1].sum(axis=1)
+        snail_grad -= bare_slope[-1].sum()
+
+        cost = gate_infidelities[keep].sum() + bare_cost.sum()
+        return cost, np.append(qubit_grad, snail_grad)
+
+    def _total_from_gates(self, gate_infidelities, frequencies):
+        return drop_worst_total(
+            gate_infidelities, self.bare_infidelities(frequencies), self.drop_k
+        )
+
+    def total_infidelities(self, frequencies):
+        """Total cost for a batch of allocations, shape (n_candidates,)."""
+        _, gate_infidelities = self.gate_infidelities(frequencies)
+        return self._total_from_gates(gate_infidelities, frequencies)
+
+    def evaluate_batch(self, frequencies, chunk_size=None):
+        """Scores many allocations, processing them in memory-bounded chunks.
+
+        Args:
+            frequencies: Array of shape (n_candidates, n_qubits + 1), SNAIL last.
+            chunk_size: Candidates per vectorized call. Defaults to a size that
+                keeps the (spectator, candidate, gate) temporaries near 32 MB.
+
+        Returns:
+            Tuple ``(total_cost, gate_infidelities)`` of shapes (n_candidates,)
+            and (n_candidates, n_edges). Gate infidelities include lifetime
+            loss and are ordered as ``edge_labels``.
+        """
+        frequencies = np.atleast_2d(np.asarray(frequencies, dtype=float))
+        if frequencies.ndim != 2 or frequencies.shape[1] != self.num_qubits + 1:
+            raise ValueError(
+                f"Expected frequencies of shape (n_candidates, {self.num_qubits + 1}),"
+                f" got {frequencies.shape}"
+            )
+        if chunk_size is None:
+            terms = max(self._self_mask.shape[0] * self._self_mask.shape[2], 1)
+            chunk_size = max(1, (1 << 22) // terms)
+
+        num_candidates = len(frequencies)
+        total_cost = np.empty(num_candidates)
+        gate_infidelities = np.empty((num_candidates, len(self.qubit_pairs)))
+        for start in range(0, num_candidates, chunk_size):
+            chunk = frequencies[start : start + chunk_size]
+            _, gates = self.gate_infidelities(chunk)
+            gate_infidelities[start : start + chunk_size] = gates
+            total_cost[start : start + chunk_size] = self._total_from_gates(
+                gates, chunk
+            )
+        return total_cost, gate_infidelities
+
+    def __call__(self, frequencies):
+        """Total cost of a single allocation ``[*qubit_freqs, snail_freq]``."""
+        return self.total_infidelities(frequencies)[0]
+
+    def incremental(self, frequencies):
+        """Returns an IncrementalCost tracking ``frequencies``."""
+        return IncrementalCost(self, frequencies)
+
+
+class IncrementalCost:
+    """Cost of one allocation, updated in place under single-frequency moves.
+
+    Keeps the (spectator, gate) crosstalk penalties and the bare spacing
+    penalties of the current allocation. Moving qubit ``i`` only recomputes
+    the spectator rows and gate columns that involve it, O(degree * E)
+    instead of the O(E^2) of a full evaluation; moving the SNAIL recomputes
+    its snail-qubit rows, bare row and the lifetime terms.
+
+    Gate columns touched by a move are re-summed exactly; the other columns
+    are updated by adding the change of the moved rows, which can drift from
+    the full evaluation in the last bits. ``resync`` recomputes everything.
+
+    Args:
+        engine: CrowdingCost defining the cost.
+        frequencies: Starting allocation ``[*qubit_freqs, snail_freq]``.
+    """
+
+    def __init__(self, engine, frequencies):
+        self.engine = engine
+        num_qubits = engine.num_qubits
+        u, v = engine.qubit_pairs.T
+        num_edges, num_snail_qubits = len(u), len(engine.snail_qubits)
+
+        self._x0 = engine._x0[:, 0, 0]
+        self._x1 = engine._x1[:, 0, 0]
+        self._is_qubit_qubit = engine._is_qubit_qubit[:, 0, 0]
+        self._self_mask = engine._self_mask[:, 0, :]
+        self._bare_mask = engine._bare_mask[:, 0, :]
+
+        # gates and spectator rows that depend on each qubit frequency
+        snail_row = np.full(num_qubits, -1)
+        snail_row[engine.snail_qubits] = num_edges + np.arange(num_snail_qubits)
+        self._incident = [
+            np.flatnonzero((u == qubit) | (v == qubit)) for qubit in range(num_qubits)
+        ]
+        self._qubit_rows = [
+            np.concatenate(
+                [
+                    self._incident[qubit],
+                    snail_row[qubit : qubit + 1][snail_row[qubit : qubit + 1] >= 0],
+                    [num_edges + num_snail_qubits + qubit],
+                ]
+            ).astype(int)
+            for qubit in range(num_qubits)
+        ]
+        self._snail_rows = num_edges + np.arange(num_snail_qubits)
+        self._pending = None
+        self.num_updates = 0
+        self.resync(frequencies)
+
+    def _penalty(self, spectators, gates, rows, columns):
+        distance = np.abs(gates[None, :] - spectators[rows][:, None])
+        penalty = self.engine._piecewise_penalty(
+            distance,
+            self._x0[rows][:, None],
+            self._x1[rows][:, None],
+            self._is_qubit_qubit[rows][:, None],
+        )
+        return np.where(self._self_mask[rows][:, columns], 0.0, penalty)
+
+    def _bare(self, distance):
+        spacing = self.engine.min_bare_space_ghz
+        return np.where(distance < spacing, 1.0 - distance / spacing, 0)
+
+    def _lifetime(self, gates, snail):
+        if not self.engine.use_lifetime:
+            return np.zeros(len(gates))
+        distance = np.abs(gates - snail / 2) * 1e3
+        return lifetime_decay_fit(distance, *self.engine.speedlimit_params)
+
+    def _total(self, crowding, lifetime, bare):
+        gate_infidelities = 1 - (1 - crowding) * (1 - lifetime)
+        return drop_worst_total(gate_infidelities, bare, self.engine.drop_k)
+
+    def resync(self, frequencies=None):
+        """Recomputes every term from scratch and returns the cost.
+
+        Args:
+            frequencies: New allocation to track; defaults to the current one.
+        """
+        if frequencies is not None:
+            self.frequencies = np.array(frequencies, dtype=float)
+        gates, spectators = self.engine.interaction_frequencies(self.frequencies)
+        self.gates, self.spectators = gates[0], spectators[0]
+        everything = slice(None)
+        self.penalty = self._penalty(
+            self.spectators, self.gates, everything, everything
+        )
+        self.crowding = _sequential_sum(self.penalty, axis=0)
+        self.lifetime = self._lifetime(self.gates, self.frequencies[-1])
+
+        qubits = self.frequencies[:-1]
+        distance = np.abs(qubits[None, :] - self.frequencies[:, None])
+        self.bare_penalty = np.where(self._bare_mask, 0.0, self._bare(distance))
+        self.bare = _sequential_sum(self.bare_penalty, axis=0)
+        self.cost = self._total(self.crowding, self.lifetime, self.bare)
+        self._pending = None
+        self.num_updates = 0
+        return self.cost
+
+    def propose(self, index, value):
+        """Cost after setting ``frequencies[index] = value``, without moving.
+
+        The proposal is kept until ``accept`` or the next ``propose``.
+        """
+        engine = self.engine
+        num_qubits = engine.num_qubits
+        num_edges = len(engine.qubit_pairs)
+        frequencies = self.frequencies.copy()
+        frequencies[index] = value
+        qubits, snail = frequencies[:-1], frequencies[-1]
+        gates, spectators = self.gates, self.spectators.copy()
+
+        if index < num_qubits:
+            columns, rows = self._incident[index], self._qubit_rows[index]
+            gates = gates.copy()
+            u, v = engine.qubit_pairs[columns].T
+            gates[columns] = np.abs(qubits[u] - qubits[v])
+            spectators[columns] = gates[columns]
+            # rows after the incident gates: snail-qubit (if coupled), qubit-sub
+            if len(rows) - len(columns) == 2:
+                spectators[rows[-2]] = np.abs(value - snail)
+            spectators[rows[-1]] = value / 2
+            lifetime = self.lifetime.copy()
+            lifetime[columns] = self._lifetime(gates[columns], snail)
+        else:
+            columns, rows = np.empty(0, dtype=int), self._snail_rows
+            spectators[rows] = np.abs(qubits[engine.snail_qubits] - snail)
+            lifetime = self._lifetime(gates, snail)
+
+        everything = slice(None)
+        row_penalty = self._penalty(spectators, gates, rows, everything)
+        crowding = self.crowding + (row_penalty - self.penalty[rows]).sum(axis=0)
+        column_penalty = None
+        if len(columns):
+            column_penalty = self._penalty(
+                spectators, gates[columns], everything, columns
+            )
+            crowding[columns] = _sequential_sum(column_penalty, axis=0)
+
+        # bare spectator row of the moved mode, and its own column if a qubit
+        bare_row = np.where(
+            self._bare_mask[index], 0.0, self._bare(np.abs(qubits - value))
+        )
+        bare = self.bare + (bare_row - self.bare_penalty[index])
+        bare_column = None
+        if index < num_qubits:
+            bare_column = np.where(
+                self._bare_mask[:, index],
+                0.0,
+                self._bare(np.abs(frequencies - value)),
+            )
+            bare[index] = _sequential_sum(bare_column, axis=0)
+
+        cost = self._total(crowding, lifetime, bare)
+        self._pending = (
+            index,
+            frequencies,
+            gates,
+            spectators,
+            rows,
+            row_penalty,
+            columns,
+            column_penalty,
+            crowding,
+            lifetime,
+            bare_row,
+            bare_column,
+            bare,
+            cost,
+        )
+        return cost
+
+    def accept(self):
+        """Applies the last proposal and returns the new cost."""
+        if self._pending is None:
+            raise RuntimeError("No proposal to accept")
+        (
+            index,
+            self.frequencies,
+            self.gates,
+            self.spectators,
+            rows,
+            row_penalty,
+            columns,
+            column_penalty,
+            self.crowding,
+            self.lifetime,
+            bare_row,
+            bare_column,
+            self.bare,
+            self.cost,
+        ) = self._pending
+        self.penalty[rows] = row_penalty
+        if column_penalty is not None:
+            self.penalty[:, columns] = column_penalty
+        self.bare_penalty[index] = bare_row
+        if bare_column is not None:
+            self.bare_penalty[:, index] = bare_column
+        self._pending = None
+        self.num_updates += 1
+        return self.cost
+
+    def move(self, index, value):
+        """Sets ``frequencies[index] = value`` and returns the new cost."""
+        self.propose(index, value)
+        return self.accept()
+
+
+class ChipCost:
+    """Vectorized crowding cost of a whole chip.
+
+    Gates, snail-qubit couplings and module adjacency are read from a
+    QuantumModuleGraph, usually built by ``from_topology``, and frequencies
+    are ordered ``[*qubit_freqs, *snail_freqs]`` as its nodes. On top of the
+    single-module terms, every gate sees the modes of the neighbouring
+    modules, those sharing a qubit with its own, through the weaker
+    "snail-qubit (inter)" and "qubit-sub (inter)" fits. Every (gate,
+    spectator) term is stored as a pair of indices, so a chip evaluates in
+    time linear in its number of terms. For a single module the gate,
+    spectator and bare terms come in the same order as CrowdingCost and the
+    costs agree exactly.
+
+    Args:
+        module: QuantumModuleGraph of the chip.
+        infidelity_params: Fits keyed by CHIP_SPECTATOR_TYPES.
+        speedlimit_params: Lifetime fit of the driven gates.
+        alpha: Qubit anharmonicity in GHz.
+        min_bare_space_ghz: Minimum spacing of coupled bare modes.
+        drop_k: Number of worst gates left out of the total.
+        use_lifetime: Include the lifetime loss of the driven gates.
+    """
+
+    def __init__(
+        self,
+        module,
+        infidelity_params,
+        speedlimit_params,
+        alpha=0.12,
+        min_bare_space_ghz=0.2,
+        drop_k=0,
+        use_lifetime=False,
+    ):
+        self.num_qubits, self.num_snails = module.num_qubits, module.num_snails
+        self.alpha = alpha
+        self.min_bare_space_ghz = min_bare_space_ghz
+        self.drop_k = drop_k
+        self.use_lifetime = use_lifetime
+        self.speedlimit_params = speedlimit_params
+        self.module_qubits = [m.tolist() for m in module.module_qubits]
+        self.neighbours = module.neighbours
+
+        # driven gates and snail-qubit couplings in the module graph's order
+        self.gate_snails = module.gate_snails
+        self.qubit_pairs = module.qubit_pairs
+        self.coupling_snails = module.coupling_snails
+        self.coupling_qubits = module.snail_qubits
+        self.edge_labels = [
+            (module.node_name(u), module.node_name(v), module.snail_labels[s])
+            for s, (u, v) in zip(self.gate_snails, self.qubit_pairs)
+        ]
+        module_gates = [
+            np.flatnonzero(self.gate_snails == snail).tolist()
+            for snail in range(self.num_snails)
+        ]
+        coupling_index = {
+            coupling: i
+            for i, coupling in enumerate(
+                zip(self.coupling_snails.tolist(), self.coupling_qubits.tolist())
+            )
+        }
+
+        # spectator sources: gate frequencies, snail-qubit couplings, q / 2
+        coupling_offset = len(self.qubit_pairs)
+        half_offset = coupling_offset + len(self.coupling_snails)
+        pair_gate, pair_source, pair_type = [], [], []
+        for gate, snail in enumerate(self.gate_snails.tolist()):
+            members = self.module_qubits[snail]
+            outside = sorted(
+                {q for b in self.neighbours[snail] for q in self.module_qubits[b]}
+                - set(members)
+            )
+            terms = [
+                (0, [g for g in module_gates[snail] if g != gate]),
+                (1, [coupling_offset + coupling_index[snail, q] for q in members]),
+                (2, [half_offset + q for q in members]),
+                (
+                    3,
+                    [
+                        coupling_offset + coupling_index[b, q]
+                        for b in self.neighbours[snail]
+                        for q in self.module_qubits[b]
+                        if q not in members
+                    ],
+                ),
+                (4, [half_offset + q for q in outside]),
+            ]
+            for kind, sources in terms:
+                pair_gate += [gate] * len(sources)
+                pair_source += sources
+                pair_type += [kind] * len(sources)
+        self._pair_gate = np.array(pair_gate, dtype=int)
+        self._pair_source = np.array(pair_source, dtype=int)
+        pair_type = np.array(pair_type, dtype=int)
+
+        used = {CHIP_SPECTATOR_TYPES[kind] for kind in set(pair_type.tolist())}
+        missing = used - set(infidelity_params)
+        if missing:
+            raise KeyError(f"Unknown interaction type: {sorted(missing)}")
+        params = np.array(
+            [
+                infidelity_params.get(key, (np.nan, np.nan))[:2]
+                for key in CHIP_SPECTATOR_TYPES
+            ],
+            dtype=float,
+        )
+        self._x0, self._x1 = params[pair_type, 0], params[pair_type, 1]
+        self._is_qubit_qubit = pair_type == 0
+
+        # bare spacing: each qubit against the qubits it shares a module with
+        # and its SNAILs; each SNAIL against its neighbouring SNAILs
+        owner, other = [], []
+        for qubit, own_snails in enumerate(module.qubit_snails):
+            partners = sorted(
+                {q for s in own_snails for q in self.module_qubits[s]} - {qubit}
+            )
+            owner += [qubit] * (len(partners) + len(own_snails))
+            other += partners + [self.num_qubits + s for s in own_snails]
+        for snail, neighbours in enumerate(self.neighbours):
+            owner += [self.num_qubits + snail] * len(neighbours)
+            other += [self.num_qubits + b for b in neighbours]
+        self._bare_owner = np.array(owner, dtype=int)
+        self._bare_other = np.array(other, dtype=int)
+
+        # modes every gate reads: its qubits, its SNAIL through the lifetime
+        # loss, and the modes of its spectator sources
+        source_modes = np.concatenate(
+            [
+                self.qubit_pairs,
+                np.stack(
+                    [self.coupling_qubits, self.num_qubits + self.coupling_snails], 1
+                ),
+                np.repeat(np.arange(self.num_qubits)[:, None], 2, axis=1),
+            ]
+        )
+        gates = np.arange(len(self.qubit_pairs))
+        read_gate = [self._pair_gate, self._pair_gate, gates, gates]
+        read_mode = [*source_modes[self._pair_source].T, *self.qubit_pairs.T]
+        if use_lifetime:
+            read_gate.append(gates)
+            read_mode.append(self.num_qubits + self.gate_snails)
+        self._read_gate = np.concatenate(read_gate).astype(int)
+        self._read_mode = np.concatenate(read_mode).astype(int)
+
+        # every gate counts; restrict() narrows these for block subproblems
+        self._active_gates = None
+        self._num_modes = self.num_qubits + self.num_snails
+
+    @property
+    def num_gates(self):
+        """Number of driven gates on the chip."""
+        return len(self.qubit_pairs)
+
+    def _split(self, frequencies):
+        frequencies = np.atleast_2d(np.asarray(frequencies, dtype=float))
+        return (
+            frequencies,
+            frequencies[:, : self.num_qubits],
+            frequencies[:, self.num_qubits :],
+        )
+
+    def gate_infidelities(self, frequencies):
+        """Per-gate crowding infidelity, without and with lifetime loss.
+
+        Args:
+            frequencies: Array of shape (n_candidates, n_qubits + n_snails).
+
+        Returns:
+            Tuple of two arrays of shape (n_candidates, n_gates), ordered as
+            ``edge_labels``.
+        """
+        frequencies, qubits, snails = self._split(frequencies)
+        num_candidates = len(frequencies)
+        u, v = self.qubit_pairs.T
+        gates = np.abs(qubits[:, u] - qubits[:, v])
+        couplings = np.abs(
+            qubits[:, self.coupling_qubits] - snails[:, self.coupling_snails]
+        )
+        sources = np.concatenate([gates, couplings, qubits / 2], axis=1)
+
+        distance = np.abs(gates[:, self._pair_gate] - sources[:, self._pair_source])
+        penalty = crosstalk_penalty(
+            distance, self._x0, self._x1, self._is_qubit_qubit, self.alpha
+        )
+        # bincount adds in pair order, matching the sequential scalar sums
+        index = (
+            np.arange(num_candidates)[:, None] * self.num_gates + self._pair_gate
+        ).ravel()
+        crowding = np.bincount(
+            index, weights=penalty.ravel(), minlength=num_candidates * self.num_gates
+        ).reshape(num_candidates, self.num_gates)
+
+        if self.use_lifetime:
+            distance = np.abs(gates - snails[:, self.gate_snails] / 2) * 1e3
+            lifetime = lifetime_decay_fit(distance, *self.speedlimit_params)
+        else:
+            lifetime = 0
+        return crowding, 1 - (1 - crowding) * (1 - lifetime)
+
+    def bare_infidelities(self, frequencies):
+        """Bare spacing penalty per mode, shape (n_candidates, n_modes)."""
+        frequencies, _, _ = self._split(frequencies)
+        num_candidates = len(frequencies)
+        distance = np.abs(
+            frequencies[:, self._bare_owner] - frequencies[:, self._bare_other]
+        )
+        cost = np.where(
+            distance < self.min_bare_space_ghz,
+            1.0 - distance / self.min_bare_space_ghz,
+            0,
+        )
+        index = (
+            np.arange(num_candidates)[:, None] * self._num_modes + self._bare_owner
+        ).ravel()
+        return np.bincount(
+            index, weights=cost.ravel(), minlength=num_candidates * self._num_modes
+        ).reshape(num_candidates, self._num_modes)
+
+    def _total_from_gates(self, gate_infidelities, frequencies):
+        if self._active_gates is not None:
+            gate_infidelities = gate_infidelities[:, self._active_gates]
+        return drop_worst_total(
+            gate_infidelities, self.bare_infidelities(frequencies), self.drop_k
+        )
+
+    def total_infidelities(self, frequencies):
+        """Total chip cost for a batch of allocations, shape (n_candidates,)."""
+        _, gate_infidelities = self.gate_infidelities(frequencies)
+        return self._total_from_gates(gate_infidelities, frequencies)
+
+    def evaluate_batch(self, frequencies, chunk_size=None):
+        """Scores many allocations in memory-bounded chunks.
+
+        As CrowdingCost.evaluate_batch, with frequencies of shape
+        (n_candidates, n_qubits + n_snails).
+        """
+        frequencies = np.atleast_2d(np.asarray(frequencies, dtype=float))
+        if frequencies.ndim != 2 or frequencies.shape[1] != self._num_modes:
+            raise ValueError(
+                f"Expected frequencies of shape (n_candidates, {self._num_modes}),"
+                f" got {frequencies.shape}"
+            )
+        if chunk_size is None:
+            chunk_size = max(1, (1 << 22) // max(len(self._pair_gate), 1))
+
+        num_candidates = len(frequencies)
+        total_cost = np.empty(num_candidates)
+        gate_infidelities = np.empty((num_candidates, self.num_gates))
+        for start in range(0, num_candidates, chunk_size):
+            chunk = frequencies[start : start + chunk_size]
+            _, gates = self.gate_infidelities(chunk)
+            gate_infidelities[start : start + chunk_size] = gates
+            total_cost[start : start + chunk_size] = self._total_from_gates(
+                gates, chunk
+            )
+        return total_cost, gate_infidelities
+
+    def __call__(self, frequencies):
+        """Total cost of a single allocation."""
+        return self.total_infidelities(frequencies)[0]
+
+    def block_variables(self, snail):
+        """Frequency indices of a module: its qubits, then its SNAIL."""
+        return np.array(
+            [*self.module_qubits[snail], self.num_qubits + snail], dtype=int
+        )
+
+    def gates_reading(self, variables):
+        """Boolean mask of the gates whose infidelity reads any of ``variables``."""
+        mask = np.zeros(self.num_gates, dtype=bool)
+        mask[self._read_gate[np.isin(self._read_mode, variables)]] = True
+        return mask
+
+    def block_interactions(self):
+        """Modules whose block shares a term with each module's block.
+
+        Two blocks interact when they share a frequency, a gate reads a
+        frequency of both, or a bare spacing term joins them. Blocks that do
+        not interact change disjoint terms of the cost.
+
+        Returns:
+            For each SNAIL, the sorted list of interacting SNAILs.
+        """
+        variables = np.zeros((self.num_snails, self._num_modes), dtype=int)
+        gates = np.zeros((self.num_snails, self.num_gates), dtype=int)
+        for snail in range(self.num_snails):
+            block = self.block_variables(snail)
+            variables[snail, block] = 1
+            gates[snail] = self.gates_reading(block)
+        bare = np.zeros((self._num_modes, self._num_modes), dtype=int)
+        bare[self._bare_owner, self._bare_other] = 1
+        links = np.eye(self._num_modes, dtype=int) + bare + bare.T
+        shared = variables @ links @ variables.T + gates @ gates.T
+        np.fill_diagonal(shared, 0)
+        return [np.flatnonzero(row).tolist() for row in shared]
+
+    def restrict(self, snail):
+        """ChipCost of only the terms that depend on one module's frequencies.
+
+        Every gate that reads one of the module's frequencies, through its
+        own qubits and SNAIL or any spectator term, is kept with all of its
+        terms, as are the bare terms that involve the module's modes. Changes
+        of ``block_variables(snail)`` then change it exactly as the full
+        cost, up to ``drop_k``, which is left to the full cost.
+        """
+        variables = self.block_variables(snail)
+        restricted = object.__new__(ChipCost)
+        restricted.__dict__.update(self.__dict__)
+        restricted.drop_k = 0
+
+        active = self.gates_reading(variables)
+        pairs = active[self._pair_gate]
+        restricted._pair_gate = self._pair_gate[pairs]
+        restricted._pair_source = self._pair_source[pairs]
+        restricted._x0, restricted._x1 = self._x0[pairs], self._x1[pairs]
+        restricted._is_qubit_qubit = self._is_qubit_qubit[pairs]
+        restricted._active_gates = np.flatnonzero(active)
+
+        bare = np.isin(self._bare_owner, variables) | np.isin(
+            self._bare_other, variables
+        )
+        restricted._bare_owner = self._bare_owner[bare]
+        restricted._bare_other = self._bare_other[bare]
+        return restricted
@@ -3,12 +3,36 @@ import numpy as np
 from qutip import average_gate_fidelity, destroy, qeye, tensor
 from scipy.optimize import curve_fit
 
+from corral_crowding.adaptive_sampling import adaptive_fit
+
 
 # %%
 def simulate_infidelity(
-    detuning_list, intended_term, ideal_gate, prefactor, spectator_term
+    detuning_list,
+    intended_term,
+    ideal_gate,
+    prefactor,
+    spectator_term,
+    backend="qutip",
 ):
-    """Runs QuTiP simulations to compute the infidelity vs. detuning."""
+    """Runs QuTiP simulations to compute the infidelity vs. detuning.
+
+    ``backend="numpy"`` evaluates all detunings at once with a batched
+    Hermitian eigendecomposition instead of one ``expm`` per point, and
+    ``backend="adaptive"`` uses simulate_infidelity_adaptive.
+    """
+    if backend == "adaptive":
+        infidelity, _ = simulate_infidelity_adaptive(
+            detuning_list, intended_term, ideal_gate, prefactor, spectator_term
+        )
+        return infidelity
+    if backend == "numpy":
+        return _simulate_infidelity_numpy(
+            detuning_list, intended_term, ideal_gate, prefactor, spectator_term
+        )
+    if backend != "qutip":
+        raise ValueError(f"Unknown backend: {backend}")
+
     infidelity_list = []
 
     for detuning in detuning_list:
@@ -21,6 +45,112 @@ def simulate_infidelity(
     return np.array(infidelity_list)
 
 
+def _simulate_infidelity_numpy(
+    detuning_list, intended_term, ideal_gate, prefactor, spectator_term
+):
+    """Dense NumPy backend of simulate_infidelity for all detunings at once."""
+    detuning_list = np.asarray(detuning_list, dtype=float)
+    H0 = (np.pi / 2) * intended_term.full()
+    S = spectator_term.full()
+    target = ideal_gate.full()
+    dim = target.shape[0]
+
+    spectator_amplitude = (2 * prefactor) / (2 * np.pi * detuning_list * 1e6)
+    H = H0[None, :, :] + spectator_amplitude[:, None, None] * S[None, :, :]
+    # H is Hermitian: U = V exp(-i w) V^dagger for every detuning in one call
+    w, V = np.linalg.eigh(H)
+    U = (V * np.exp(-1.0j * w)[:, None, :]) @ V.conj().transpose(0, 2, 1)
+
+    # average gate fidelity of a unitary: (d + |Tr(target^dagger U)|^2) / (d(d+1))
+    overlap = np.einsum("ij,kij->k", target.conj(), U)
+    fidelity = (dim + np.abs(overlap) ** 2) / (dim * (dim + 1))
+    return 1 - fidelity
+
+
+def perturbative_coefficient(intended_term, spectator_term):
+    """Second-order coefficient kappa of the infidelity, 1 - F ~ kappa * eps**2.
+
+    With ``H = (pi/2) intended_term + eps * spectator_term`` and the ideal gate
+    ``U0 = exp(-i (pi/2) intended_term)``, the first Magnus term in the
+    interaction picture is ``A = eps * int_0^1 U0(t)^dagger S U0(t) dt`` and
+    expanding the average gate fidelity gives
+    ``1 - F = (d Tr(A^2) - Tr(A)^2) / (d (d + 1)) + O(eps^3)``.
+    """
+    w, W = np.linalg.eigh((np.pi / 2) * intended_term.full())
+    S = W.conj().T @ spectator_term.full() @ W
+    gaps = w[:, None] - w[None, :]
+    # int_0^1 exp(i x t) dt, equal to 1 on degenerate levels
+    safe_gaps = np.where(np.abs(gaps) < 1e-12, 1.0, gaps)
+    phase = np.where(
+        np.abs(gaps) < 1e-12, 1.0, (np.exp(1.0j * gaps) - 1) / (1.0j * safe_gaps)
+    )
+    A = S * phase
+    dim = S.shape[0]
+    trace_a2 = np.sum(np.abs(A) ** 2)
+    trace_a = np.real(np.trace(A))
+    return (dim * trace_a2 - trace_a**2) / (dim * (dim + 1))
+
+
+def simulate_infidelity_adaptive(
+    detuning_list,
+    intended_term,
+    ideal_gate,
+    prefactor,
+    spectator_term,
+    rtol=1e-3,
+    num_probes=5,
+    safety=2.0,
+):
+    """Perturbative infidelity curve with exact simulation only where needed.
+
+    Every point starts from the second-order estimate ``kappa * eps**2``. The
+    relative error of that estimate is modelled as ``c * |eps|**p``, fitted on
+    exactly simulated points (``num_probes`` log-spaced probes to start).
+    Points whose error bound ``safety * c * |eps|**p`` exceeds ``rtol`` are
+    simulated exactly (NumPy backend) and the model is refitted until every
+    remaining estimate is within tolerance. Assumes
+    ``ideal_gate == exp(-i (pi/2) intended_term)``.
+
+    Returns:
+        Tuple ``(infidelity, exact_mask)`` where ``exact_mask`` marks the
+        points that were simulated exactly.
+    """
+    detuning_list = np.asarray(detuning_list, dtype=float)
+    eps = np.abs((2 * prefactor) / (2 * np.pi * detuning_list * 1e6))
+    estimate = perturbative_coefficient(intended_term, spectator_term) * eps**2
+
+    infidelity = estimate.copy()
+    exact_mask = np.zeros(len(detuning_list), dtype=bool)
+    order = np.argsort(eps)
+    probes = np.unique(np.linspace(0, len(order) - 1, num_probes).astype(int))
+    pending = np.zeros(len(detuning_list), dtype=bool)
+    pending[order[probes]] = True
+    while pending.any():
+        infidelity[pending] = _simulate_infidelity_numpy(
+            detuning_list[pending],
+            intended_term,
+            ideal_gate,
+            prefactor,
+            spectator_term,
+        )
+        exact_mask |= pending
+
+        # relative error ~ c * eps**p, with p >= 1 as the expansion is O(eps^3)
+        relative_error = np.abs(estimate - infidelity)[exact_mask] / np.abs(
+            infidelity[exact_mask]
+        )
+        log_eps = np.log(eps[exact_mask])
+        log_error = np.log(np.maximum(relative_error, np.finfo(float).tiny))
+        if len(np.unique(log_eps)) > 1:
+            p = max(np.polyfit(log_eps, log_error, 1)[0], 1.0)
+        else:
+            p = 1.0
+        log_c = np.max(log_error - p * log_eps)  # envelope over the samples
+        bound = safety * np.exp(log_c) * eps**p
+        pending = ~exact_mask & (bound > rtol)
+    return infidelity, exact_mask
+
+
 # def decay_fit(detuning, a, b, c, d):
 #     """Power law function for fitting infidelity curves."""
 #     return a * ((detuning + d) ** -b) + c
@@ -54,8 +184,13 @@ def fit_infidelity(detuning_list, infidelity_list):
 
 
 # %%
-def compute_infidelity_parameters(detuning_list, lambdaq, eta, alpha, g3):
-    """Generates (a, b, c) infidelity parameters dynamically from QuTiP simulations."""
+def spectator_systems(lambdaq, eta, g3):
+    """Builds the simulated Hamiltonian terms for every spectator type.
+
+    Returns:
+        Dict mapping the interaction type to
+        ``(intended_term, ideal_gate, prefactor, spectator_term)``.
+    """
     # Compute prefactors
     intra_prefactors = {
         "snail-qubit": 6 * eta * lambdaq * g3,
@@ -112,32 +247,76 @@ def compute_infidelity_parameters(detuning_list, lambdaq, eta, alpha, g3):
         "snail-qubit (inter)": (qs1dag * s1 + qs1 * s1dag, ideal_gate_snail),
     }
 
-    # Compute infidelity curves and fit (a, b, c)
-    infidelity_params = {}
-    fidelity_results = {}
-
-    # Compute for qubit-based spectators
-    for key in spectator_ops_qubits:
-        spectator_term, gate_target = spectator_ops_qubits[key]
-        fidelity_results[key] = simulate_infidelity(
-            detuning_list,
+    systems = {}
+    for key, (spectator_term, gate_target) in spectator_ops_qubits.items():
+        systems[key] = (
             intended_term_qubits,
             gate_target,
             prefactors[key],
             spectator_term,
         )
-        infidelity_params[key] = fit_infidelity(detuning_list, fidelity_results[key])
-
-    # Compute for SNAIL-based spectators
-    for key in spectator_ops_snail:
-        spectator_term, gate_target = spectator_ops_snail[key]
-        fidelity_results[key] = simulate_infidelity(
-            detuning_list,
+    for key, (spectator_term, gate_target) in spectator_ops_snail.items():
+        systems[key] = (
             intended_term_snail,
             gate_target,
             prefactors[key],
             spectator_term,
         )
+    return systems
+
+
+def compute_infidelity_parameters(
+    detuning_list, lambdaq, eta, alpha, g3, backend="qutip"
+):
+    """Generates (a, b, c) infidelity parameters dynamically from QuTiP simulations.
+
+    ``backend`` is forwarded to simulate_infidelity.
+    """
+    # Compute infidelity curves and fit (a, b, c)
+    infidelity_params = {}
+    fidelity_results = {}
+
+    for key, system in spectator_systems(lambdaq, eta, g3).items():
+        fidelity_results[key] = simulate_infidelity(
+            detuning_list, *system, backend=backend
+        )
         infidelity_params[key] = fit_infidelity(detuning_list, fidelity_results[key])
 
     return infidelity_params, fidelity_results
+
+
+def compute_infidelity_parameters_adaptive(
+    lambdaq,
+    eta,
+    alpha,
+    g3,
+    detuning_range=(50, 1000),
+    rtol=1e-2,
+    max_points=64,
+    backend="numpy",
+):
+    """Adaptive-grid counterpart of compute_infidelity_parameters.
+
+    Each spectator curve is sampled by adaptive_fit between
+    ``detuning_range`` (MHz), refining only where the decay_fit residual or
+    the curvature of the simulated curve exceeds ``rtol``.
+
+    Returns:
+        Tuple ``(infidelity_params, diagnostics)`` keyed by interaction type;
+        see adaptive_fit for the diagnostics fields.
+    """
+    infidelity_params = {}
+    diagnostics = {}
+    for key, system in spectator_systems(lambdaq, eta, g3).items():
+        infidelity_params[key], diagnostics[key] = adaptive_fit(
+            lambda detunings, system=system: simulate_infidelity(
+                detunings, *system, backend=backend
+            ),
+            decay_fit,
+            *detuning_range,
+            p0=[1, 1],
+            rtol=rtol,
+            max_points=max_points,
+            spacing="log",
+        )
+    return infidelity_params, diagnostics
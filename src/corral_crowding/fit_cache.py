@@ -0,0 +1,212 @@
+"""Content-addressed memory and disk cache for the QuTiP infidelity fits.
+
+Fits are keyed by the function name, all of its (bound) arguments, including
+the detuning grid, and the package version, so any change in physical
+parameters or code release produces a fresh entry.
+
+The shared ``fit_cache`` keeps fits in memory only. The disk store is opt-in:
+call enable_disk_cache or set ``$CORRAL_CROWDING_CACHE_DIR``. It writes
+pickles and unpickles them on later runs, so only point it at a directory
+nobody else can write to.
+"""
+
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+
+from corral_crowding.detuning_fit import (
+    compute_infidelity_parameters,
+    compute_infidelity_parameters_adaptive,
+)
+from corral_crowding.speedlimit_fit import (
+    speedlimit_infidelity_params,
+    speedlimit_infidelity_params_adaptive,
+)
+
+try:
+    __version__ = version("corral_crowding")
+except PackageNotFoundError:
+    __version__ = "unknown"
+
+
+def default_cache_dir():
+    """Returns ``$CORRAL_CROWDING_CACHE_DIR`` or ``~/.cache/corral_crowding/fits``."""
+    if "CORRAL_CROWDING_CACHE_DIR" in os.environ:
+        return os.environ["CORRAL_CROWDING_CACHE_DIR"]
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_home, "corral_crowding", "fits")
+
+
+def _hash_value(digest, value):
+    if isinstance(value, (np.ndarray, list, tuple)):
+        try:
+            array = np.asarray(value)
+        except ValueError:  # ragged
+            array = None
+        if array is not None and array.dtype.kind in "biuf":
+            array = np.ascontiguousarray(array, dtype=float)
+            digest.update(f"array{array.shape}".encode())
+            digest.update(array.tobytes())
+            return
+        # non-numeric items are hashed one by one
+        digest.update(f"items[{len(value)}]".encode())
+        for item in value:
+            _hash_value(digest, item)
+    elif isinstance(value, (float, np.floating)):
+        digest.update(float(value).hex().encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def make_key(name, arguments):
+    """Hashes a function name and its bound arguments into a cache key."""
+    digest = hashlib.sha256()
+    digest.update(f"{name}:{__version__}".encode())
+    for argument, value in sorted(arguments.items()):
+        digest.update(f"|{argument}=".encode())
+        _hash_value(digest, value)
+    return digest.hexdigest()
+
+
+class FitCache:
+    """LRU cache held in memory and mirrored to an on-disk store.
+
+    Args:
+        cache_dir: Directory of the disk store; ``None`` keeps entries in
+            memory only.
+        max_entries: Number of entries kept in memory.
+        max_disk_bytes: Total size of the disk store before the least
+            recently used files are evicted.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=64, max_disk_bytes=256 << 20):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Returns the cached value for ``key`` or None."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        os.utime(path)  # mark as recently used for disk eviction
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """Stores ``value`` in memory and, if enabled, on disk."""
+        self._remember(key, value)
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def invalidate(self, key):
+        """Drops a single entry from memory and disk."""
+        self._memory.pop(key, None)
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def clear(self, memory=True, disk=True):
+        """Drops every entry."""
+        if memory:
+            self._memory.clear()
+        if disk and self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+fit_cache = FitCache(cache_dir=os.environ.get("CORRAL_CROWDING_CACHE_DIR"))
+
+
+def enable_disk_cache(cache_dir=None):
+    """Mirrors ``fit_cache`` to disk, in ``default_cache_dir()`` if None.
+
+    Fits are then pickled to ``cache_dir`` and unpickled by later runs.
+    """
+    fit_cache.cache_dir = cache_dir or default_cache_dir()
+
+
+def cached(func, cache=None):
+    """Wraps a fitting function so results are looked up in ``cache`` first.
+
+    The wrapper exposes ``key(*args, **kwargs)`` and
+    ``invalidate(*args, **kwargs)`` for explicit cache control.
+    """
+    signature = inspect.signature(func)
+
+    def key(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return make_key(func.__qualname__, bound.arguments)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        store = fit_cache if cache is None else cache
+        cache_key = key(*args, **kwargs)
+        value = store.get(cache_key)
+        if value is None:
+            value = func(*args, **kwargs)
+            store.put(cache_key, value)
+        # callers get their own copy, the cached fit stays pristine
+        return copy.deepcopy(value)
+
+    wrapper.key = key
+    wrapper.invalidate = lambda *args, **kwargs: (
+        fit_cache if cache is None else cache
+    ).invalidate(key(*args, **kwargs))
+    return wrapper
+
+
+cached_infidelity_parameters = cached(compute_infidelity_parameters)
+cached_speedlimit_infidelity_params = cached(speedlimit_infidelity_params)
+cached_infidelity_parameters_adaptive = cached(compute_infidelity_parameters_adaptive)
+cached_speedlimit_infidelity_params_adaptive = cached(
+    speedlimit_infidelity_params_adaptive
+)
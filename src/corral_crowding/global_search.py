@@ -0,0 +1,388 @@
+"""Global search strategies for the frequency allocation.
+
+Every strategy takes a CrowdingCost, the (n_qubits + 1, 2) array of frequency
+bounds, a budget of cost evaluations and a seed, and returns a
+``scipy.optimize.OptimizeResult`` with the best allocation ``x``, its exact
+cost ``fun`` and the evaluations spent ``nfev``. Differential evolution and
+CMA-ES score whole populations with ``CrowdingCost.total_infidelities``;
+basin hopping descends with the analytic gradient of the smoothed cost;
+annealing and coordinate descent move one frequency at a time on an
+IncrementalCost.
+"""
+
+import numpy as np
+from scipy.optimize import OptimizeResult, basinhopping, differential_evolution
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class _CountingCost:
+    """Population cost that counts evaluations against a budget."""
+
+    def __init__(self, engine, max_evaluations):
+        self.engine = engine
+        self.max_evaluations = max_evaluations
+        self.evaluations = 0
+        self.best_x = None
+        self.best_cost = np.inf
+
+    def __call__(self, frequencies):
+        frequencies = np.atleast_2d(frequencies)
+        if self.evaluations + len(frequencies) > self.max_evaluations:
+            raise _BudgetExhausted
+        self.evaluations += len(frequencies)
+        costs = self.engine.total_infidelities(frequencies)
+        best = np.argmin(costs)
+        if costs[best] < self.best_cost:
+            self.best_cost = costs[best]
+            self.best_x = frequencies[best].copy()
+        return costs
+
+    def result(self, message):
+        return OptimizeResult(
+            x=self.best_x,
+            fun=self.best_cost,
+            nfev=self.evaluations,
+            message=message,
+            success=self.best_x is not None,
+        )
+
+
+def differential_evolution_search(
+    engine, bounds, max_evaluations, seed=None, popsize=15, **options
+):
+    """Vectorized ``scipy.optimize.differential_evolution``.
+
+    Each generation of ``popsize * n_dims`` candidates is scored in a single
+    batched call; the generation count is derived from ``max_evaluations``.
+    ``options`` are forwarded to ``differential_evolution``.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    generation = popsize * len(bounds)
+    if max_evaluations < generation:
+        raise ValueError(
+            f"max_evaluations={max_evaluations} is below one population"
+            f" ({generation} candidates)"
+        )
+    cost = _CountingCost(engine, max_evaluations)
+    result = differential_evolution(
+        lambda x: cost(x.T),
+        bounds,
+        maxiter=max_evaluations // generation - 1,
+        popsize=popsize,
+        seed=np.random.default_rng(seed),
+        polish=False,
+        vectorized=True,
+        updating="deferred",
+        **options,
+    )
+    return cost.result(result.message)
+
+
+def basin_hopping_search(
+    engine,
+    bounds,
+    max_evaluations,
+    seed=None,
+    stepsize=0.3,
+    temperature=0.05,
+    smoothness=0.002,
+    **options,
+):
+    """``scipy.optimize.basinhopping`` with gradient-based local descents.
+
+    Hops are uniform displacements of up to ``stepsize`` GHz, clipped to the
+    bounds. Local minimizations run L-BFGS-B on the cost smoothed by
+    ``smoothness`` (see CrowdingCost.value_and_grad); minima are then scored
+    on the exact cost. Every value-and-gradient call counts as one
+    evaluation. ``options`` are forwarded to ``basinhopping``.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    rng = np.random.default_rng(seed)
+    cost = _CountingCost(engine, max_evaluations)
+
+    lowest = {"x": None, "value": np.inf}
+
+    def value_and_grad(x):
+        if cost.evaluations >= max_evaluations:
+            raise _BudgetExhausted
+        cost.evaluations += 1
+        value, grad = engine.value_and_grad(x, smoothness)
+        if value < lowest["value"]:
+            lowest["x"], lowest["value"] = x.copy(), value
+        return value, grad
+
+    def take_step(x):
+        step = rng.uniform(-stepsize, stepsize, len(x))
+        return np.clip(x + step, bounds[:, 0], bounds[:, 1])
+
+    def record_minimum(x, f, accept):
+        # score the local minimum on the exact cost, outside the budget
+        value = engine(x)
+        if value < cost.best_cost:
+            cost.best_cost, cost.best_x = value, x.copy()
+
+    message = "Evaluation budget exhausted"
+    try:
+        result = basinhopping(
+            value_and_grad,
+            rng.uniform(bounds[:, 0], bounds[:, 1]),
+            niter=max_evaluations,
+            T=temperature,
+            minimizer_kwargs={"method": "L-BFGS-B", "jac": True, "bounds": bounds},
+            take_step=take_step,
+            callback=record_minimum,
+            seed=rng,
+            **options,
+        )
+        message = result.message
+    except _BudgetExhausted:
+        pass
+    # the first descent happens before basinhopping reports any minimum
+    if lowest["x"] is not None:
+        record_minimum(lowest["x"], lowest["value"], True)
+    return cost.result(message)
+
+
+def cma_es_search(
+    engine,
+    bounds,
+    max_evaluations,
+    seed=None,
+    popsize=None,
+    sigma0=0.3,
+    tolx=1e-8,
+    initial=None,
+):
+    """IPOP-CMA-ES over the frequency box.
+
+    Runs (mu/mu_w, lambda)-CMA-ES in coordinates normalized to the unit box,
+    restarting from a random mean with a doubled population whenever the
+    step size collapses or progress stalls, until ``max_evaluations`` is
+    spent. Samples outside the box are scored at their projection onto it
+    plus a quadratic penalty on the distance, so selection pulls the search
+    back inside.
+
+    Args:
+        engine: CrowdingCost to minimize.
+        bounds: Array of shape (n_dims, 2).
+        max_evaluations: Budget of cost evaluations.
+        seed: Seed of the sampler.
+        popsize: Initial population; defaults to ``4 + 3 ln(n_dims)``.
+        sigma0: Initial step size as a fraction of the box.
+        tolx: Stop a run once the step size falls below this.
+        initial: Mean of the first run; later runs start at random.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    lower, width = bounds[:, 0], bounds[:, 1] - bounds[:, 0]
+    n = len(bounds)
+    rng = np.random.default_rng(seed)
+    cost = _CountingCost(engine, max_evaluations)
+    popsize = popsize or 4 + int(3 * np.log(n))
+    chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n**2))
+
+    message = "Evaluation budget exhausted"
+    try:
+        while cost.evaluations + popsize <= max_evaluations:
+            mu = popsize // 2
+            weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+            weights /= weights.sum()
+            mu_eff = 1 / np.sum(weights**2)
+            cc = (4 + mu_eff / n) / (n + 4 + 2 * mu_eff / n)
+            cs = (mu_eff + 2) / (n + mu_eff + 5)
+            c1 = 2 / ((n + 1.3) ** 2 + mu_eff)
+            cmu = min(1 - c1, 2 * (mu_eff - 2 + 1 / mu_eff) / ((n + 2) ** 2 + mu_eff))
+            damps = 1 + 2 * max(0, np.sqrt((mu_eff - 1) / (n + 1)) - 1) + cs
+
+            if initial is not None:
+                mean = (np.asarray(initial) - lower) / np.maximum(width, 1e-12)
+                mean = np.clip(mean, 0, 1)
+                initial = None
+            else:
+                mean = rng.uniform(size=n)
+            sigma = sigma0
+            pc, ps = np.zeros(n), np.zeros(n)
+            C, B, D = np.eye(n), np.eye(n), np.ones(n)
+            history = []
+            stall = 10 + int(np.ceil(30 * n / popsize))
+            generation = 0
+            while True:
+                generation += 1
+                z = rng.standard_normal((popsize, n))
+                y = mean + sigma * (z * D) @ B.T
+                inside = np.clip(y, 0, 1)
+                values = cost(lower + inside * width)
+                fitness = values + np.sum((y - inside) ** 2, axis=1)
+                selected = np.argsort(fitness)[:mu]
+
+                old_mean = mean
+                mean = weights @ y[selected]
+                step = (mean - old_mean) / sigma
+                ps = (1 - cs) * ps + np.sqrt(cs * (2 - cs) * mu_eff) * (
+                    B @ ((B.T @ step) / D)
+                )
+                hsig = np.linalg.norm(ps) / np.sqrt(
+                    1 - (1 - cs) ** (2 * generation)
+                ) / chi_n < 1.4 + 2 / (n + 1)
+                pc = (1 - cc) * pc + hsig * np.sqrt(cc * (2 - cc) * mu_eff) * step
+                steps = (y[selected] - old_mean) / sigma
+                C = (
+                    (1 - c1 - cmu) * C
+                    + c1 * (np.outer(pc, pc) + (1 - hsig) * cc * (2 - cc) * C)
+                    + cmu * (steps.T * weights) @ steps
+                )
+                sigma *= np.exp((cs / damps) * (np.linalg.norm(ps) / chi_n - 1))
+                C = np.triu(C) + np.triu(C, 1).T
+                eigenvalues, B = np.linalg.eigh(C)
+                D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+                history.append(fitness[selected[0]])
+                if sigma * D.max() < tolx:
+                    break
+                if len(history) > stall and np.ptp(history[-stall:]) < 1e-12:
+                    break
+            popsize *= 2
+    except _BudgetExhausted:
+        pass
+    return cost.result(message)
+
+
+def simulated_annealing_search(
+    engine,
+    bounds,
+    max_evaluations,
+    seed=None,
+    initial=None,
+    step_size=0.15,
+    temperature=(0.1, 1e-4),
+    resync_every=1000,
+):
+    """Simulated annealing over single-frequency moves.
+
+    Each step moves one randomly chosen frequency by a Gaussian step (clipped
+    to the bounds) and accepts it with the Metropolis rule, cooling
+    geometrically over ``max_evaluations`` steps. Moves are scored
+    incrementally (see IncrementalCost).
+
+    Args:
+        engine: CrowdingCost to minimize.
+        bounds: Array of shape (n_dims, 2).
+        max_evaluations: Number of proposed moves.
+        seed: Seed of the move sampler.
+        initial: Starting allocation; uniform random within bounds if None.
+        step_size: Standard deviation of a move in GHz.
+        temperature: Start and end temperature relative to the starting cost.
+        resync_every: Accepted moves between exact recomputations.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    rng = np.random.default_rng(seed)
+    if initial is None:
+        initial = rng.uniform(bounds[:, 0], bounds[:, 1])
+    state = engine.incremental(initial)
+    best_x, best_cost = state.frequencies.copy(), state.cost
+    scale = max(state.cost, np.finfo(float).tiny)
+    temperatures = scale * np.geomspace(*temperature, max(max_evaluations, 1))
+
+    indices = rng.integers(len(bounds), size=max_evaluations)
+    steps = rng.normal(0.0, step_size, max_evaluations)
+    thresholds = rng.random(max_evaluations)
+    for index, step, threshold, current_temperature in zip(
+        indices, steps, thresholds, temperatures
+    ):
+        value = np.clip(state.frequencies[index] + step, *bounds[index])
+        delta = state.propose(index, value) - state.cost
+        if delta <= 0 or threshold < np.exp(-delta / current_temperature):
+            state.accept()
+            if state.num_updates >= resync_every:
+                state.resync()
+            if state.cost < best_cost:
+                best_x, best_cost = state.frequencies.copy(), state.cost
+    return OptimizeResult(
+        x=best_x,
+        fun=engine(best_x),
+        nfev=max_evaluations,
+        message="Annealing schedule completed",
+        success=True,
+    )
+
+
+def coordinate_descent_search(
+    engine,
+    bounds,
+    max_evaluations,
+    seed=None,
+    initial=None,
+    grid_points=48,
+):
+    """Coordinate descent by grid line searches, restarted until the budget ends.
+
+    Each sweep visits the frequencies in random order and moves each one to
+    the best of ``grid_points`` values spanning its bounds plus a finer grid
+    around its current value. A sweep without improvement ends the descent,
+    and the next one starts from a new random allocation. Moves are scored
+    incrementally (see IncrementalCost).
+
+    Args:
+        engine: CrowdingCost to minimize.
+        bounds: Array of shape (n_dims, 2).
+        max_evaluations: Number of scored candidate moves.
+        seed: Seed of the restarts and visiting order.
+        initial: Starting allocation of the first descent.
+        grid_points: Candidate values per line search and grid.
+    """
+    bounds = np.asarray(bounds, dtype=float)
+    rng = np.random.default_rng(seed)
+    num_dims = len(bounds)
+    spacing = (bounds[:, 1] - bounds[:, 0]) / (grid_points - 1)
+    fine_offsets = np.linspace(-1.0, 1.0, grid_points // 4 + 1)
+    evaluations = 0
+    best_x, best_cost = None, np.inf
+    start = initial
+    while evaluations + 2 * grid_points <= max_evaluations:
+        if start is None:
+            start = rng.uniform(bounds[:, 0], bounds[:, 1])
+        state = engine.incremental(start)
+        start = None
+        improved = True
+        while improved and evaluations + 2 * grid_points <= max_evaluations:
+            improved = False
+            for index in rng.permutation(num_dims):
+                candidates = np.clip(
+                    np.concatenate(
+                        [
+                            np.linspace(*bounds[index], grid_points),
+                            state.frequencies[index] + spacing[index] * fine_offsets,
+                        ]
+                    ),
+                    *bounds[index],
+                )
+                costs = [state.propose(index, value) for value in candidates]
+                evaluations += len(candidates)
+                best = int(np.argmin(costs))
+                if costs[best] < state.cost:
+                    state.propose(index, candidates[best])
+                    state.accept()
+                    improved = True
+                if evaluations + 2 * grid_points > max_evaluations:
+                    break
+            state.resync()
+        if state.cost < best_cost:
+            best_x, best_cost = state.frequencies.copy(), state.cost
+    return OptimizeResult(
+        x=best_x,
+        fun=best_cost if best_x is None else engine(best_x),
+        nfev=evaluations,
+        message="Evaluation budget exhausted",
+        success=best_x is not None,
+    )
+
+
+GLOBAL_STRATEGIES = {
+    "differential_evolution": differential_evolution_search,
+    "basinhopping": basin_hopping_search,
+    "cma-es": cma_es_search,
+    "annealing": simulated_annealing_search,
+    "coordinate_descent": coordinate_descent_search,
+}
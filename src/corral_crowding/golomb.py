@@ -0,0 +1,348 @@
+"""Golomb rulers as seeds for frequency allocations.
+
+Placing qubit frequencies on the marks of a Golomb ruler makes every
+pairwise difference (every driven gate frequency) distinct, with the
+difference of any two gates at least one ruler unit apart.
+
+Optimal rulers are tabulated up to 16 marks and can be proven by
+search_golomb_ruler, a branch and bound over bitsets of the used distances.
+Larger rulers come from near_optimal_golomb_ruler (Singer difference sets,
+tightened by the search) and are kept in a persistent RulerCache.
+"""
+
+import itertools
+import json
+import math
+import os
+
+import numpy as np
+
+# optimal rulers (OEIS A003022 lengths), one per number of marks
+OPTIMAL_RULERS = {
+    1: (0,),
+    2: (0, 1),
+    3: (0, 1, 3),
+    4: (0, 1, 4, 6),
+    5: (0, 1, 4, 9, 11),
+    6: (0, 1, 4, 10, 12, 17),
+    7: (0, 1, 4, 10, 18, 23, 25),
+    8: (0, 1, 4, 9, 15, 22, 32, 34),
+    9: (0, 1, 5, 12, 25, 27, 35, 41, 44),
+    10: (0, 1, 6, 10, 23, 26, 34, 41, 53, 55),
+    11: (0, 1, 4, 13, 28, 33, 47, 54, 64, 70, 72),
+    12: (0, 2, 6, 24, 29, 40, 43, 55, 68, 75, 76, 85),
+    13: (0, 2, 5, 25, 37, 43, 59, 70, 85, 89, 98, 99, 106),
+    14: (0, 4, 6, 20, 35, 52, 59, 77, 78, 86, 89, 99, 122, 127),
+    15: (0, 4, 20, 30, 57, 59, 62, 76, 100, 111, 123, 136, 144, 145, 151),
+    16: (0, 1, 4, 11, 26, 32, 56, 68, 76, 115, 117, 134, 150, 163, 168, 177),
+}
+
+
+class _NodeLimit(Exception):
+    pass
+
+
+def min_ruler_length(num_marks):
+    """Lower bound on the length of a Golomb ruler with ``num_marks`` marks."""
+    if num_marks in OPTIMAL_RULERS:
+        return OPTIMAL_RULERS[num_marks][-1]
+    # n marks have n (n - 1) / 2 distinct positive distances
+    return num_marks * (num_marks - 1) // 2
+
+
+def search_golomb_ruler(num_marks, max_length=None, node_limit=None):
+    """Depth-first branch and bound for a Golomb ruler.
+
+    Marks are placed left to right. The distances from the last mark to the
+    earlier ones are a bitset, so a candidate mark ``d`` further on clashes
+    iff ``(left << d) & used``. A branch is cut when the marks still to
+    place cannot fit in ``max_length`` (every sub-ruler is at least
+    min_ruler_length long) and, with a length bound, mirror images are
+    skipped by requiring the first gap to be smaller than the last.
+
+    Args:
+        num_marks: Number of marks.
+        max_length: Longest acceptable ruler; None returns the greedy
+            (first found, Mian-Chowla) ruler.
+        node_limit: Give up after expanding this many nodes.
+
+    Returns:
+        Tuple ``(marks, exhaustive)``: the first ruler found or None, and
+        whether the search finished within ``node_limit``, so None with
+        ``exhaustive`` proves that no ruler fits in ``max_length``.
+    """
+    if num_marks <= 2:
+        fits = max_length is None or max_length >= num_marks - 1
+        return (np.arange(num_marks) if fits else None), True
+    symmetric = max_length is not None
+    # the powers of two always form a ruler, so the greedy search fits below
+    limit = 2**num_marks if max_length is None else max_length
+    lengths = [min_ruler_length(k) for k in range(num_marks + 1)]
+    marks = [0]
+    nodes = 0
+
+    def extend(position, left, used):
+        nonlocal nodes
+        nodes += 1
+        if node_limit is not None and nodes > node_limit:
+            raise _NodeLimit
+        placed = len(marks)
+        after = num_marks - placed - 1  # marks still to place after the next
+        first_gap = marks[1] if placed > 1 else None
+        reserve = lengths[after + 1]
+        if symmetric and first_gap is not None and after > 0:
+            reserve = max(reserve, lengths[after] + first_gap + 1)
+        lowest = 1
+        if symmetric and first_gap is not None and after == 0:
+            lowest = first_gap + 1
+        for d in range(lowest, limit - position - reserve + 1):
+            shifted = left << d
+            if shifted & used:
+                continue
+            marks.append(position + d)
+            if after == 0 or extend(position + d, shifted | 1, used | shifted):
+                return True
+            marks.pop()
+        return False
+
+    try:
+        found = extend(0, 1, 0)
+    except _NodeLimit:
+        return None, False
+    return (np.array(marks) if found else None), True
+
+
+def optimal_golomb_ruler(num_marks, node_limit=None):
+    """Shortest Golomb ruler by iterative deepening on the length.
+
+    Returns the marks, or None when ``node_limit`` (per length) runs out.
+    """
+    length = min_ruler_length(num_marks) if num_marks not in OPTIMAL_RULERS else 0
+    length = max(length, num_marks * (num_marks - 1) // 2)
+    while True:
+        marks, exhaustive = search_golomb_ruler(num_marks, length, node_limit)
+        if marks is not None:
+            return marks
+        if not exhaustive:
+            return None
+        length += 1
+
+
+def _is_prime(n):
+    return n >= 2 and all(n % k for k in range(2, math.isqrt(n) + 1))
+
+
+def _prime_factors(n):
+    factors, k = set(), 2
+    while k * k <= n:
+        while n % k == 0:
+            factors.add(k)
+            n //= k
+        k += 1
+    if n > 1:
+        factors.add(n)
+    return factors
+
+
+def _cubic_mul(u, v, f, p):
+    """Product of two elements of GF(p)[x] / (x^3 + f2 x^2 + f1 x + f0)."""
+    product = [0] * 5
+    for i, a in enumerate(u):
+        for j, b in enumerate(v):
+            product[i + j] += a * b
+    for degree in (4, 3):
+        top = product[degree] % p
+        for k in range(3):
+            product[degree - 3 + k] -= top * f[k]
+    return tuple(c % p for c in product[:3])
+
+
+def _cubic_pow(u, exponent, f, p):
+    result = (1, 0, 0)
+    while exponent:
+        if exponent & 1:
+            result = _cubic_mul(result, u, f, p)
+        u = _cubic_mul(u, u, f, p)
+        exponent >>= 1
+    return result
+
+
+def _primitive_cubic(p):
+    """Coefficients ``(f0, f1, f2)`` of a primitive cubic over GF(p)."""
+    order = p**3 - 1
+    factors = _prime_factors(order)
+    x, one = (0, 1, 0), (1, 0, 0)
+    for f in itertools.product(range(1, p), range(p), range(p)):
+        if _cubic_pow(x, order, f, p) == one and all(
+            _cubic_pow(x, order // r, f, p) != one for r in factors
+        ):
+            return f
+    raise ValueError(f"No primitive cubic over GF({p})")
+
+
+def _singer_difference_set(p):
+    """Singer difference set of ``p + 1`` residues mod ``p^2 + p + 1``.
+
+    With ``x`` a primitive element of GF(p^3), these are the exponents
+    ``a < p^2 + p + 1`` for which ``x^a`` has no ``x^2`` component.
+    """
+    f = _primitive_cubic(p)
+    x = (0, 1, 0)
+    modulus = p * p + p + 1
+    residues, power = [], (1, 0, 0)
+    for a in range(modulus):
+        if power[2] == 0:
+            residues.append(a)
+        power = _cubic_mul(power, x, f, p)
+    return np.array(residues), modulus
+
+
+def singer_ruler(num_marks, prime=None):
+    """Golomb ruler cut from a Singer difference set (Singer 1938).
+
+    Every multiplier of the smallest suitable difference set is tried, and
+    the shortest window of ``num_marks`` cyclically consecutive residues is
+    returned; the rulers are typically within a few percent of optimal.
+    """
+    if prime is None:
+        prime = max(2, num_marks - 1)
+        while not _is_prime(prime):
+            prime += 1
+    residues, modulus = _singer_difference_set(prime)
+    multipliers = np.array([t for t in range(1, modulus) if math.gcd(t, modulus) == 1])
+    scaled = np.sort(residues[None, :] * multipliers[:, None] % modulus, axis=1)
+    cyclic = np.concatenate([scaled, scaled + modulus], axis=1)
+    count = residues.size
+    spans = cyclic[:, num_marks - 1 : num_marks - 1 + count] - cyclic[:, :count]
+    row, start = np.unravel_index(np.argmin(spans), spans.shape)
+    return cyclic[row, start : start + num_marks] - cyclic[row, start]
+
+
+def near_optimal_golomb_ruler(num_marks, node_limit=100_000):
+    """Short Golomb ruler for any number of marks.
+
+    Starts from the better of the greedy and Singer rulers and shortens it
+    with search_golomb_ruler until a search runs out of ``node_limit`` nodes.
+
+    Returns:
+        Tuple ``(marks, optimal)``, where ``optimal`` is True when no
+        shorter ruler exists.
+    """
+    if num_marks in OPTIMAL_RULERS:
+        return np.array(OPTIMAL_RULERS[num_marks]), True
+    best, _ = search_golomb_ruler(num_marks)
+    singer = singer_ruler(num_marks)
+    if singer[-1] < best[-1]:
+        best = singer
+    while best[-1] > min_ruler_length(num_marks):
+        marks, exhaustive = search_golomb_ruler(num_marks, best[-1] - 1, node_limit)
+        if marks is None:
+            return best, exhaustive
+        best = marks
+    return best, True
+
+
+def default_cache_path():
+    """Ruler cache file in ``$CORRAL_CROWDING_CACHE_DIR`` or ``~/.cache``."""
+    if "CORRAL_CROWDING_CACHE_DIR" in os.environ:
+        cache_dir = os.environ["CORRAL_CROWDING_CACHE_DIR"]
+    else:
+        cache_home = os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+        )
+        cache_dir = os.path.join(cache_home, "corral_crowding")
+    return os.path.join(cache_dir, "golomb_rulers.json")
+
+
+class RulerCache:
+    """Shortest known rulers, held in memory and mirrored to a JSON file.
+
+    Args:
+        path: JSON file of the store; ``None`` keeps rulers in memory only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._rulers = {}
+
+    def _load(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                return {int(n): entry for n, entry in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, num_marks):
+        """Returns ``(marks, optimal)`` for ``num_marks`` or None."""
+        if num_marks not in self._rulers:
+            self._rulers.update(self._load())
+        entry = self._rulers.get(num_marks)
+        if entry is None:
+            return None
+        return np.array(entry["marks"]), entry["optimal"]
+
+    def put(self, num_marks, marks, optimal=False):
+        """Stores a ruler unless a shorter one is already known."""
+        if not is_golomb_ruler(marks):
+            raise ValueError("Not a Golomb ruler")
+        # merge with the file so concurrent writers only ever improve it
+        rulers = {**self._load(), **self._rulers}
+        known = rulers.get(num_marks)
+        if known is not None and known["marks"][-1] <= marks[-1]:
+            self._rulers = rulers
+            return
+        rulers[num_marks] = {"marks": [int(m) for m in marks], "optimal": optimal}
+        self._rulers = rulers
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({str(n): entry for n, entry in sorted(rulers.items())}, f)
+        os.replace(tmp_path, self.path)
+
+
+ruler_cache = RulerCache(default_cache_path())
+
+
+def golomb_ruler(num_marks, cache=None):
+    """Returns the marks of a short Golomb ruler with ``num_marks`` marks.
+
+    Optimal rulers are tabulated up to 16 marks; longer ones are looked up
+    in ``cache`` (default ruler_cache) or built by near_optimal_golomb_ruler
+    and stored there.
+    """
+    if num_marks < 1:
+        raise ValueError("A Golomb ruler needs at least one mark")
+    if num_marks in OPTIMAL_RULERS:
+        return np.array(OPTIMAL_RULERS[num_marks])
+    store = ruler_cache if cache is None else cache
+    entry = store.get(num_marks)
+    if entry is None:
+        marks, optimal = near_optimal_golomb_ruler(num_marks)
+        store.put(num_marks, marks, optimal)
+        return marks
+    return entry[0]
+
+
+def is_golomb_ruler(marks):
+    """Whether all pairwise differences of ``marks`` are distinct."""
+    marks = np.asarray(marks)
+    differences = np.abs(marks[:, None] - marks[None, :])[
+        np.triu_indices(len(marks), 1)
+    ]
+    return len(np.unique(differences)) == len(differences)
+
+
+def golomb_frequencies(num_qubits, low, high):
+    """Qubit frequencies on a Golomb ruler scaled to ``[low, high]``.
+
+    Returns an increasing array; distinct gate frequencies are at least
+    ``(high - low) / length`` apart, ``length`` being the ruler length.
+    """
+    marks = golomb_ruler(num_qubits).astype(float)
+    if num_qubits == 1:
+        return np.array([low], dtype=float)
+    return low + marks / marks[-1] * (high - low)
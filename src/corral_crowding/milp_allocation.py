@@ -0,0 +1,332 @@
+"""Exact frequency allocation by mixed-integer linear programming.
+
+Maximizes the minimum separation between the driven gate frequencies of an
+all-to-all module, as ``maximize_distinct_interaction_separation_lp`` in
+notebook 04, subject to the ``min_bare_space_ghz`` spacing of the qubits.
+Qubits of a module are interchangeable, so they are ordered by frequency:
+gate frequencies become linear (``q_j - q_i``) and the sign of most gate
+differences is known. Only the remaining pairs get a binary ordering
+variable with big-M constraints.
+
+CPLEX (docplex) is used when installed, otherwise SciPy's HiGHS ``milp``.
+"""
+
+import itertools
+import time
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, OptimizeResult, milp
+from scipy.sparse import csr_array
+
+from corral_crowding.golomb import OPTIMAL_RULERS, golomb_frequencies
+
+try:
+    from docplex.mp.model import Model
+    from docplex.mp.solution import SolveSolution
+    from docplex.mp.utils import DOcplexLimitsExceeded
+except ImportError:  # cplex is optional at runtime, HiGHS is the fallback
+    Model = None
+
+    class DOcplexLimitsExceeded(Exception):
+        """Never raised without docplex."""
+
+
+def gate_separation(frequencies):
+    """Minimum separation between the pairwise differences of ``frequencies``."""
+    frequencies = np.asarray(frequencies, dtype=float)
+    gates = np.abs(frequencies[:, None] - frequencies[None, :])[
+        np.triu_indices(len(frequencies), 1)
+    ]
+    if len(gates) < 2:
+        return np.inf
+    return np.min(np.diff(np.sort(gates)))
+
+
+class SeparationMILP:
+    """MILP of the maximum minimum gate separation of ``num_qubits`` qubits.
+
+    Variables are the sorted qubit frequencies ``q``, the separation ``t``
+    and one binary per gate pair whose order is not implied by the qubit
+    order. Constraints are kept as sparse rows ``lb <= a . x <= ub``.
+
+    Args:
+        num_qubits: Number of qubits of the all-to-all module.
+        qubit_bounds: Frequency range in GHz.
+        min_bare_space_ghz: Minimum spacing of adjacent qubit frequencies.
+    """
+
+    def __init__(self, num_qubits, qubit_bounds=(3.3, 5.7), min_bare_space_ghz=0.2):
+        if num_qubits < 3:
+            raise ValueError("Gate separation needs at least 3 qubits")
+        self.num_qubits = num_qubits
+        self.qubit_bounds = qubit_bounds
+        self.min_bare_space_ghz = min_bare_space_ghz
+        low, high = qubit_bounds
+        span = high - low
+        self.t_index = num_qubits
+        self.gates = list(itertools.combinations(range(num_qubits), 2))
+
+        rows, lower, upper = [], [], []
+
+        def add(coefficients, lb, ub=np.inf):
+            rows.append(coefficients)
+            lower.append(lb)
+            upper.append(ub)
+
+        # ordering with the bare spacing: q_{i+1} - q_i >= min_bare_space_ghz
+        for i in range(num_qubits - 1):
+            add({i + 1: 1.0, i: -1.0}, min_bare_space_ghz)
+        # mirror symmetry: the first gap is no larger than the last
+        add({1: 1.0, 0: -1.0, num_qubits - 1: -1.0, num_qubits - 2: 1.0}, -np.inf, 0)
+
+        # |g_a - g_b| >= t for every pair of gates
+        self.ordered_pairs = []
+        big_m = 2 * span
+        for (i, j), (k, l) in itertools.combinations(self.gates, 2):
+            difference = {}
+            for index, sign in ((j, 1.0), (i, -1.0), (l, -1.0), (k, 1.0)):
+                difference[index] = difference.get(index, 0.0) + sign
+            difference = {index: c for index, c in difference.items() if c}
+            sign = self._known_sign(i, j, k, l)
+            if sign:
+                add(
+                    {
+                        **{v: sign * c for v, c in difference.items()},
+                        self.t_index: -1.0,
+                    },
+                    0,
+                )
+                continue
+            y = num_qubits + 1 + len(self.ordered_pairs)
+            self.ordered_pairs.append(((i, j), (k, l)))
+            # g_a - g_b >= t - M y  and  g_b - g_a >= t - M (1 - y)
+            add({**difference, self.t_index: -1.0, y: big_m}, 0)
+            add(
+                {
+                    **{v: -c for v, c in difference.items()},
+                    self.t_index: -1.0,
+                    y: -big_m,
+                },
+                -big_m,
+            )
+
+        self.num_variables = num_qubits + 1 + len(self.ordered_pairs)
+        self.lower = np.array(
+            [low] * num_qubits + [0.0] + [0.0] * len(self.ordered_pairs)
+        )
+        self.upper = np.array(
+            [high] * num_qubits + [span] + [1.0] * len(self.ordered_pairs)
+        )
+        self.integrality = np.zeros(self.num_variables)
+        self.integrality[num_qubits + 1 :] = 1
+        self.rows = rows
+        self.row_lower, self.row_upper = np.array(lower), np.array(upper)
+
+    @staticmethod
+    def _known_sign(i, j, k, l):
+        """Sign of ``g_(i,j) - g_(k,l)`` implied by the qubit order, or 0."""
+        if i == k:
+            return 1.0 if j > l else -1.0
+        if j == l:
+            return 1.0 if i < k else -1.0
+        if i < k and l < j:
+            return 1.0
+        if k < i and j < l:
+            return -1.0
+        return 0.0
+
+    def matrix(self):
+        """Constraint matrix as a SciPy sparse array."""
+        data, indices, indptr = [], [], [0]
+        for row in self.rows:
+            indices += list(row)
+            data += list(row.values())
+            indptr.append(len(indices))
+        return csr_array(
+            (data, indices, indptr), shape=(len(self.rows), self.num_variables)
+        )
+
+    def start(self, frequencies):
+        """Full variable vector of an allocation, or None if infeasible."""
+        q = np.sort(np.asarray(frequencies, dtype=float))
+        low, high = self.qubit_bounds
+        tolerance = 1e-9
+        if q[0] < low - tolerance or q[-1] > high + tolerance:
+            return None
+        if np.any(np.diff(q) < self.min_bare_space_ghz - tolerance):
+            return None
+        if q[1] - q[0] > q[-1] - q[-2] + tolerance:
+            q = (low + high) - q[::-1]
+        x = np.concatenate([q, [gate_separation(q)], np.zeros(len(self.ordered_pairs))])
+        for index, ((i, j), (k, l)) in enumerate(self.ordered_pairs):
+            x[self.num_qubits + 1 + index] = (q[j] - q[i]) < (q[l] - q[k])
+        return x
+
+    def solve_highs(self, time_limit=60, mip_gap=1e-4, start=None):
+        """Solves with SciPy's HiGHS ``milp``.
+
+        ``milp`` takes no initial solution, so a ``start`` enters as the
+        objective cutoff ``t >= t_start``, pruning every node that cannot
+        beat it.
+        """
+        lower = self.lower.copy()
+        if start is not None:
+            lower[self.t_index] = start[self.t_index]
+        c = np.zeros(self.num_variables)
+        c[self.t_index] = -1.0
+        result = milp(
+            c,
+            constraints=LinearConstraint(self.matrix(), self.row_lower, self.row_upper),
+            integrality=self.integrality,
+            bounds=Bounds(lower, self.upper),
+            options={"time_limit": time_limit, "mip_rel_gap": mip_gap, "disp": False},
+        )
+        status = {0: "optimal", 1: "time_limit", 2: "infeasible"}.get(
+            result.status, "error"
+        )
+        return result.x, status, getattr(result, "mip_gap", np.nan)
+
+    def solve_cplex(self, time_limit=60, mip_gap=1e-4, start=None):
+        """Solves with CPLEX through docplex, warm started from ``start``."""
+        model = Model(name="max_gate_separation")
+        model.parameters.timelimit = time_limit
+        model.parameters.mip.tolerances.mipgap = mip_gap
+        variables = [
+            (
+                model.binary_var(name=f"y{index}")
+                if self.integrality[index]
+                else model.continuous_var(
+                    lb=self.lower[index], ub=self.upper[index], name=f"x{index}"
+                )
+            )
+            for index in range(self.num_variables)
+        ]
+        for row, lb, ub in zip(self.rows, self.row_lower, self.row_upper):
+            expression = model.scal_prod([variables[v] for v in row], row.values())
+            if np.isfinite(lb):
+                model.add_constraint(expression >= lb)
+            if np.isfinite(ub):
+                model.add_constraint(expression <= ub)
+        model.maximize(variables[self.t_index])
+        if start is not None:
+            model.add_mip_start(
+                SolveSolution(model, dict(zip(variables, start.tolist())))
+            )
+        solution = model.solve()
+        details = model.solve_details
+        if solution is None:
+            status = "infeasible" if "infeasible" in details.status else "time_limit"
+            return None, status, np.nan
+        x = np.array(solution.get_values(variables))
+        status = "optimal" if "optimal" in details.status else "time_limit"
+        return x, status, details.mip_relative_gap
+
+
+def golomb_seed(num_qubits, qubit_bounds=(3.3, 5.7), min_bare_space_ghz=0.2):
+    """Feasible Golomb-ruler allocation with the bare spacing enforced.
+
+    The ruler scaled to ``qubit_bounds`` is used when its marks are far
+    enough apart. Otherwise the marks are scaled into the room left after
+    reserving ``min_bare_space_ghz`` per gap. Returns the sorted frequencies,
+    or None when no tabulated ruler fits.
+    """
+    low, high = qubit_bounds
+    room = high - low - (num_qubits - 1) * min_bare_space_ghz
+    if num_qubits not in OPTIMAL_RULERS or room < 0:
+        return None
+    scaled = golomb_frequencies(num_qubits, low, high)
+    if np.all(np.diff(scaled) >= min_bare_space_ghz):
+        return scaled
+    marks = golomb_frequencies(num_qubits, 0.0, room)
+    return low + np.arange(num_qubits) * min_bare_space_ghz + marks
+
+
+def maximize_gate_separation(
+    module,
+    qubit_bounds=(3.3, 5.7),
+    min_bare_space_ghz=0.2,
+    time_limit=60,
+    mip_gap=1e-4,
+    warm_start="golomb",
+    solver="auto",
+):
+    """Qubit frequencies maximizing the minimum driven-gate separation.
+
+    Args:
+        module: QuantumModuleGraph of a single all-to-all module, or its
+            number of qubits.
+        qubit_bounds: Frequency range in GHz.
+        min_bare_space_ghz: Minimum spacing of the qubit frequencies.
+        time_limit: Solver time limit in seconds.
+        mip_gap: Relative optimality gap at which the solver stops.
+        warm_start: ``"golomb"`` for golomb_seed, an allocation, or None.
+        solver: ``"cplex"``, ``"highs"`` or ``"auto"`` (CPLEX if installed,
+            HiGHS for models beyond the limits of its community edition).
+
+    Returns:
+        OptimizeResult with the sorted frequencies ``x``, the separation
+        ``fun`` in GHz, ``status`` (``"optimal"``, ``"time_limit"`` or
+        ``"infeasible"``), the ``solver``, its ``mip_gap`` and ``runtime``.
+        When the solver finds nothing better in time the warm start is
+        returned.
+
+    Raises:
+        ValueError: If ``module`` has more than one SNAIL; the model relies on
+            every pair of qubits being a gate.
+    """
+    if getattr(module, "num_snails", 1) != 1:
+        raise ValueError(
+            "maximize_gate_separation needs a single all-to-all module,"
+            f" got {module.num_snails} SNAILs"
+        )
+    num_qubits = getattr(module, "num_qubits", module)
+    problem = SeparationMILP(num_qubits, qubit_bounds, min_bare_space_ghz)
+    fallback = solver == "auto"
+    if solver == "auto":
+        solver = "cplex" if Model is not None else "highs"
+    if solver == "cplex" and Model is None:
+        raise ImportError("docplex is required for solver='cplex'")
+    if solver not in ("cplex", "highs"):
+        raise ValueError(f"Unknown solver: {solver}")
+
+    if isinstance(warm_start, str) and warm_start == "golomb":
+        seed = golomb_seed(num_qubits, qubit_bounds, min_bare_space_ghz)
+    else:
+        seed = warm_start
+    start = None if seed is None else problem.start(seed)
+
+    began = time.perf_counter()
+    solve = problem.solve_cplex if solver == "cplex" else problem.solve_highs
+    try:
+        x, status, gap = solve(time_limit=time_limit, mip_gap=mip_gap, start=start)
+    except DOcplexLimitsExceeded:
+        # the community edition of CPLEX is limited to 1000 rows and columns
+        if not fallback:
+            raise
+        solver = "highs"
+        x, status, gap = problem.solve_highs(time_limit, mip_gap, start)
+    runtime = time.perf_counter() - began
+
+    if x is None and start is not None:
+        # nothing better than the warm start was found within the limit
+        x, status = start, "time_limit" if status != "infeasible" else "optimal"
+    if x is None:
+        return OptimizeResult(
+            x=None,
+            fun=np.nan,
+            status=status,
+            solver=solver,
+            mip_gap=gap,
+            runtime=runtime,
+            success=False,
+        )
+    frequencies = np.sort(x[:num_qubits])
+    return OptimizeResult(
+        x=frequencies,
+        fun=gate_separation(frequencies),
+        status=status,
+        solver=solver,
+        mip_gap=gap,
+        runtime=runtime,
+        success=True,
+    )
@@ -1,58 +1,235 @@
+"""Qubits coupled through SNAILs: a single module or a whole chip.
+
+Nodes are integers: qubits ``0..num_qubits - 1`` followed by the SNAILs
+``num_qubits..num_qubits + num_snails - 1``. Every SNAIL drives the gates
+between the qubits coupled to it, its module. The default constructor
+builds one all-to-all module around a single SNAIL; from_topology takes
+the ``(snails, qubits, edges)`` layouts of corral_crowding.topologies.
+Labels such as ``"Q3"`` and ``"SNAIL"`` only name the networkx graph, which
+is built on first use for plotting.
+"""
+
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
+
+# order of the interaction types in interaction_frequencies
+INTERACTION_TYPES = (
+    "qubit-qubit",
+    "snail-qubit",
+    "qubit-resonance",
+    "snail-resonance",
+    "qubit-sub",
+    "snail-sub",
+)
+# one row per interaction; ``v`` is -1 for the single-mode types and
+# ``coupler`` the SNAIL node of the gates and couplings, -1 otherwise
+INTERACTION_DTYPE = np.dtype(
+    [
+        ("type", np.int8),
+        ("u", np.int32),
+        ("v", np.int32),
+        ("coupler", np.int32),
+        ("frequency", float),
+    ]
+)
 
 
 class QuantumModuleGraph:
     def __init__(self, num_qubits):
-        self.G = nx.Graph()
-        self.num_qubits = num_qubits  # Default for topology setup
-        self._add_edges()
-
-    def _add_edges(self):
-        for i in range(self.num_qubits):
-            for j in range(i + 1, self.num_qubits):
-                self.G.add_edge(
-                    f"Q{i}", f"Q{j}", interaction="qubit-qubit", color="blue"
-                )
-            self.G.add_edge(f"Q{i}", "SNAIL", interaction="snail-qubit", color="orange")
+        self._build(
+            [list(range(num_qubits))],
+            [f"Q{i}" for i in range(num_qubits)],
+            ["SNAIL"],
+        )
 
-    def get_interaction_frequencies(self, qubit_frequencies, snail_frequency):
-        interaction_freqs = {
-            "qubit-qubit": {},
-            "snail-qubit": {},
-            "qubit-resonance": {},
-            "snail-resonance": {},
-            "qubit-sub": {},
-            "snail-sub": {},
+    @classmethod
+    def from_topology(cls, snails, qubits, edges):
+        """Builds the graph of a snail/qubit topology.
+
+        Args:
+            snails: SNAIL node ids, e.g. ``topologies.corral[0]``.
+            qubits: Qubit node ids.
+            edges: (qubit, snail) coupling pairs, in either order.
+
+        Qubits and SNAILs are numbered in the order of ``qubits`` and
+        ``snails``, and each module lists its qubits in that order.
+        """
+        qubit_index = {qubit: i for i, qubit in enumerate(qubits)}
+        snail_index = {snail: s for s, snail in enumerate(snails)}
+        members = [set() for _ in snails]
+        for u, v in edges:
+            if u in snail_index and v in qubit_index:
+                members[snail_index[u]].add(qubit_index[v])
+            elif v in snail_index and u in qubit_index:
+                members[snail_index[v]].add(qubit_index[u])
+            # like build_graphs, edges not joining a qubit and a SNAIL
+            # (e.g. the (8, *) edges of topologies.best) form no module
+        graph = cls.__new__(cls)
+        graph._build(
+            [sorted(m) for m in members],
+            [f"Q{qubit}" for qubit in qubits],
+            [f"SNAIL{snail}" for snail in snails],
+        )
+        return graph
+
+    def _build(self, module_qubits, qubit_labels, snail_labels):
+        self.num_qubits = len(qubit_labels)  # Default for topology setup
+        self.num_snails = len(snail_labels)
+        self.qubit_labels = qubit_labels
+        self.snail_labels = snail_labels
+        self.snail_nodes = self.num_qubits + np.arange(self.num_snails)
+        self.module_qubits = [np.array(m, dtype=int) for m in module_qubits]
+        # which SNAILs each qubit couples to, and which SNAILs share a qubit
+        self.qubit_snails = [[] for _ in range(self.num_qubits)]
+        for snail, members in enumerate(module_qubits):
+            for qubit in members:
+                self.qubit_snails[qubit].append(snail)
+        neighbours = [set() for _ in range(self.num_snails)]
+        for snails in self.qubit_snails:
+            for snail in snails:
+                neighbours[snail].update(s for s in snails if s != snail)
+        self.neighbours = [sorted(n) for n in neighbours]
+
+        # driven gates module by module, and the snail-qubit couplings
+        gates = [
+            (snail, members[i], members[j])
+            for snail, members in enumerate(module_qubits)
+            for i in range(len(members))
+            for j in range(i + 1, len(members))
+        ]
+        self.gate_snails = np.array([g[0] for g in gates], dtype=int)
+        self.qubit_pairs = np.array([g[1:] for g in gates], dtype=int).reshape(-1, 2)
+        self.coupling_snails = np.concatenate(
+            [np.full(len(m), s, dtype=int) for s, m in enumerate(module_qubits)]
+            or [np.empty(0, dtype=int)]
+        )
+        self.snail_qubits = np.concatenate(
+            [np.asarray(m, dtype=int) for m in module_qubits]
+            or [np.empty(0, dtype=int)]
+        )
+        self._G = None
+        self._build_interactions()
+
+    def _build_interactions(self):
+        n = self.num_qubits
+        qubits, snails = np.arange(n), self.snail_nodes
+        none = np.full(n, -1)
+        gate_couplers = self.snail_nodes[self.gate_snails]
+        couplers = self.snail_nodes[self.coupling_snails]
+        # |scale_u * f[u] + scale_v * f[v]| over the node frequencies f
+        blocks = [
+            (self.qubit_pairs[:, 0], self.qubit_pairs[:, 1], gate_couplers, 1.0, -1.0),
+            (self.snail_qubits, couplers, couplers, 1.0, -1.0),
+            (qubits, none, none, 1.0, 0.0),
+            (snails, -np.ones_like(snails), -np.ones_like(snails), 1.0, 0.0),
+            (qubits, none, none, 0.5, 0.0),
+            (snails, -np.ones_like(snails), -np.ones_like(snails), 0.5, 0.0),
+        ]
+        self.interaction_types = np.concatenate(
+            [np.full(len(u), k, dtype=np.int8) for k, (u, *_) in enumerate(blocks)]
+        )
+        self.interaction_u = np.concatenate([b[0] for b in blocks])
+        self.interaction_v = np.concatenate([b[1] for b in blocks])
+        self.interaction_coupler = np.concatenate([b[2] for b in blocks])
+        self._scale_u = np.concatenate([np.full(len(b[0]), b[3]) for b in blocks])
+        self._scale_v = np.concatenate([np.full(len(b[0]), b[4]) for b in blocks])
+        # single-mode rows read their own node with a zero weight
+        self._index_v = np.where(
+            self.interaction_v < 0, self.interaction_u, self.interaction_v
+        )
+        self.type_masks = {
+            name: self.interaction_types == k
+            for k, name in enumerate(INTERACTION_TYPES)
         }
-        for i, freq in enumerate(qubit_frequencies):
-            interaction_freqs["qubit-resonance"][f"Q{i}"] = freq
-            interaction_freqs["qubit-sub"][f"Q{i}"] = freq / 2
-        interaction_freqs["snail-resonance"]["SNAIL"] = snail_frequency
-        interaction_freqs["snail-sub"]["SNAIL"] = snail_frequency / 2
-        for u, v in self.G.edges:
-            if u.startswith("Q") and v.startswith("Q"):
-                interaction_freqs["qubit-qubit"][(u, v)] = abs(
-                    qubit_frequencies[int(u[1:])] - qubit_frequencies[int(v[1:])]
+
+    def node_name(self, node):
+        """Label of a node: ``"Q<i>"`` for qubits, ``"SNAIL..."`` for SNAILs."""
+        if node < self.num_qubits:
+            return self.qubit_labels[node]
+        return self.snail_labels[node - self.num_qubits]
+
+    @property
+    def G(self):
+        """NetworkX graph of the module, built on first access."""
+        if self._G is None:
+            self._G = nx.Graph()
+            for node in range(self.num_qubits + self.num_snails):
+                self._G.add_node(self.node_name(node), index=node)
+            for i, j in self.qubit_pairs:
+                self._G.add_edge(
+                    self.node_name(i),
+                    self.node_name(j),
+                    interaction="qubit-qubit",
+                    color="blue",
                 )
-            elif v == "SNAIL":
-                interaction_freqs["snail-qubit"][(u, v)] = abs(
-                    qubit_frequencies[int(u[1:])] - snail_frequency
+            for i, snail in zip(self.snail_qubits, self.coupling_snails):
+                self._G.add_edge(
+                    self.node_name(i),
+                    self.snail_labels[snail],
+                    interaction="snail-qubit",
+                    color="orange",
                 )
+        return self._G
+
+    def _node_frequencies(self, qubit_frequencies, snail_frequency):
+        snail_frequency = np.asarray(snail_frequency, dtype=float)
+        return np.concatenate(
+            [
+                np.asarray(qubit_frequencies, dtype=float),
+                np.broadcast_to(snail_frequency, self.num_snails),
+            ]
+        )
+
+    def interaction_frequencies(self, qubit_frequencies, snail_frequency):
+        """All interaction frequencies as an INTERACTION_DTYPE array.
+
+        Args:
+            qubit_frequencies: Frequencies of the qubits in GHz.
+            snail_frequency: Frequency of the SNAIL, or one per SNAIL.
+
+        Rows are grouped by type in INTERACTION_TYPES order, gates in the
+        order of ``qubit_pairs``; ``type_masks`` selects one type.
+        """
+        frequencies = self._node_frequencies(qubit_frequencies, snail_frequency)
+        data = np.empty(len(self.interaction_types), dtype=INTERACTION_DTYPE)
+        data["type"] = self.interaction_types
+        data["u"] = self.interaction_u
+        data["v"] = self.interaction_v
+        data["coupler"] = self.interaction_coupler
+        data["frequency"] = np.abs(
+            self._scale_u * frequencies[self.interaction_u]
+            + self._scale_v * frequencies[self._index_v]
+        )
+        return data
+
+    def get_interaction_frequencies(self, qubit_frequencies, snail_frequency):
+        """Interaction frequencies as nested dicts keyed by node-name edges.
+
+        With several SNAILs a qubit pair can be driven by more than one of
+        them, so gate keys also name the SNAIL: ``(u, v, snail)``.
+        """
+        data = self.interaction_frequencies(qubit_frequencies, snail_frequency)
+        interaction_freqs = {name: {} for name in INTERACTION_TYPES}
+        for kind, u, v, coupler, frequency in data.tolist():
+            key = self.node_name(u)
+            if v >= 0:
+                key = (key, self.node_name(v))
+                if kind == 0 and self.num_snails > 1:
+                    key += (self.node_name(coupler),)
+            interaction_freqs[INTERACTION_TYPES[kind]][key] = frequency
         return interaction_freqs
 
     def plot_graph(self, qubit_frequencies, snail_frequency):
         pos = nx.spring_layout(self.G, seed=42)
+        frequencies = self._node_frequencies(qubit_frequencies, snail_frequency)
         labels = {
-            node: (
-                f"{node}\n{qubit_frequencies[int(node[1:])]:.2f} GHz"
-                if node.startswith("Q")
-                else f"SNAIL\n{snail_frequency:.2f} GHz"
-            )
-            for node in self.G.nodes
+            node: f"{node}\n{frequencies[index]:.2f} GHz"
+            for node, index in self.G.nodes(data="index")
         }
         node_colors = [
-            "green" if node.startswith("Q") else "red" for node in self.G.nodes
+            "green" if index < self.num_qubits else "red"
+            for _, index in self.G.nodes(data="index")
         ]
         plt.figure(figsize=(2, 2))
         nx.draw(
@@ -72,8 +249,8 @@ class QuantumModuleGraph:
         plt.show()
 
     def plot_interaction_frequencies(self, qubit_frequencies, snail_frequency):
-        all_freqs = list(qubit_frequencies) + [snail_frequency]
-        interaction_freqs = self.get_interaction_frequencies(
+        all_freqs = list(qubit_frequencies) + list(np.atleast_1d(snail_frequency))
+        interaction_freqs = self.interaction_frequencies(
             qubit_frequencies, snail_frequency
         )
         with plt.style.context(["ieee", "use_mathtext", "science"]):
@@ -98,8 +275,11 @@ class QuantumModuleGraph:
                 "snail-sub": "SNAIL Subharmonic",
                 "snail-resonance": "SNAIL Mode",
             }
-            for interaction_type, freqs in interaction_freqs.items():
-                if not freqs:
+            for kind, interaction_type in enumerate(INTERACTION_TYPES):
+                freqs = interaction_freqs["frequency"][
+                    interaction_freqs["type"] == kind
+                ]
+                if not len(freqs):
                     continue
                 color = color_map.get(interaction_type, "black")
                 if interaction_type in {"snail-resonance", "qubit-resonance"}:
@@ -111,7 +291,7 @@ class QuantumModuleGraph:
                     if interaction_type not in added_labels
                     else ""
                 )
-                for freq in freqs.values():
+                for freq in freqs:
                     ax.axvline(
                         freq,
                         color=color,
@@ -0,0 +1,82 @@
+"""Append-only CSV results table that survives interrupted runs."""
+
+import csv
+import os
+
+import numpy as np
+
+
+class ResultsTable:
+    """Streams result rows to a CSV file, one flushed line per finished point.
+
+    Rows are keyed by a ``key_column`` so an interrupted run can be resumed:
+    ``completed_keys`` lists the points already on disk. A partially written
+    last line left by a crash is dropped when the table is reopened.
+
+    Args:
+        path: CSV file to create or extend.
+        columns: Column names, the first being the key column unless
+            ``key_column`` is given.
+        key_column: Column identifying a point.
+    """
+
+    def __init__(self, path, columns, key_column=None):
+        self.path = path
+        self.columns = list(columns)
+        self.key_column = key_column or self.columns[0]
+        if os.path.exists(path):
+            self._drop_partial_line()
+            with open(path, newline="") as f:
+                header = next(csv.reader(f), None)
+            if header is not None and header != self.columns:
+                raise ValueError(
+                    f"{path} has columns {header}, expected {self.columns}"
+                )
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerow(self.columns)
+
+    def _drop_partial_line(self):
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def rows(self):
+        """Yields every complete row as a dict of strings."""
+        with open(self.path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) == len(self.columns):
+                    yield dict(zip(self.columns, row))
+
+    def completed_keys(self):
+        """Returns the set of keys already written."""
+        return {row[self.key_column] for row in self.rows()}
+
+    def append(self, row):
+        """Writes one row (a dict keyed by column) and flushes it to disk."""
+        with open(self.path, "a", newline="") as f:
+            csv.writer(f).writerow([row[column] for column in self.columns])
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self):
+        """Returns the table as a dict of column name to NumPy array.
+
+        Columns that parse as numbers become float arrays, the rest stay
+        string arrays.
+        """
+        rows = list(self.rows())
+        table = {}
+        for column in self.columns:
+            values = [row[column] for row in rows]
+            try:
+                table[column] = np.array(values, dtype=float)
+            except ValueError:
+                table[column] = np.array(values, dtype=str)
+        return table
@@ -1,6 +1,8 @@
 import numpy as np
 from scipy.optimize import curve_fit
 
+from corral_crowding.adaptive_sampling import adaptive_fit
+
 
 def lifetime_decay_fit(detuning, x0, x1):
     """Modified ansatz for fitting infidelity curves."""
@@ -71,12 +73,7 @@ def _compute_gate_duration(frequency_GHz, f_SNAIL, X_factor, g3, lambda_factor):
     return t_f
 
 
-def speedlimit_infidelity_params(f_SNAIL, t_f_calib, T1, g3, lambdaq):  # noqa: D103
-    f0 = f_SNAIL / 2  # (e.g. ~2.138 GHz)
-    # f0 to f0+1 GHz => 0 to 2000 MHz detuning
-    pump_freq_range = np.linspace(f0, f0 - 2, 100)
-    detuning_mhz_list = np.abs((pump_freq_range - f0) * 1e3)
-
+def _calibrate_x_factor(f_SNAIL, t_f_calib, g3, lambdaq):
     test_ghz = f_SNAIL / 2 - 1.0  # Calibration pump frequency in GHz
 
     w_pump_calib = 2 * np.pi * test_ghz * 1e9
@@ -86,7 +83,10 @@ def speedlimit_infidelity_params(f_SNAIL, t_f_calib, T1, g3, lambdaq):  # noqa:
     epsilon_calib, X_factor = _fit_epsilon(
         dBm_calib, t_f_calib, g3, lambdaq, w_pump_calib, w_snail_calib
     )
+    return X_factor
+
 
+def _lifetime_infidelity(pump_freq_range, f_SNAIL, X_factor, T1, g3, lambdaq):
     # Compute the gate durations for each pump frequency using the calibrated X_factor.
     detuned_durations = np.array(
         [
@@ -96,9 +96,48 @@ def speedlimit_infidelity_params(f_SNAIL, t_f_calib, T1, g3, lambdaq):  # noqa:
     )
 
     # Estimate the infidelity for each frequency using: infidelity = exp(-t_f/T1)
-    fidelity_results = 1 - np.exp(-detuned_durations / T1)
+    return 1 - np.exp(-detuned_durations / T1)
+
+
+def speedlimit_infidelity_params(f_SNAIL, t_f_calib, T1, g3, lambdaq):  # noqa: D103
+    f0 = f_SNAIL / 2  # (e.g. ~2.138 GHz)
+    # f0 to f0+1 GHz => 0 to 2000 MHz detuning
+    pump_freq_range = np.linspace(f0, f0 - 2, 100)
+    detuning_mhz_list = np.abs((pump_freq_range - f0) * 1e3)
+
+    X_factor = _calibrate_x_factor(f_SNAIL, t_f_calib, g3, lambdaq)
+    fidelity_results = _lifetime_infidelity(
+        pump_freq_range, f_SNAIL, X_factor, T1, g3, lambdaq
+    )
 
     infidelity_params = fit_infidelity(detuning_mhz_list, fidelity_results)
     # fit_line = lifetime_decay_fit(detuning_mhz_list, *infidelity_params)
 
     return infidelity_params, fidelity_results
+
+
+def speedlimit_infidelity_params_adaptive(
+    f_SNAIL, t_f_calib, T1, g3, lambdaq, rtol=1e-2, max_points=64
+):
+    """Adaptive-grid counterpart of speedlimit_infidelity_params.
+
+    Samples the 0 to 2000 MHz pump detuning range with adaptive_fit instead
+    of a fixed 100-point grid.
+
+    Returns:
+        Tuple ``(infidelity_params, diagnostics)``.
+    """
+    f0 = f_SNAIL / 2
+    X_factor = _calibrate_x_factor(f_SNAIL, t_f_calib, g3, lambdaq)
+    return adaptive_fit(
+        lambda detuning_mhz: _lifetime_infidelity(
+            f0 - detuning_mhz / 1e3, f_SNAIL, X_factor, T1, g3, lambdaq
+        ),
+        lifetime_decay_fit,
+        0,
+        2000,
+        p0=[1, 1],
+        rtol=rtol,
+        max_points=max_points,
+        spacing="linear",
+    )
@@ -0,0 +1,221 @@
+"""Parallel sweeps of the frequency allocation over physical parameters."""
+
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from tqdm import tqdm
+
+from corral_crowding.allocation_optimizer import (
+    GateFidelityOptimizer,
+    fit_crosstalk_params,
+    fit_speedlimit_params,
+)
+from corral_crowding.results_table import ResultsTable
+
+SWEEP_PARAMETERS = ("lambdaq", "eta", "g3", "T_1")
+# fits only depend on a subset of the swept axes, so they are shared
+CROSSTALK_AXES = ("lambdaq", "eta", "g3")
+SPEEDLIMIT_AXES = ("lambdaq", "g3", "T_1")
+
+
+def point_id(point):
+    """Stable string key of a sweep point, used to resume runs."""
+    return ";".join(f"{name}={float(point[name])!r}" for name in SWEEP_PARAMETERS)
+
+
+def expand_grid(grid, T_1=120e-6):
+    """Cartesian product of ``grid`` as a list of parameter dicts.
+
+    Args:
+        grid: Dict mapping ``lambdaq``, ``eta``, ``g3`` and optionally ``T_1``
+            to sequences of values.
+        T_1: Lifetime used when ``grid`` does not sweep ``T_1``.
+    """
+    unknown = set(grid) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    axes = {name: list(grid.get(name, [])) for name in SWEEP_PARAMETERS}
+    if not axes["T_1"]:
+        axes["T_1"] = [T_1]
+    missing = [name for name in CROSSTALK_AXES if not axes[name]]
+    if missing:
+        raise ValueError(f"Sweep grid is missing {missing}")
+    return [
+        dict(zip(SWEEP_PARAMETERS, values))
+        for values in itertools.product(*(axes[name] for name in SWEEP_PARAMETERS))
+    ]
+
+
+def _fit_crosstalk(key, use_cache, adaptive_grid):
+    return (
+        key,
+        fit_crosstalk_params(*key, use_cache=use_cache, adaptive_grid=adaptive_grid)[0],
+    )
+
+
+def _fit_speedlimit(key, snail_bounds, use_cache, adaptive_grid):
+    lambdaq, g3, T_1 = key
+    return (
+        key,
+        fit_speedlimit_params(
+            snail_bounds,
+            T_1,
+            g3,
+            lambdaq,
+            use_cache=use_cache,
+            adaptive_grid=adaptive_grid,
+        )[0],
+    )
+
+
+def _optimize_point(
+    module,
+    point,
+    infidelity_params,
+    speedlimit_params,
+    optimizer_kwargs,
+    attempts,
+    seed,
+):
+    start = time.perf_counter()
+    optimizer = GateFidelityOptimizer(
+        module,
+        **point,
+        infidelity_params=infidelity_params,
+        speedlimit_params=speedlimit_params,
+        **optimizer_kwargs,
+    )
+    frequencies, cost = optimizer.optimize_frequencies(
+        attempts, seed=seed, verbose=False
+    )
+    if frequencies is None:
+        # no restart reached a finite cost; keep the point as a NaN row
+        frequencies = np.full(module.num_qubits + module.num_snails, np.nan)
+        total_cost = np.nan
+    else:
+        total_cost = optimizer.compute_total_infidelity(frequencies)
+    row = {
+        "point_id": point_id(point),
+        **point,
+        "best_cost": cost,
+        "total_cost": total_cost,
+        "runtime_s": time.perf_counter() - start,
+    }
+    row.update({f"freq_{i}": f for i, f in enumerate(frequencies)})
+    return row
+
+
+def _map(executor, func, argument_lists):
+    """Yields results of ``func`` as they finish, in-process if no executor."""
+    if executor is None:
+        for arguments in argument_lists:
+            yield func(*arguments)
+        return
+    futures = [executor.submit(func, *arguments) for arguments in argument_lists]
+    for future in as_completed(futures):
+        yield future.result()
+
+
+def parameter_sweep(
+    module,
+    grid,
+    output_path,
+    workers=None,
+    attempts=32,
+    seed=0,
+    use_cache=True,
+    **optimizer_kwargs,
+):
+    """Optimizes the frequency allocation at every point of a parameter grid.
+
+    The QuTiP crosstalk fits are run once per distinct (lambdaq, eta, g3) and
+    the lifetime fits once per distinct (lambdaq, g3, T_1), then every grid
+    point is optimized with those shared fits. Each finished point is
+    appended to ``output_path`` immediately, and points already in the file
+    are skipped, so a crashed sweep resumes where it stopped. The ``freq_``
+    columns hold the qubit then SNAIL frequencies; points where no restart
+    reached a finite cost are written with NaN costs and frequencies.
+
+    Args:
+        module: QuantumModuleGraph to allocate.
+        grid: Dict of swept values, see expand_grid.
+        output_path: CSV results table.
+        workers: Process pool size; ``None`` runs everything in-process.
+        attempts: Restarts of optimize_frequencies per point.
+        seed: Root seed; every point gets its own child seed by grid index,
+            so resumed runs reproduce the same results.
+        use_cache: Use corral_crowding.fit_cache for the fits.
+        **optimizer_kwargs: Forwarded to GateFidelityOptimizer (e.g.
+            ``use_lifetime``, ``snail_bounds``, ``drop_k``). ``adaptive_grid``
+            selects the adaptive fits for the shared fits instead.
+
+    Returns:
+        The results table as a dict of column arrays (ResultsTable.load).
+    """
+    T_1 = optimizer_kwargs.pop("T_1", 120e-6)
+    adaptive_grid = optimizer_kwargs.pop("adaptive_grid", False)
+    snail_bounds = optimizer_kwargs.get("snail_bounds", (4.2, 4.7))
+    points = expand_grid(grid, T_1=T_1)
+    point_seeds = [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(seed).spawn(len(points))
+    ]
+
+    columns = ["point_id", *SWEEP_PARAMETERS, "best_cost", "total_cost", "runtime_s"]
+    columns += [f"freq_{i}" for i in range(module.num_qubits + module.num_snails)]
+    table = ResultsTable(output_path, columns)
+    done = table.completed_keys()
+    pending = [
+        (index, point)
+        for index, point in enumerate(points)
+        if point_id(point) not in done
+    ]
+    if not pending:
+        return table.load()
+
+    crosstalk_keys = sorted(
+        {tuple(point[name] for name in CROSSTALK_AXES) for _, point in pending}
+    )
+    speedlimit_keys = sorted(
+        {tuple(point[name] for name in SPEEDLIMIT_AXES) for _, point in pending}
+    )
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    try:
+        crosstalk_fits = dict(
+            _map(
+                executor,
+                _fit_crosstalk,
+                [(key, use_cache, adaptive_grid) for key in crosstalk_keys],
+            )
+        )
+        speedlimit_fits = dict(
+            _map(
+                executor,
+                _fit_speedlimit,
+                [
+                    (key, snail_bounds, use_cache, adaptive_grid)
+                    for key in speedlimit_keys
+                ],
+            )
+        )
+        tasks = [
+            (
+                module,
+                point,
+                crosstalk_fits[tuple(point[name] for name in CROSSTALK_AXES)],
+                speedlimit_fits[tuple(point[name] for name in SPEEDLIMIT_AXES)],
+                optimizer_kwargs,
+                attempts,
+                point_seeds[index],
+            )
+            for index, point in pending
+        ]
+        for row in tqdm(_map(executor, _optimize_point, tasks), total=len(tasks)):
+            table.append(row)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return table.load()
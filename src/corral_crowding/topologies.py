@@ -1,8 +1,14 @@
+from functools import lru_cache, wraps
+from itertools import repeat
+
 import networkx as nx
+import numpy as np
+import rustworkx as rx
 
 # !pip install mqt.bench
 from qiskit import transpile
 from qiskit.transpiler import CouplingMap
+from scipy.sparse import csr_array, triu
 
 # from rustworkx.visualization import graphviz_draw, mpl_draw
 
@@ -11,7 +17,7 @@ from qiskit.transpiler import CouplingMap
 
 def build_graphs(snails, qubits, edges):
     # Create the snail-qubit graph
-    snail_qubit_graph = nx.Graph()
+    snail_qubit_graph = rx.PyGraph()
     node_to_index = {
         node: idx for idx, node in enumerate(snails + qubits)
     }  # Map node values to graph indices
@@ -21,7 +27,7 @@ def build_graphs(snails, qubits, edges):
     )
 
     # Create the qubit connectivity graph
-    qubit_connectivity = nx.Graph()
+    qubit_connectivity = rx.PyGraph()
     qubit_to_index = {
         qubit: idx for idx, qubit in enumerate(qubits)
     }  # Map qubit values to graph indices
@@ -29,10 +35,11 @@ def build_graphs(snails, qubits, edges):
 
     # Map each snail to its connected qubits
     snail_to_qubits = {snail: [] for snail in snails}
+    qubit_set = set(qubits)
     for u, v in edges:
-        if u in snails and v in qubits:
+        if u in snail_to_qubits and v in qubit_set:
             snail_to_qubits[u].append(v)
-        elif v in snails and u in qubits:
+        elif v in snail_to_qubits and u in qubit_set:
             snail_to_qubits[v].append(u)
 
     # Add edges between qubits sharing the same snail
@@ -49,6 +56,74 @@ def build_graphs(snails, qubits, edges):
     return snail_qubit_graph, qubit_connectivity
 
 
+def build_coupling_graphs(snails, qubits, edges, coupling_map=False):
+    """build_graphs on NumPy arrays, with an optional CouplingMap output.
+
+    Node labels are looked up by binary search and the qubit pairs sharing
+    a SNAIL are the nonzeros above the diagonal of ``B.T @ B``, with ``B``
+    the sparse SNAIL-by-qubit incidence matrix. It builds at about the
+    speed of build_graphs (see benchmarks/build_graphs.py) but takes the
+    arrays of generated topologies without converting them to lists.
+
+    Args:
+        snails: Integer SNAIL labels, a list or array.
+        qubits: Integer qubit labels.
+        edges: ``(m, 2)`` array (or list) of node label pairs, in either
+            order; pairs not joining a SNAIL and a qubit only appear in the
+            snail-qubit graph, as in build_graphs.
+        coupling_map: Return the qubit connectivity as a symmetric Qiskit
+            ``CouplingMap`` on qubit indices instead of a ``PyGraph``.
+
+    Returns:
+        ``(snail_qubit_graph, qubit_connectivity)`` with the nodes and
+        payloads of build_graphs; the qubit pairs are in sorted order.
+    """
+    snails = np.asarray(snails, dtype=int)
+    qubits = np.asarray(qubits, dtype=int)
+    edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+    labels = np.concatenate([snails, qubits])
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    positions = np.searchsorted(sorted_labels, edges).clip(max=max(len(labels) - 1, 0))
+    if edges.size and (not labels.size or np.any(sorted_labels[positions] != edges)):
+        raise ValueError("edges reference nodes that are not snails or qubits")
+    index = order[positions]
+
+    snail_qubit_graph = rx.PyGraph()
+    snail_qubit_graph.add_nodes_from(labels.tolist())
+    snail_qubit_graph.add_edges_from(
+        list(zip(index[:, 0].tolist(), index[:, 1].tolist(), repeat(0)))
+    )
+
+    num_snails, num_qubits = len(snails), len(qubits)
+    is_snail = index < num_snails
+    coupled = is_snail[:, 0] != is_snail[:, 1]
+    snail = np.where(is_snail[:, 0], index[:, 0], index[:, 1])[coupled]
+    qubit = np.where(is_snail[:, 0], index[:, 1], index[:, 0])[coupled] - num_snails
+    incidence = csr_array(
+        (np.ones(len(snail)), (snail, qubit)), shape=(num_snails, num_qubits)
+    )
+    shared = triu(incidence.T @ incidence, k=1).tocoo()
+    pairs = np.stack([shared.row, shared.col], axis=1)
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    if coupling_map:
+        qubit_connectivity = CouplingMap(
+            np.concatenate([pairs, pairs[:, ::-1]]).tolist()
+        )
+        # trailing qubits without couplings
+        qubit_connectivity.graph.add_nodes_from(
+            range(qubit_connectivity.graph.num_nodes(), num_qubits)
+        )
+    else:
+        qubit_connectivity = rx.PyGraph()
+        qubit_connectivity.add_nodes_from(qubits.tolist())
+        qubit_connectivity.add_edges_from(
+            list(zip(pairs[:, 0].tolist(), pairs[:, 1].tolist(), repeat(True)))
+        )
+    return snail_qubit_graph, qubit_connectivity
+
+
 ########################################################################
 # 2-qubit module, ring topology with 16 qubits
 snails_ring = [i for i in range(1, 33, 2)]  # Odd indices for snails
@@ -409,3 +484,191 @@ best_edges = [
     (4, 18),
 ]
 best = [best_snails, best_qubits, best_edges]
+
+
+########################################################################
+# Parametric generators of the layouts above, at any size. At the default
+# sizes they return the literals (see src/tests/test_topologies.py).
+
+
+def _memoized(generator):
+    """Caches a generator of ``(snails, qubits, edges)`` tuples.
+
+    Every call returns fresh lists in the format of the literals above, so
+    callers may modify them without touching the cache.
+    """
+    cached = lru_cache(maxsize=None)(generator)
+
+    @wraps(generator)
+    def topology(*args, **kwargs):
+        snails, qubits, edges = cached(*args, **kwargs)
+        return [list(snails), list(qubits), list(edges)]
+
+    topology.cache_clear = cached.cache_clear
+    topology.cache_info = cached.cache_info
+    return topology
+
+
+@_memoized
+def ring_topology(num_qubits=16):
+    """Ring of 2-qubit modules, qubits on even and SNAILs on odd nodes."""
+    if num_qubits < 3:
+        raise ValueError("a ring needs at least 3 qubits")
+    snails = tuple(range(1, 2 * num_qubits, 2))
+    qubits = tuple(range(0, 2 * num_qubits, 2))
+    edges = [(qubits[i], snails[i]) for i in range(num_qubits)] + [
+        (snails[i], qubits[(i + 1) % num_qubits]) for i in range(num_qubits)
+    ]
+    return snails, qubits, tuple(edges)
+
+
+@_memoized
+def square_topology(rows=4, cols=4):
+    """Square lattice of 2-qubit modules, ``rows`` by ``cols`` qubits.
+
+    Each row alternates qubits and SNAILs, followed by a row of SNAILs
+    coupling every qubit to the one below it.
+    """
+    width, block = 2 * cols - 1, 3 * cols - 1
+    qubits = tuple(r * block + 2 * j for r in range(rows) for j in range(cols))
+    snails = tuple(sorted(set(range(rows * block - cols)) - set(qubits)))
+    edges = []
+    for r in range(rows):
+        start = r * block
+        edges += [(start + j, start + j + 1) for j in range(width - 1)]
+        if r < rows - 1:
+            below = start + width
+            edges += [(start + 2 * j, below + j) for j in range(cols)]
+            edges += [(below + j, start + block + 2 * j) for j in range(cols)]
+    return snails, qubits, tuple(edges)
+
+
+@_memoized
+def tworing_topology(num_qubits=16):
+    """Two rings of ``num_qubits`` nodes each, joined node by node.
+
+    Qubits and SNAILs alternate around each ring, shifted by one between
+    the rings so that every rung joins a qubit to a SNAIL.
+    """
+    if num_qubits < 4 or num_qubits % 2:
+        raise ValueError("a double ring needs an even number of at least 4 qubits")
+    n = num_qubits
+    snails = tuple(range(0, n, 2)) + tuple(range(n + 1, 2 * n, 2))
+    qubits = tuple(range(1, n, 2)) + tuple(range(n, 2 * n, 2))
+    edges = (
+        [(i, (i + 1) % n) for i in range(n)]
+        + [(n + i, n + (i + 1) % n) for i in range(n)]
+        + [(i, n + i) for i in range(n)]
+    )
+    return snails, qubits, tuple(edges)
+
+
+@_memoized
+def hex_topology(rows=4, cols=4):
+    """Heavy-hex style lattice of ``rows`` rows of ``cols`` qubits.
+
+    Between two qubit rows lies a row of SNAILs; each couples the qubit
+    above it, its diagonal neighbour (alternating right and left from row
+    to row) and the qubit below it.
+    """
+    block = 2 * cols
+    qubits = tuple(r * block + j for r in range(rows) for j in range(cols))
+    snails = tuple(r * block + cols + j for r in range(rows - 1) for j in range(cols))
+    edges = []
+    for r in range(rows - 1):
+        qubit_row, snail_row = r * block, r * block + cols
+        for j in range(cols):
+            if r % 2:
+                if j > 0:
+                    edges.append((qubit_row + j, snail_row + j - 1))
+                edges.append((qubit_row + j, snail_row + j))
+            else:
+                edges.append((qubit_row + j, snail_row + j))
+                if j + 1 < cols:
+                    edges.append((qubit_row + j, snail_row + j + 1))
+        edges += [(snail_row + j, qubit_row + block + j) for j in range(cols)]
+    return snails, qubits, tuple(edges)
+
+
+@_memoized
+def corral_topology(num_snails=8):
+    """Corral of ``num_snails`` 4-qubit modules on two rings of qubits.
+
+    SNAIL ``k`` couples qubits ``k`` and ``k + 1`` of both the inner and the
+    outer ring, so ``2 * num_snails`` qubits in total.
+    """
+    if num_snails < 3:
+        raise ValueError("a corral needs at least 3 SNAILs")
+    n = num_snails
+    inner, outer, closing = 0, 2 * n - 1, 3 * n - 1
+    qubits = tuple(range(inner, inner + n)) + tuple(range(outer, outer + n))
+    snails = tuple(range(n, 2 * n - 1)) + (closing,)
+    edges = [(inner + k + i, n + k) for k in range(n - 1) for i in (0, 1)]
+    edges += [(n + k, outer + k + i) for k in range(n - 1) for i in (0, 1)]
+    edges += [
+        (closing, inner + n - 1),
+        (closing, outer + n - 1),
+        (closing, inner),
+        (closing, outer),
+    ]
+    return snails, qubits, tuple(edges)
+
+
+@_memoized
+def denselattice_topology(rows=5, cols=7):
+    """Checkerboard of qubits and 4-qubit SNAILs, ``rows`` by ``cols`` sites.
+
+    Site ``(r, j)`` holds a qubit if ``r + j`` is even. The numbering keeps
+    one unused site at the end of every odd row, and the top-right and
+    bottom-left corner sites are left out, as in the 16-qubit layout.
+    """
+    offsets = [r * cols + r // 2 for r in range(rows)]
+    omitted = {(0, cols - 1), (rows - 1, 0)}
+    sites = {
+        (r, j): offsets[r] + j
+        for r in range(rows)
+        for j in range(cols)
+        if (r, j) not in omitted
+    }
+    qubits = tuple(sorted(v for (r, j), v in sites.items() if (r + j) % 2 == 0))
+    snails = tuple(sorted(v for (r, j), v in sites.items() if (r + j) % 2))
+    edges = [
+        (sites[r, j], sites[r, j + 1])
+        for r in range(rows)
+        for j in range(cols - 1)
+        if (r, j) in sites and (r, j + 1) in sites
+    ]
+    edges += [
+        (sites[r, j], sites[r + 1, j])
+        for r in range(rows - 1)
+        for j in range(cols)
+        if (r, j) in sites and (r + 1, j) in sites
+    ]
+    return snails, qubits, tuple(edges)
+
+
+@_memoized
+def best_topology(groups=4, group_size=3):
+    """``groups`` groups of ``group_size`` qubits, each with a hub qubit.
+
+    A group SNAIL couples each group and its hub, one SNAIL couples all
+    hubs, and one SNAIL per column couples the ``j``-th qubit of every
+    group. The literal ``best`` lists its group SNAIL 8 as a qubit and an
+    unused SNAIL 0; here SNAILs are ``1..group_size + groups + 1``.
+    """
+    m, c = groups, group_size
+    hub_snail, first_qubit = 1, c + m + 2
+    hubs = [first_qubit + m * c + g for g in range(m)]
+
+    def member(g, j):
+        return first_qubit + c * g + j
+
+    edges = [(hub_snail, hub) for hub in hubs]
+    for g in reversed(range(m)):
+        edges += [(c + m + 1 - g, member(g, j)) for j in range(c)]
+        edges.append((c + m + 1 - g, hubs[g]))
+    for j in reversed(range(c)):
+        edges += [(c + 1 - j, member(g, j)) for g in range(m)]
+    snails = tuple(range(1, first_qubit))
+    qubits = tuple(range(first_qubit, first_qubit + m * c + m))
+    return snails, qubits, tuple(edges)
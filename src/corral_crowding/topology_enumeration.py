@@ -0,0 +1,471 @@
+"""Exhaustive enumeration of non-isomorphic snail/qubit topologies.
+
+A topology is a set of SNAILs, each coupling a set of qubits. Topologies are
+grown one SNAIL at a time by canonical augmentation: a child is kept only if
+its new SNAIL is, up to automorphism, the last SNAIL of its canonical
+labelling, so every isomorphism class is generated from exactly one parent
+and no two isomorphic topologies are ever produced. Canonical labellings
+come from an individualization-refinement search with automorphism pruning.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations, islice
+
+from tqdm import tqdm
+
+from corral_crowding.results_table import ResultsTable
+from corral_crowding.topologies import build_coupling_graphs
+
+TOPOLOGY_COLUMNS = (
+    "topology",
+    "num_qubits",
+    "num_snails",
+    "couplings",
+    "max_degree",
+    "average_distance",
+    "diameter",
+)
+
+
+def _adjacency(num_qubits, snails):
+    """Neighbour sets of qubits ``0..num_qubits - 1`` and the SNAILs after."""
+    adjacency = [set() for _ in range(num_qubits + len(snails))]
+    for k, members in enumerate(snails):
+        for qubit in members:
+            adjacency[qubit].add(num_qubits + k)
+            adjacency[num_qubits + k].add(qubit)
+    return adjacency
+
+
+def _refine(cells, adjacency, splitters):
+    """Coarsest equitable refinement of the ordered partition ``cells``.
+
+    Cells are split by the number of neighbours in each splitter, pieces in
+    increasing order, so the result only depends on the graph and the
+    order of the cells, never on the vertex labels.
+    """
+    queue = deque(splitters)
+    while queue and len(cells) < len(adjacency):
+        splitter = set(queue.popleft())
+        refined = []
+        for cell in cells:
+            if len(cell) == 1:
+                refined.append(cell)
+                continue
+            groups = {}
+            for v in cell:
+                groups.setdefault(len(adjacency[v] & splitter), []).append(v)
+            if len(groups) == 1:
+                refined.append(cell)
+                continue
+            pieces = [tuple(groups[count]) for count in sorted(groups)]
+            refined.extend(pieces)
+            queue.extend(pieces)
+        cells = refined
+    return cells
+
+
+def _orbit_roots(automorphisms, vertices):
+    """Union-find roots of the orbits generated by ``automorphisms``."""
+    parent = list(range(len(vertices)))
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for automorphism in automorphisms:
+        for v, w in enumerate(automorphism):
+            parent[find(v)] = find(w)
+    return find
+
+
+def _root_partition(num_qubits, snails, cells=None):
+    """Adjacency and equitable partition of the snail/qubit graph."""
+    adjacency = _adjacency(num_qubits, snails)
+    if cells is None:
+        cells = [tuple(range(num_qubits)), tuple(range(num_qubits, len(adjacency)))]
+    cells = [tuple(cell) for cell in cells if cell]
+    return adjacency, _refine(cells, adjacency, cells)
+
+
+def canonical_labelling(num_qubits, snails, cells=None):
+    """Canonical form of the snail/qubit graph of ``snails``.
+
+    Args:
+        num_qubits: Number of qubits, labelled ``0..num_qubits - 1``.
+        snails: Qubit tuples, one per SNAIL; SNAIL ``k`` is vertex
+            ``num_qubits + k``.
+        cells: Ordered initial partition of the vertices, by default the
+            qubits then the SNAILs.
+
+    Returns:
+        Tuple ``(certificate, order, root_cells)``. Two graphs are
+        isomorphic (respecting ``cells``) iff their certificates are equal;
+        ``order[i]`` is the vertex with canonical label ``i`` and
+        ``root_cells`` the equitable partition before any
+        individualization, whose cells contain every automorphism orbit.
+    """
+    adjacency, root_cells = _root_partition(num_qubits, snails, cells)
+    n = len(adjacency)
+    vertices = range(n)
+    best = [None, None]
+    # twins (same neighbours, e.g. uncoupled qubits) can be swapped freely
+    automorphisms = []
+    for cell in root_cells:
+        twins = {}
+        for v in cell:
+            twins.setdefault(frozenset(adjacency[v]), []).append(v)
+        for group in twins.values():
+            for v, w in zip(group, group[1:]):
+                automorphism = list(vertices)
+                automorphism[v], automorphism[w] = w, v
+                automorphisms.append(automorphism)
+
+    def search(cells, path):
+        # a partition whose cells are all singletons or twins is as good as
+        # discrete: every order within the twin cells gives the same leaf
+        if all(
+            len(cell) == 1 or all(adjacency[w] == adjacency[cell[0]] for w in cell)
+            for cell in cells
+        ):
+            order = [v for cell in cells for v in cell]
+            position = [0] * n
+            for label, v in enumerate(order):
+                position[v] = label
+            certificate = tuple(
+                sorted(
+                    (position[s], position[q])
+                    for s in range(num_qubits, n)
+                    for q in adjacency[s]
+                )
+            )
+            if best[0] is None or certificate > best[0]:
+                best[:] = certificate, order
+            elif certificate == best[0]:
+                automorphism = [0] * n
+                for v, w in zip(order, best[1]):
+                    automorphism[v] = w
+                automorphisms.append(automorphism)
+            return
+        index = min(
+            (i for i, cell in enumerate(cells) if len(cell) > 1),
+            key=lambda i: len(cells[i]),
+        )
+        target = cells[index]
+        explored = []
+        known = None
+        for v in target:
+            # skip v if an automorphism fixing the path maps it to a
+            # vertex whose subtree was already searched
+            if known != len(automorphisms):
+                known = len(automorphisms)
+                stabilizer = [
+                    automorphism
+                    for automorphism in automorphisms
+                    if all(automorphism[p] == p for p in path)
+                ]
+                find = _orbit_roots(stabilizer, vertices)
+            if any(find(v) == find(w) for w in explored):
+                continue
+            explored.append(v)
+            rest = tuple(w for w in target if w != v)
+            individualized = cells[:index] + [(v,), rest] + cells[index + 1 :]
+            search(_refine(individualized, adjacency, [(v,)]), path + [v])
+
+    search(root_cells, [])
+    return best[0], best[1], root_cells
+
+
+def _same_orbit(num_qubits, snails, u, v, root_cells):
+    """Whether an automorphism of the graph maps vertex ``u`` to ``v``."""
+    if u == v:
+        return True
+    if not any(u in cell and v in cell for cell in root_cells):
+        return False
+
+    def marked(x):
+        cells = [tuple(w for w in cell if w != x) for cell in root_cells]
+        return canonical_labelling(num_qubits, snails, cells + [(x,)])[0]
+
+    return marked(u) == marked(v)
+
+
+def _components(num_qubits, snails):
+    """Connected component label of every qubit."""
+    label = list(range(num_qubits))
+
+    def find(q):
+        while label[q] != q:
+            label[q] = label[label[q]]
+            q = label[q]
+        return q
+
+    for members in snails:
+        for qubit in members[1:]:
+            label[find(qubit)] = find(members[0])
+    return [find(q) for q in range(num_qubits)]
+
+
+def _children(
+    num_qubits,
+    snails,
+    num_snails,
+    max_degree_qubit,
+    max_degree_snail,
+    min_degree_snail,
+    connected,
+):
+    """Canonical augmentations of ``snails`` by one more SNAIL."""
+    degree = [0] * num_qubits
+    for members in snails:
+        for qubit in members:
+            degree[qubit] += 1
+    free = [q for q in range(num_qubits) if degree[q] < max_degree_qubit]
+    component = _components(num_qubits, snails)
+    num_components = len(set(component))
+    remaining = num_snails - len(snails) - 1
+    existing = set(snails)
+    new = num_qubits + len(snails)
+    seen = set()
+    for size in range(min_degree_snail, max_degree_snail + 1):
+        for members in combinations(free, size):
+            if members in existing:
+                continue
+            if connected:
+                # each later SNAIL joins at most max_degree_snail components
+                merged = num_components - len({component[q] for q in members}) + 1
+                if merged - remaining * (max_degree_snail - 1) > 1:
+                    continue
+            child = snails + (members,)
+            # refinement keeps the cell order, so the canonical last SNAIL
+            # always comes from the last cell of the root partition
+            if new not in _root_partition(num_qubits, child)[1][-1]:
+                continue
+            certificate, order, root_cells = canonical_labelling(num_qubits, child)
+            if certificate in seen:
+                continue
+            if not _same_orbit(num_qubits, child, new, order[-1], root_cells):
+                continue
+            seen.add(certificate)
+            yield child, certificate
+
+
+def _canonical_snails(num_qubits, certificate):
+    """SNAIL qubit tuples of a canonical certificate, in label order."""
+    snails = {}
+    for s, q in certificate:
+        snails.setdefault(s, []).append(q)
+    return [tuple(sorted(snails[s])) for s in sorted(snails)]
+
+
+def _grow(num_qubits, snails, options):
+    """Topologies descending from the canonical parent ``snails``.
+
+    ``options`` are the ``num_snails``, degree limits and ``connected``
+    arguments of enumerate_topologies, in its order.
+    """
+    num_snails, connected = options[0], options[-1]
+    for child, certificate in _children(num_qubits, snails, *options):
+        if len(child) < num_snails:
+            yield from _grow(num_qubits, child, options)
+        elif not connected or len(set(_components(num_qubits, child))) == 1:
+            yield topology_from_snails(
+                num_qubits, _canonical_snails(num_qubits, certificate)
+            )
+
+
+def _frontier(num_qubits, snails, options, depth):
+    """Canonical parents with ``depth`` SNAILs, the roots of disjoint subtrees."""
+    if len(snails) == depth:
+        yield snails
+        return
+    for child, _ in _children(num_qubits, snails, *options):
+        yield from _frontier(num_qubits, child, options, depth)
+
+
+def enumerate_topologies(
+    num_qubits,
+    num_snails,
+    max_degree_qubit=4,
+    max_degree_snail=4,
+    min_degree_snail=2,
+    connected=True,
+):
+    """Yields every non-isomorphic topology with these counts and degrees.
+
+    Topologies are generated depth-first, one at a time, so the search can
+    be streamed and interrupted. Two SNAILs never couple the same set of
+    qubits.
+
+    Args:
+        num_qubits: Number of qubits.
+        num_snails: Number of SNAILs.
+        max_degree_qubit: Maximum number of SNAILs per qubit.
+        max_degree_snail: Maximum number of qubits per SNAIL.
+        min_degree_snail: Minimum number of qubits per SNAIL.
+        connected: Only yield topologies whose qubit connectivity is
+            connected.
+
+    Yields:
+        ``[snails, qubits, edges]`` in the format of corral_crowding.topologies,
+        qubits labelled ``0..num_qubits - 1`` and SNAILs after them, in
+        canonical order.
+    """
+    if num_snails == 0:
+        if not connected or num_qubits <= 1:
+            yield topology_from_snails(num_qubits, [])
+        return
+    options = (
+        num_snails,
+        max_degree_qubit,
+        max_degree_snail,
+        min_degree_snail,
+        connected,
+    )
+    yield from _grow(num_qubits, (), options)
+
+
+def topology_from_snails(num_qubits, snails):
+    """``[snails, qubits, edges]`` of SNAILs given as qubit tuples."""
+    snail_ids = [num_qubits + k for k in range(len(snails))]
+    edges = [(s, q) for s, members in zip(snail_ids, snails) for q in members]
+    return [snail_ids, list(range(num_qubits)), edges]
+
+
+def topology_key(topology):
+    """Compact string of a topology, e.g. ``"0-1-2;2-3"`` (qubits per SNAIL)."""
+    snails, qubits, edges = topology
+    index = {qubit: i for i, qubit in enumerate(qubits)}
+    members = {snail: [] for snail in snails}
+    for s, q in edges:
+        members[s].append(index[q])
+    return ";".join("-".join(map(str, sorted(members[s]))) for s in snails)
+
+
+def topology_from_key(key, num_qubits):
+    """Inverse of topology_key."""
+    snails = [tuple(map(int, part.split("-"))) for part in key.split(";") if part]
+    return topology_from_snails(num_qubits, snails)
+
+
+def topology_metrics(topology):
+    """Qubit connectivity metrics from the CouplingMap distance matrix.
+
+    Returns:
+        Dict of the number of ``couplings`` (qubit pairs sharing a SNAIL),
+        the ``max_degree`` of the qubit connectivity, and its
+        ``average_distance`` and ``diameter``, both ``inf`` if it is
+        disconnected.
+    """
+    _, coupling_map = build_coupling_graphs(*topology, coupling_map=True)
+    distances = coupling_map.distance_matrix
+    num_qubits = len(distances)
+    pairs = num_qubits * (num_qubits - 1)
+    degrees = [coupling_map.graph.out_degree(q) for q in range(num_qubits)]
+    return {
+        "couplings": coupling_map.graph.num_edges() // 2,
+        "max_degree": max(degrees, default=0),
+        "average_distance": float(distances.sum() / pairs) if pairs else 0.0,
+        "diameter": float(distances.max()) if num_qubits else 0.0,
+    }
+
+
+def _score(topology):
+    return {
+        "topology": topology_key(topology),
+        "num_qubits": len(topology[1]),
+        "num_snails": len(topology[0]),
+        **topology_metrics(topology),
+    }
+
+
+def _score_subtree(num_qubits, snails, options, done, limit):
+    """Scores at most ``limit`` topologies of a subtree whose key is not in ``done``."""
+    topologies = (
+        topology
+        for topology in _grow(num_qubits, snails, options)
+        if topology_key(topology) not in done
+    )
+    return [_score(topology) for topology in islice(topologies, limit)]
+
+
+def search_topologies(
+    output_path,
+    num_qubits,
+    num_snails,
+    max_degree_qubit=4,
+    max_degree_snail=4,
+    min_degree_snail=2,
+    connected=True,
+    workers=None,
+    limit=None,
+):
+    """Enumerates topologies and streams their metrics to a results table.
+
+    Every row is appended to ``output_path`` as soon as it is scored, and
+    topologies already in the file are skipped, so an interrupted search
+    resumes where it stopped. With ``workers`` the enumeration tree is cut
+    at the first depth with enough canonical parents and their disjoint
+    subtrees are enumerated and scored in a process pool; rows then arrive
+    in subtree completion order. Each subtree skips the finished topologies
+    and scores at most ``limit`` new ones, and the subtrees not yet started
+    are cancelled once ``limit`` rows are written.
+
+    Args:
+        output_path: CSV results table.
+        num_qubits, num_snails, max_degree_qubit, max_degree_snail,
+            min_degree_snail, connected: See enumerate_topologies.
+        workers: Process pool size; ``None`` searches in-process.
+        limit: Stop after writing this many new topologies.
+
+    Returns:
+        The results table as a dict of column arrays (ResultsTable.load);
+        rebuild a topology with topology_from_key.
+    """
+    table = ResultsTable(output_path, TOPOLOGY_COLUMNS)
+    done = table.completed_keys()
+    options = (
+        num_snails,
+        max_degree_qubit,
+        max_degree_snail,
+        min_degree_snail,
+        connected,
+    )
+    written = 0
+    progress = tqdm(total=limit)
+    executor = None
+    try:
+        if workers and num_snails:
+            depth, parents = 0, [()]
+            while len(parents) < 4 * workers and depth < num_snails - 1:
+                depth += 1
+                parents = list(_frontier(num_qubits, (), options, depth))
+            executor = ProcessPoolExecutor(max_workers=workers)
+            futures = [
+                executor.submit(
+                    _score_subtree, num_qubits, parent, options, done, limit
+                )
+                for parent in parents
+            ]
+            rows = (row for future in as_completed(futures) for row in future.result())
+        else:
+            topologies = enumerate_topologies(num_qubits, *options)
+            rows = (
+                _score(topology)
+                for topology in topologies
+                if topology_key(topology) not in done
+            )
+        for row in rows:
+            table.append(row)
+            progress.update()
+            written += 1
+            if written == limit:
+                break
+    finally:
+        progress.close()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return table.load()
@@ -0,0 +1,201 @@
+"""Parallel, resumable transpilation of benchmark circuits onto topologies.
+
+Every (topology, circuit, seed) point is transpiled twice, as in the
+``dev_topologies`` notebooks: once with only the coupling map, which counts
+the SWAPs, and once into ``["u3", isa]``, which counts the two-qubit gates.
+Points are keyed on the topology and circuit names, a hash of the circuit, a
+hash of the coupling map, the seed, the ISA and the Qiskit version, so a
+results table doubles as a cache that is invalidated whenever any of them
+changes.
+"""
+
+import hashlib
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import qiskit
+from qiskit import qasm3, transpile
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+from tqdm import tqdm
+
+from corral_crowding.results_table import ResultsTable
+from corral_crowding.topologies import build_coupling_graphs
+
+BENCHMARK_COLUMNS = (
+    "key",
+    "topology",
+    "circuit",
+    "seed",
+    "isa",
+    "qiskit_version",
+    "swap_count",
+    "swap_longest_path",
+    "two_qubit_gate_count",
+    "two_qubit_longest_path",
+    "runtime_s",
+)
+
+
+def circuit_hash(circuit):
+    """SHA-256 of the OpenQASM 3 text of ``circuit``."""
+    return hashlib.sha256(qasm3.dumps(circuit).encode()).hexdigest()
+
+
+def topology_hash(coupling_map):
+    """SHA-256 of the qubit count and sorted couplings of a CouplingMap."""
+    edges = sorted(coupling_map.get_edges())
+    text = f"{coupling_map.size()}:{edges}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def benchmark_key(topology, circuit, topology_digest, circuit_digest, seed, isa):
+    """Results table key of one point, including the Qiskit version.
+
+    The names are part of the key so that two names for the same coupling
+    map or circuit each get their own rows.
+    """
+    return (
+        f"{topology}:{circuit}:{topology_digest[:16]}:{circuit_digest[:16]}"
+        f":{seed}:{isa}:{qiskit.__version__}"
+    )
+
+
+def as_coupling_map(topology):
+    """CouplingMap of a CouplingMap or a ``[snails, qubits, edges]`` triple."""
+    if isinstance(topology, CouplingMap):
+        return topology
+    return build_coupling_graphs(*topology, coupling_map=True)[1]
+
+
+def transpile_metrics(circuit, coupling_map, seed=None, isa="cx"):
+    """SWAP and two-qubit gate counts of ``circuit`` on ``coupling_map``.
+
+    Import corral_crowding.sqiswap first so the SWAP and CX equivalences
+    are registered; transpile_benchmarks does this in every worker.
+
+    Returns:
+        Dict of the ``swap_count`` and ``swap_longest_path`` after routing,
+        the ``two_qubit_gate_count`` and ``two_qubit_longest_path`` after
+        translating to ``["u3", isa]``, and the ``runtime_s``.
+    """
+    start = time.perf_counter()
+    routed = transpile(circuit, coupling_map=coupling_map, seed_transpiler=seed)
+    translated = transpile(
+        circuit,
+        coupling_map=coupling_map,
+        basis_gates=["u3", isa],
+        seed_transpiler=seed,
+    )
+    routed_longest = circuit_to_dag(routed).count_ops_longest_path()
+    translated_longest = circuit_to_dag(translated).count_ops_longest_path()
+    return {
+        "swap_count": routed.count_ops().get("swap", 0),
+        "swap_longest_path": routed_longest.get("swap", 0),
+        "two_qubit_gate_count": translated.count_ops().get(isa, 0),
+        "two_qubit_longest_path": translated_longest.get(isa, 0),
+        "runtime_s": time.perf_counter() - start,
+    }
+
+
+# set once per pool worker by _init_worker, see transpile_benchmarks
+_WORKER_CIRCUITS = None
+_WORKER_COUPLING_MAPS = None
+
+
+def _init_worker(circuits, coupling_maps):
+    global _WORKER_CIRCUITS, _WORKER_COUPLING_MAPS
+    # registers the sqiswap equivalences in this process's session library
+    importlib.import_module("corral_crowding.sqiswap")
+    _WORKER_CIRCUITS = circuits
+    _WORKER_COUPLING_MAPS = coupling_maps
+
+
+def _benchmark_point(row):
+    metrics = transpile_metrics(
+        _WORKER_CIRCUITS[row["circuit"]],
+        _WORKER_COUPLING_MAPS[row["topology"]],
+        seed=row["seed"],
+        isa=row["isa"],
+    )
+    return {**row, **metrics}
+
+
+def transpile_benchmarks(
+    circuits, topologies, output_path, seeds=(0,), workers=None, isa="cx"
+):
+    """Transpiles every circuit onto every topology for every seed.
+
+    Each finished point is appended to ``output_path`` immediately, and
+    points whose key is already in the file are skipped, so an interrupted
+    run resumes where it stopped and unchanged points are never redone.
+
+    Args:
+        circuits: Dict of circuit name to QuantumCircuit.
+        topologies: Dict of topology name to CouplingMap or
+            ``[snails, qubits, edges]`` triple (e.g. ``topologies.corral``).
+        output_path: CSV results table.
+        seeds: Transpiler seeds; every seed is a separate point.
+        workers: Process pool size; ``None`` runs everything in-process.
+        isa: Two-qubit basis gate counted in the translated circuits.
+
+    Returns:
+        The results table as a dict of column arrays (ResultsTable.load).
+    """
+    coupling_maps = {name: as_coupling_map(t) for name, t in topologies.items()}
+    circuit_digests = {name: circuit_hash(c) for name, c in circuits.items()}
+    topology_digests = {name: topology_hash(c) for name, c in coupling_maps.items()}
+    table = ResultsTable(output_path, BENCHMARK_COLUMNS)
+    done = table.completed_keys()
+    pending = []
+    for topology in coupling_maps:
+        for circuit in circuits:
+            for seed in seeds:
+                key = benchmark_key(
+                    topology,
+                    circuit,
+                    topology_digests[topology],
+                    circuit_digests[circuit],
+                    seed,
+                    isa,
+                )
+                if key not in done:
+                    pending.append(
+                        {
+                            "key": key,
+                            "topology": topology,
+                            "circuit": circuit,
+                            "seed": seed,
+                            "isa": isa,
+                            "qiskit_version": qiskit.__version__,
+                        }
+                    )
+    if not pending:
+        return table.load()
+
+    if workers is None:
+        _init_worker(circuits, coupling_maps)
+        results = (_benchmark_point(row) for row in pending)
+        executor = None
+    else:
+        # spawn rather than fork: a child forked after the transpiler's Rust
+        # thread pool has started deadlocks. Circuits and coupling maps are
+        # pickled once per worker by the initializer, only the point itself
+        # travels with each task.
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(circuits, coupling_maps),
+        )
+        futures = [executor.submit(_benchmark_point, row) for row in pending]
+        results = (future.result() for future in as_completed(futures))
+    try:
+        for row in tqdm(results, total=len(pending)):
+            table.append(row)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return table.load()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from corral_crowding.adaptive_sampling import adaptive_fit
+
+
+def power_law(x, a, b):
+    return a / (x + b) ** 2
+
+
+def rippled(x):
+    # a few percent off the power law everywhere, so it never fits to rtol
+    return power_law(x, 1.0, 3.0) * (1 + 0.05 * np.sin(x / 20))
+
+
+def test_exact_model_stops_early():
+    params, diagnostics = adaptive_fit(
+        lambda x: power_law(x, 2.0, 5.0), power_law, 1, 500, p0=[1, 1]
+    )
+    np.testing.assert_allclose(params, [2.0, 5.0], rtol=1e-6)
+    assert diagnostics["converged"]
+    assert diagnostics["num_simulations"] < 64
+
+
+def test_model_limited_curve_stops_before_budget():
+    _, diagnostics = adaptive_fit(rippled, power_law, 1, 500, p0=[1, 1])
+    assert diagnostics["max_residual"] > 1e-2
+    assert diagnostics["stop"] in ("fit", "residual")
+    assert diagnostics["num_simulations"] < 64
+
+
+@pytest.mark.parametrize("max_points", [12, 30])
+def test_partial_batch_spends_whole_budget(max_points):
+    _, diagnostics = adaptive_fit(
+        rippled, power_law, 1, 500, p0=[1, 1], rtol=1e-6, max_points=max_points
+    )
+    assert diagnostics["stop"] == "budget"
+    assert diagnostics["num_simulations"] == max_points
+    assert np.all(np.diff(diagnostics["x"]) > 0)
+    np.testing.assert_array_equal(diagnostics["y"], rippled(diagnostics["x"]))
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from corral_crowding import topologies
+from corral_crowding.allocation_optimizer import GateFidelityOptimizer
+from corral_crowding.chip_optimizer import ChipOptimizer
+from corral_crowding.crowding_cost import ChipCost
+from corral_crowding.module_graph import QuantumModuleGraph
+
+# fit_crosstalk_params(0.08, 1.8, 60e6) and the speed-limit fit at the
+# default snail_bounds, so the tests run no QuTiP simulations
+INFIDELITY_PARAMS = {
+    "qubit-qubit": np.array([0.15695768, 0.00436029]),
+    "qubit-sub": np.array([49.70755549, 1.0880728]),
+    "snail-qubit": np.array([198.41765062, 4.55864494]),
+    "snail-qubit (inter)": np.array([0.00767053, 0.00017813]),
+    "qubit-sub (inter)": np.array([1.62724574e-03, 3.70909247e-05]),
+}
+SPEEDLIMIT_PARAMS = np.array([3.40078235, 640.1795805])
+
+
+def make_optimizer(num_qubits, module=None, **kwargs):
+    return GateFidelityOptimizer(
+        module or QuantumModuleGraph(num_qubits),
+        lambdaq=0.08,
+        eta=1.8,
+        g3=60e6,
+        infidelity_params=INFIDELITY_PARAMS,
+        speedlimit_params=SPEEDLIMIT_PARAMS,
+        **kwargs,
+    )
+
+
+def random_allocations(optimizer, count, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.array([optimizer._random_initial_guess(rng) for _ in range(count)])
+
+
+@pytest.mark.parametrize("use_lifetime", [False, True])
+@pytest.mark.parametrize("drop_k", [0, 1])
+def test_engine_matches_reference(drop_k, use_lifetime):
+    optimizer = make_optimizer(5, drop_k=drop_k, use_lifetime=use_lifetime)
+    allocations = random_allocations(optimizer, 50)
+    reference = [optimizer._compute_total_infidelity_reference(f) for f in allocations]
+    single = [optimizer.compute_total_infidelity(f) for f in allocations]
+    batch, _ = optimizer.compute_total_infidelity_batch(allocations)
+    # equal up to the rounding of ``** 2``, see CrowdingCost
+    np.testing.assert_allclose(single, reference, rtol=1e-13, atol=0)
+    np.testing.assert_allclose(batch, reference, rtol=1e-13, atol=0)
+
+
+def test_optimize_frequencies_without_finite_restart(monkeypatch):
+    optimizer = make_optimizer(3)
+    monkeypatch.setattr(
+        optimizer, "_run_restart", lambda *args, **kwargs: (np.inf, None, "failed")
+    )
+    assert optimizer.optimize_frequencies(attempts=2, seed=0, verbose=False) == (
+        None,
+        np.inf,
+    )
+
+
+@pytest.mark.parametrize("name", ["ring", "corral", "hex_topo"])
+def test_multi_snail_module_scored_by_chip_cost(name):
+    topology = getattr(topologies, name)
+    module = QuantumModuleGraph.from_topology(*topology)
+    optimizer = make_optimizer(None, module=module, use_lifetime=True)
+    assert isinstance(optimizer.cost_engine, ChipCost)
+    chip = ChipOptimizer(
+        *topology,
+        lambdaq=0.08,
+        eta=1.8,
+        g3=60e6,
+        infidelity_params=INFIDELITY_PARAMS,
+        speedlimit_params=SPEEDLIMIT_PARAMS,
+        use_lifetime=True,
+    )
+    allocations = random_allocations(optimizer, 10)
+    assert allocations.shape[1] == module.num_qubits + module.num_snails
+    costs, _ = optimizer.compute_total_infidelity_batch(allocations)
+    np.testing.assert_array_equal(
+        costs, chip.cost_engine.total_infidelities(allocations)
+    )
+    with pytest.raises(ValueError):
+        optimizer.optimize_frequencies(attempts=1, method="L-BFGS-B")
@@ -0,0 +1,163 @@
+from collections import Counter
+from itertools import combinations
+
+import networkx as nx
+import pytest
+
+from corral_crowding.bipartite import (
+    _construct_bipartite_graph_reference,
+    _snail_demands,
+    construct_bipartite_graph,
+    exact_bipartite_graph,
+    is_possibly_realizable,
+    portfolio_bipartite_graph,
+    snail_lower_bound,
+)
+
+
+def fewest_cliques(G, max_degree_A, max_degree_B):
+    """Fewest B nodes realizing ``G`` by brute force, None if impossible."""
+    edges = {frozenset(edge) for edge in G.edges() if edge[0] != edge[1]}
+    if not edges:
+        return 0
+    cliques = [
+        clique
+        for size in range(2, max_degree_B + 1)
+        for clique in combinations(G, size)
+        if all(G.has_edge(u, v) for u, v in combinations(clique, 2))
+    ]
+    # every A node joins at most max_degree_A of the cliques
+    for count in range(1, len(G) * max_degree_A // 2 + 1):
+        for chosen in combinations(cliques, count):
+            members = Counter(a for clique in chosen for a in clique)
+            if max(members.values()) > max_degree_A:
+                continue
+            covered = {frozenset(pair) for c in chosen for pair in combinations(c, 2)}
+            if covered == edges:
+                return count
+    return None
+
+
+def outcome(construct, G, max_degree_A, max_degree_B):
+    try:
+        graphs = construct(G, max_degree_A, max_degree_B)
+    except (IndexError, ValueError) as error:
+        return type(error)
+    if graphs[0] is None:
+        return None
+    return [(list(g.nodes()), list(g.edges())) for g in graphs]
+
+
+@pytest.mark.parametrize("max_degrees", [(2, 3), (3, 4), (4, 4)])
+@pytest.mark.parametrize("p", [0.2, 0.4, 0.6])
+@pytest.mark.parametrize("n", [6, 10])
+def test_greedy_matches_reference(n, p, max_degrees):
+    for seed in range(10):
+        G = nx.gnp_random_graph(n, p, seed=seed)
+        assert outcome(construct_bipartite_graph, G, *max_degrees) == outcome(
+            _construct_bipartite_graph_reference, G, *max_degrees
+        )
+
+
+@pytest.mark.parametrize("max_degrees", [(2, 3), (3, 3), (2, 4)])
+def test_exact_matches_brute_force(max_degrees):
+    for n in (5, 6):
+        for p in (0.5, 0.8):
+            for seed in range(3):
+                G = nx.gnp_random_graph(n, p, seed=seed)
+                fewest = fewest_cliques(G, *max_degrees)
+                result = exact_bipartite_graph(G, *max_degrees)
+                if fewest is None:
+                    assert result.status == "infeasible"
+                    assert not result.success
+                    continue
+                assert result.status == "optimal"
+                assert result.fun == fewest
+                assert result.lower_bound == fewest and result.mip_gap == 0
+                G_rebuilt, G_A, _ = result.graphs
+                assert set(G_A.edges()) == {tuple(sorted(e)) for e in G.edges()}
+                A_nodes = set(G)
+                for node in G_rebuilt:
+                    limit = max_degrees[0] if node in A_nodes else max_degrees[1]
+                    assert G_rebuilt.degree(node) <= limit
+
+
+def test_construct_exact_returns_exact_graphs():
+    G = nx.gnp_random_graph(6, 0.6, seed=1)
+    graphs = construct_bipartite_graph(G, 3, 3, method="exact")
+    expected = exact_bipartite_graph(G, 3, 3).graphs
+    for graph, other in zip(graphs, expected):
+        assert sorted(graph.edges()) == sorted(other.edges())
+
+
+@pytest.mark.parametrize(
+    "G, max_degrees, prechecked",
+    [
+        # the hub needs five B nodes of two A nodes each
+        (nx.star_graph(5), (1, 2), False),
+        # only the ILP proves that K5 without an edge needs more room
+        (nx.Graph(set(combinations(range(5), 2)) - {(0, 1)}), (2, 3), True),
+    ],
+)
+def test_exact_infeasible(G, max_degrees, prechecked):
+    assert is_possibly_realizable(G, *max_degrees) == prechecked
+    result = exact_bipartite_graph(G, *max_degrees)
+    assert result.status == "infeasible" and not result.success
+    assert result.graphs == (None, None, None)
+    assert construct_bipartite_graph(G, *max_degrees, method="exact") == (
+        None,
+        None,
+        None,
+    )
+
+
+def portfolio_outcome(result):
+    edges = None if result.graphs[0] is None else sorted(result.graphs[0].edges())
+    return result.fun, result.seed, result.nit, result.successes, edges
+
+
+@pytest.mark.parametrize(
+    "G, max_degrees, first_valid",
+    [
+        (nx.gnp_random_graph(10, 0.3, seed=1), (4, 4), False),
+        (nx.gnp_random_graph(10, 0.3, seed=6), (4, 4), False),
+        (nx.gnp_random_graph(10, 0.3, seed=5), (4, 4), True),
+        # every valid attempt reaches the lower bound and stops the search
+        (nx.cycle_graph(8), (2, 2), False),
+    ],
+)
+def test_portfolio_is_reproducible_across_workers(G, max_degrees, first_valid):
+    kwargs = {"attempts": 16, "seed": 5, "first_valid": first_valid}
+    serial = portfolio_bipartite_graph(G, *max_degrees, **kwargs)
+    parallel = portfolio_bipartite_graph(G, *max_degrees, workers=2, **kwargs)
+    assert serial.success
+    assert portfolio_outcome(parallel) == portfolio_outcome(serial)
+
+
+@pytest.mark.parametrize(
+    "G, max_degree_B, expected",
+    [
+        # the hub needs a B node per leaf, since no two leaves are adjacent
+        (nx.star_graph(4), 3, ([4, 1, 1, 1, 1], 2)),
+        (nx.complete_graph(5), 3, ([2, 2, 2, 2, 2], 3)),
+        (nx.empty_graph(3), 3, ([0, 0, 0], 0)),
+    ],
+)
+def test_snail_demands(G, max_degree_B, expected):
+    assert _snail_demands(G, max_degree_B) == expected
+    assert _snail_demands(G, max_degree_B, max_degree_A=max(expected[0])) == expected
+    if max(expected[0]):
+        assert _snail_demands(G, max_degree_B, max(expected[0]) - 1) is None
+
+
+@pytest.mark.parametrize("max_degrees", [(2, 2), (2, 3), (3, 3), (2, 4), (4, 4)])
+def test_lower_bound_and_precheck_hold_on_brute_force(max_degrees):
+    for n in (4, 5, 6):
+        for p in (0.3, 0.5, 0.8):
+            for seed in range(4):
+                G = nx.gnp_random_graph(n, p, seed=seed)
+                fewest = fewest_cliques(G, *max_degrees)
+                if fewest is None:
+                    continue
+                assert snail_lower_bound(G, max_degrees[1]) <= fewest
+                assert is_possibly_realizable(G, *max_degrees)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from corral_crowding import topologies
+from corral_crowding.chip_optimizer import ChipOptimizer, block_colors
+
+# fit_crosstalk_params(0.08, 1.8, 60e6) and its speed-limit fit, fixed so
+# the tests run no QuTiP simulations
+INFIDELITY_PARAMS = {
+    "qubit-qubit": np.array([0.15695768, 0.00436029]),
+    "qubit-sub": np.array([49.70755549, 1.0880728]),
+    "snail-qubit": np.array([198.41765062, 4.55864494]),
+    "snail-qubit (inter)": np.array([0.00767053, 0.00017813]),
+    "qubit-sub (inter)": np.array([1.62724574e-03, 3.70909247e-05]),
+}
+SPEEDLIMIT_PARAMS = np.array([3.40078235, 640.1795805])
+
+
+def make_optimizer(topology, **kwargs):
+    return ChipOptimizer(
+        *topology,
+        lambdaq=0.08,
+        eta=1.8,
+        g3=60e6,
+        infidelity_params=INFIDELITY_PARAMS,
+        speedlimit_params=SPEEDLIMIT_PARAMS,
+        **kwargs,
+    )
+
+
+def block_pairs(colors):
+    return [(a, b) for group in colors for a in group for b in group if a < b]
+
+
+@pytest.mark.parametrize("name", ["ring", "corral", "hex_topo"])
+def test_same_colored_blocks_do_not_interact(name):
+    engine = make_optimizer(getattr(topologies, name)).cost_engine
+    interactions = engine.block_interactions()
+    for a, b in block_pairs(block_colors(interactions)):
+        assert b not in interactions[a]
+        shared = engine.gates_reading(engine.block_variables(a)) & (
+            engine.gates_reading(engine.block_variables(b))
+        )
+        assert not shared.any()
+
+
+@pytest.mark.parametrize("drop_k", [0, 2])
+@pytest.mark.parametrize("name", ["ring", "corral"])
+def test_cost_never_increases_across_sweeps(name, drop_k):
+    optimizer = make_optimizer(getattr(topologies, name), drop_k=drop_k)
+    rng = np.random.default_rng(0)
+    initial = rng.uniform(optimizer.bounds[:, 0], optimizer.bounds[:, 1])
+    frequencies, best_cost = optimizer.optimize_frequencies(
+        sweeps=3,
+        seed=0,
+        block_evaluations=100,
+        initial=initial,
+        tol=0,
+        verbose=False,
+    )
+    costs = [optimizer.compute_total_infidelity(initial), *optimizer.sweep_costs]
+    assert np.all(np.diff(costs) <= 0)
+    assert optimizer.compute_total_infidelity(frequencies) == min(costs)
+    assert best_cost == np.mean(optimizer.get_final_infidelities(frequencies))
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from corral_crowding import topologies
+from corral_crowding.crowding_cost import ChipCost, CrowdingCost
+from corral_crowding.module_graph import QuantumModuleGraph
+
+# fit_crosstalk_params(0.08, 1.8, 60e6) and its speed-limit fit, fixed so
+# the tests run no QuTiP simulations
+INFIDELITY_PARAMS = {
+    "qubit-qubit": np.array([0.15695768, 0.00436029]),
+    "qubit-sub": np.array([49.70755549, 1.0880728]),
+    "snail-qubit": np.array([198.41765062, 4.55864494]),
+    "snail-qubit (inter)": np.array([0.00767053, 0.00017813]),
+    "qubit-sub (inter)": np.array([1.62724574e-03, 3.70909247e-05]),
+}
+SPEEDLIMIT_PARAMS = np.array([3.40078235, 640.1795805])
+
+
+def make_cost(num_qubits=5, **kwargs):
+    return CrowdingCost(
+        QuantumModuleGraph(num_qubits), INFIDELITY_PARAMS, SPEEDLIMIT_PARAMS, **kwargs
+    )
+
+
+def random_allocation(rng, num_qubits=5):
+    return np.append(rng.uniform(3.3, 5.7, num_qubits), rng.uniform(4.2, 4.7))
+
+
+@pytest.mark.parametrize("smoothness", [0.05, 0.01, None])
+@pytest.mark.parametrize("use_lifetime", [False, True])
+@pytest.mark.parametrize("drop_k", [0, 1])
+def test_value_and_grad_matches_finite_differences(smoothness, use_lifetime, drop_k):
+    cost = make_cost(drop_k=drop_k, use_lifetime=use_lifetime)
+    rng = np.random.default_rng(0)
+    step = 1e-6
+    for _ in range(10):
+        frequencies = random_allocation(rng)
+        value, gradient = cost.value_and_grad(frequencies, smoothness)
+        if smoothness is None:
+            assert value == pytest.approx(cost(frequencies), rel=1e-12)
+        central = np.array(
+            [
+                (
+                    cost.value_and_grad(frequencies + step * e, smoothness)[0]
+                    - cost.value_and_grad(frequencies - step * e, smoothness)[0]
+                )
+                / (2 * step)
+                for e in np.eye(len(frequencies))
+            ]
+        )
+        np.testing.assert_allclose(gradient, central, rtol=1e-6, atol=1e-7)
+
+
+@pytest.mark.parametrize("use_lifetime", [False, True])
+@pytest.mark.parametrize("drop_k", [0, 1])
+def test_incremental_moves_track_full_cost(use_lifetime, drop_k):
+    cost = make_cost(drop_k=drop_k, use_lifetime=use_lifetime)
+    rng = np.random.default_rng(1)
+    frequencies = random_allocation(rng)
+    incremental = cost.incremental(frequencies)
+    for _ in range(300):
+        index = rng.integers(len(frequencies))
+        value = frequencies[index] + rng.normal(0, 0.1)
+        proposed = incremental.propose(index, value)
+        # a proposal leaves the tracked allocation untouched
+        assert incremental.cost == pytest.approx(cost(frequencies), rel=1e-9)
+        frequencies[index] = value
+        assert incremental.accept() == proposed
+        assert incremental.cost == pytest.approx(cost(frequencies), rel=1e-9)
+    np.testing.assert_array_equal(incremental.frequencies, frequencies)
+    assert incremental.num_updates == 300
+
+
+def test_resync():
+    cost = make_cost(use_lifetime=True)
+    rng = np.random.default_rng(2)
+    frequencies = random_allocation(rng)
+    incremental = cost.incremental(frequencies)
+    for _ in range(50):
+        index = rng.integers(len(frequencies))
+        frequencies[index] += rng.normal(0, 0.1)
+        incremental.move(index, frequencies[index])
+    assert incremental.resync() == cost(frequencies)
+    assert incremental.num_updates == 0
+
+    other = random_allocation(rng)
+    assert incremental.resync(other) == cost(other)
+    np.testing.assert_array_equal(incremental.frequencies, other)
+    with pytest.raises(RuntimeError):
+        incremental.accept()
+
+
+@pytest.mark.parametrize("use_lifetime", [False, True])
+@pytest.mark.parametrize("drop_k", [0, 1])
+def test_chip_cost_matches_crowding_cost_on_one_module(use_lifetime, drop_k):
+    kwargs = {"drop_k": drop_k, "use_lifetime": use_lifetime}
+    cost = make_cost(**kwargs)
+    chip = ChipCost(
+        QuantumModuleGraph(5), INFIDELITY_PARAMS, SPEEDLIMIT_PARAMS, **kwargs
+    )
+    rng = np.random.default_rng(3)
+    allocations = np.array([random_allocation(rng) for _ in range(50)])
+    np.testing.assert_array_equal(
+        chip.total_infidelities(allocations), cost.total_infidelities(allocations)
+    )
+
+
+@pytest.mark.parametrize("use_lifetime", [False, True])
+@pytest.mark.parametrize(
+    "name",
+    ["ring", "square", "tworing", "hex_topo", "corral", "denselattice", "best"],
+)
+def test_restricted_cost_delta_matches_full_cost(name, use_lifetime):
+    module = QuantumModuleGraph.from_topology(*getattr(topologies, name))
+    chip = ChipCost(
+        module, INFIDELITY_PARAMS, SPEEDLIMIT_PARAMS, use_lifetime=use_lifetime
+    )
+    rng = np.random.default_rng(4)
+    for snail in range(module.num_snails):
+        restricted = chip.restrict(snail)
+        variables = chip.block_variables(snail)
+        before = np.concatenate(
+            [
+                rng.uniform(3.3, 5.7, module.num_qubits),
+                rng.uniform(4.2, 4.7, module.num_snails),
+            ]
+        )
+        after = before.copy()
+        after[variables] = rng.uniform(3.3, 5.7, len(variables))
+        assert restricted(after) - restricted(before) == pytest.approx(
+            chip(after) - chip(before), abs=1e-12
+        )
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from corral_crowding.detuning_fit import simulate_infidelity, spectator_systems
+
+SYSTEMS = spectator_systems(lambdaq=0.08, eta=1.8, g3=60e6)
+
+
+@pytest.mark.parametrize("key", sorted(SYSTEMS))
+def test_numpy_backend_matches_qutip(key):
+    detunings = np.linspace(50, 1000, 16)
+    qutip = simulate_infidelity(detunings, *SYSTEMS[key], backend="qutip")
+    numpy = simulate_infidelity(detunings, *SYSTEMS[key], backend="numpy")
+    np.testing.assert_allclose(numpy, qutip, rtol=0, atol=1e-10)
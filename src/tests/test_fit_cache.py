@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from corral_crowding.fit_cache import FitCache, cached, make_key
+
+
+def test_key_is_stable_across_sequence_types():
+    detunings = np.linspace(50, 1000, 4)
+    key = make_key("fit", {"detunings": detunings, "lambdaq": 0.08})
+    for same in (detunings.tolist(), tuple(detunings)):
+        assert make_key("fit", {"lambdaq": 0.08, "detunings": same}) == key
+    assert make_key("fit", {"x": [1, 2]}) == make_key("fit", {"x": [1.0, 2.0]})
+    changed = np.nextafter(0.08, 1)
+    assert make_key("fit", {"detunings": detunings, "lambdaq": changed}) != key
+    assert make_key("other", {"detunings": detunings, "lambdaq": 0.08}) != key
+
+
+def test_key_of_non_numeric_sequences():
+    key = make_key("fit", {"labels": ("qubit-qubit", "qubit-sub")})
+    assert key == make_key("fit", {"labels": ["qubit-qubit", "qubit-sub"]})
+    assert key != make_key("fit", {"labels": ("qubit-sub", "qubit-qubit")})
+    assert make_key("fit", {"x": ("1",)}) != make_key("fit", {"x": (1,)})
+    assert make_key("fit", {"x": [(1, 2), "a"]}) == make_key(
+        "fit", {"x": [[1, 2], "a"]}
+    )
+
+
+def test_memory_is_least_recently_used():
+    cache = FitCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_disk_store_is_reloaded_and_evicted(tmp_path):
+    cache = FitCache(cache_dir=str(tmp_path), max_entries=1)
+    cache.put("a", np.zeros(100))
+    size = os.path.getsize(tmp_path / "a.pkl")
+    cache.max_disk_bytes = 2 * size
+    os.utime(tmp_path / "a.pkl", (1, 1))
+    cache.put("b", np.ones(100))
+    os.utime(tmp_path / "b.pkl", (2, 2))
+
+    # a is only on disk now, and reading it marks it as recently used
+    np.testing.assert_array_equal(FitCache(str(tmp_path)).get("a"), np.zeros(100))
+    cache.put("c", np.full(100, 2.0))
+    assert sorted(os.listdir(tmp_path)) == ["a.pkl", "c.pkl"]
+
+
+def test_no_disk_store_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = FitCache()
+    cache.put("a", 1)
+    assert cache.cache_dir is None
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_invalidate_recomputes(tmp_path, disk):
+    cache = FitCache(cache_dir=str(tmp_path) if disk else None)
+    calls = []
+
+    def fit(x, scale=2.0):
+        calls.append(x)
+        return {"params": np.array([x * scale])}
+
+    fit_cached = cached(fit, cache)
+    assert fit_cached.key(1.0) == fit_cached.key(1.0, scale=2.0)
+    first = fit_cached(1.0)
+    first["params"][0] = -1  # callers get a copy
+    assert fit_cached(1.0)["params"][0] == 2.0
+    assert calls == [1.0]
+
+    fit_cached.invalidate(1.0)
+    assert cache.get(fit_cached.key(1.0)) is None
+    assert not os.listdir(tmp_path)
+    fit_cached(1.0)
+    assert calls == [1.0, 1.0]
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from corral_crowding.allocation_optimizer import GateFidelityOptimizer
+from corral_crowding.crowding_cost import CrowdingCost
+from corral_crowding.global_search import GLOBAL_STRATEGIES
+from corral_crowding.module_graph import QuantumModuleGraph
+
+# fit_crosstalk_params(0.08, 1.8, 60e6) and its speed-limit fit, fixed so
+# the tests run no QuTiP simulations
+INFIDELITY_PARAMS = {
+    "qubit-qubit": np.array([0.15695768, 0.00436029]),
+    "qubit-sub": np.array([49.70755549, 1.0880728]),
+    "snail-qubit": np.array([198.41765062, 4.55864494]),
+}
+SPEEDLIMIT_PARAMS = np.array([3.40078235, 640.1795805])
+BOUNDS = np.array([(3.3, 5.7)] * 4 + [(4.2, 4.7)])
+
+
+class CountingCost(CrowdingCost):
+    """CrowdingCost that counts the allocations scored in batches."""
+
+    scored = 0
+
+    def total_infidelities(self, frequencies):
+        self.scored += len(np.atleast_2d(frequencies))
+        return super().total_infidelities(frequencies)
+
+
+def make_cost(cls=CrowdingCost):
+    return cls(
+        QuantumModuleGraph(4), INFIDELITY_PARAMS, SPEEDLIMIT_PARAMS, use_lifetime=True
+    )
+
+
+@pytest.mark.parametrize("strategy", sorted(GLOBAL_STRATEGIES))
+def test_strategy_is_deterministic_and_within_budget(strategy):
+    search = GLOBAL_STRATEGIES[strategy]
+    cost = make_cost()
+    first = search(cost, BOUNDS, 1500, seed=7)
+    second = search(cost, BOUNDS, 1500, seed=7)
+    np.testing.assert_array_equal(first.x, second.x)
+    assert first.fun == second.fun
+    assert first.nfev == second.nfev
+    assert first.nfev <= 1500
+    assert first.fun == cost(first.x)
+    assert np.all(first.x >= BOUNDS[:, 0]) and np.all(first.x <= BOUNDS[:, 1])
+
+
+@pytest.mark.parametrize("strategy", ["differential_evolution", "cma-es"])
+def test_population_strategies_count_every_scored_allocation(strategy):
+    cost = make_cost(CountingCost)
+    result = GLOBAL_STRATEGIES[strategy](cost, BOUNDS, 1000, seed=3)
+    assert cost.scored == result.nfev <= 1000
+
+
+def test_annealing_spends_whole_budget():
+    result = GLOBAL_STRATEGIES["annealing"](make_cost(), BOUNDS, 700, seed=0)
+    assert result.nfev == 700
+
+
+@pytest.mark.parametrize(
+    "strategy, budget",
+    [("differential_evolution", 74), ("cma-es", 5), ("coordinate_descent", 95)],
+)
+def test_budget_below_one_step(strategy, budget):
+    optimizer = GateFidelityOptimizer(
+        QuantumModuleGraph(4),
+        lambdaq=0.08,
+        eta=1.8,
+        g3=60e6,
+        infidelity_params=INFIDELITY_PARAMS,
+        speedlimit_params=SPEEDLIMIT_PARAMS,
+    )
+    if strategy == "differential_evolution":
+        with pytest.raises(ValueError):
+            optimizer.global_optimize(strategy, budget, seed=0, verbose=False)
+        return
+    assert optimizer.global_optimize(strategy, budget, seed=0, verbose=False) == (
+        None,
+        np.inf,
+    )
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from corral_crowding import topologies
+from corral_crowding.milp_allocation import gate_separation, maximize_gate_separation
+from corral_crowding.module_graph import QuantumModuleGraph
+
+# optimal separations on (3.3, 5.7) GHz with 0.2 GHz bare spacing: the
+# 2.4 GHz span over the optimal Golomb ruler lengths 3, 6 and 11, and for six
+# qubits 20 units, the bare spacing ruling out the length-17 ruler
+OPTIMAL_SEPARATIONS = {3: 2.4 / 3, 4: 2.4 / 6, 5: 2.4 / 11, 6: 2.4 / 20}
+
+
+@pytest.mark.parametrize("num_qubits", sorted(OPTIMAL_SEPARATIONS))
+def test_highs_finds_optimal_separation(num_qubits):
+    result = maximize_gate_separation(
+        QuantumModuleGraph(num_qubits), solver="highs", mip_gap=1e-6
+    )
+    assert result.success
+    assert result.status == "optimal"
+    assert result.solver == "highs"
+    assert result.fun == pytest.approx(OPTIMAL_SEPARATIONS[num_qubits], rel=1e-6)
+    assert result.fun == gate_separation(result.x)
+    assert result.x[0] >= 3.3 - 1e-9 and result.x[-1] <= 5.7 + 1e-9
+    assert np.all(np.diff(result.x) >= 0.2 - 1e-9)
+
+
+def test_multi_snail_module_rejected():
+    module = QuantumModuleGraph.from_topology(*topologies.ring)
+    with pytest.raises(ValueError):
+        maximize_gate_separation(module, solver="highs")
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from corral_crowding import sweep, topologies
+from corral_crowding.allocation_optimizer import GateFidelityOptimizer
+from corral_crowding.module_graph import QuantumModuleGraph
+
+# fit_crosstalk_params(0.08, 1.8, 60e6) and its speed-limit fit, fixed so
+# the tests run no QuTiP simulations
+INFIDELITY_PARAMS = {
+    "qubit-qubit": np.array([0.15695768, 0.00436029]),
+    "qubit-sub": np.array([49.70755549, 1.0880728]),
+    "snail-qubit": np.array([198.41765062, 4.55864494]),
+    "snail-qubit (inter)": np.array([0.00767053, 0.00017813]),
+    "qubit-sub (inter)": np.array([1.62724574e-03, 3.70909247e-05]),
+}
+SPEEDLIMIT_PARAMS = np.array([3.40078235, 640.1795805])
+GRID = {"lambdaq": [0.08], "eta": [1.8], "g3": [60e6]}
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    calls = []
+
+    def fit_crosstalk(*args, **kwargs):
+        calls.append(("crosstalk", args))
+        return INFIDELITY_PARAMS, None
+
+    def fit_speedlimit(*args, **kwargs):
+        calls.append(("speedlimit", args))
+        return SPEEDLIMIT_PARAMS, None
+
+    monkeypatch.setattr(sweep, "fit_crosstalk_params", fit_crosstalk)
+    monkeypatch.setattr(sweep, "fit_speedlimit_params", fit_speedlimit)
+    return calls
+
+
+def test_resume_skips_finished_points(fits, tmp_path):
+    path = tmp_path / "sweep.csv"
+    module = QuantumModuleGraph(3)
+    first = sweep.parameter_sweep(module, GRID, str(path), attempts=2)
+    assert len(first["point_id"]) == 1
+    assert len(fits) == 2
+
+    # a finished sweep is returned as is, without fitting or optimizing
+    again = sweep.parameter_sweep(module, GRID, str(path), attempts=2)
+    assert len(fits) == 2
+    np.testing.assert_array_equal(again["runtime_s"], first["runtime_s"])
+
+    grid = {**GRID, "eta": [1.8, 2.0]}
+    extended = sweep.parameter_sweep(module, grid, str(path), attempts=2)
+    assert len(extended["point_id"]) == 2
+    assert [call[0] for call in fits[2:]] == ["crosstalk", "speedlimit"]
+    assert extended["point_id"][0] == first["point_id"][0]
+    assert extended["best_cost"][0] == first["best_cost"][0]
+
+
+def test_multi_snail_module_keeps_snail_frequencies(fits, tmp_path):
+    module = QuantumModuleGraph.from_topology(*topologies.ring)
+    table = sweep.parameter_sweep(module, GRID, str(tmp_path / "ring.csv"), attempts=1)
+    columns = [name for name in table if name.startswith("freq_")]
+    assert len(columns) == module.num_qubits + module.num_snails
+    assert np.all(np.isfinite([table[name] for name in columns]))
+
+
+def test_point_without_finite_cost_is_a_nan_row(fits, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        GateFidelityOptimizer,
+        "optimize_frequencies",
+        lambda self, *args, **kwargs: (None, np.inf),
+    )
+    table = sweep.parameter_sweep(
+        QuantumModuleGraph(3), GRID, str(tmp_path / "sweep.csv"), attempts=1
+    )
+    assert table["best_cost"][0] == np.inf
+    assert np.isnan(table["total_cost"][0])
+    assert np.all(np.isnan([table[f"freq_{i}"][0] for i in range(4)]))
@@ -0,0 +1,65 @@
+import pytest
+
+from corral_crowding import topologies
+from corral_crowding.module_graph import QuantumModuleGraph
+from corral_crowding.topologies import (
+    best_topology,
+    corral_topology,
+    denselattice_topology,
+    hex_topology,
+    ring_topology,
+    square_topology,
+    tworing_topology,
+)
+
+
+@pytest.mark.parametrize(
+    "generator, literal",
+    [
+        (ring_topology, topologies.ring),
+        (square_topology, topologies.square),
+        (tworing_topology, topologies.tworing),
+        (hex_topology, topologies.hex_topo),
+        (corral_topology, topologies.corral),
+        (denselattice_topology, topologies.denselattice),
+    ],
+)
+def test_default_size_matches_literal(generator, literal):
+    assert generator() == literal
+
+
+def test_best_matches_literal_up_to_snail_labels():
+    snails, qubits, edges = best_topology()
+    # the literal lists group SNAIL 8 as a qubit and an unused SNAIL 0
+    assert snails == topologies.best_snails[1:] + [8]
+    assert qubits == topologies.best_qubits[1:]
+    assert edges == topologies.best_edges
+
+
+@pytest.mark.parametrize(
+    "topology, num_qubits, num_snails",
+    [
+        (ring_topology(64), 64, 64),
+        (square_topology(8, 8), 64, 112),
+        (tworing_topology(64), 64, 64),
+        (hex_topology(8, 8), 64, 56),
+        (corral_topology(32), 64, 32),
+        (best_topology(16, 3), 64, 20),
+    ],
+)
+def test_scaled_sizes(topology, num_qubits, num_snails):
+    snails, qubits, edges = topology
+    assert len(qubits) == num_qubits and len(snails) == num_snails
+    assert len(set(edges)) == len(edges)
+    # every edge joins a qubit and a SNAIL and every SNAIL couples qubits
+    module = QuantumModuleGraph.from_topology(snails, qubits, edges)
+    assert sum(len(m) for m in module.module_qubits) == len(edges)
+    assert all(len(m) >= 2 for m in module.module_qubits)
+
+
+def test_results_are_memoized_copies():
+    first = corral_topology(16)
+    hits = corral_topology.cache_info().hits
+    first[2].clear()
+    assert corral_topology(16)[2]
+    assert corral_topology.cache_info().hits == hits + 1
@@ -0,0 +1,116 @@
+from itertools import combinations
+
+import networkx as nx
+import pytest
+from networkx.algorithms.isomorphism import categorical_node_match
+
+from corral_crowding.topology_enumeration import (
+    enumerate_topologies,
+    search_topologies,
+    topology_from_key,
+    topology_key,
+)
+
+MATCH_KIND = categorical_node_match("kind", None)
+
+
+def incidence_graph(num_qubits, snails):
+    G = nx.Graph()
+    G.add_nodes_from(range(num_qubits), kind="qubit")
+    for k, members in enumerate(snails):
+        G.add_node(("snail", k), kind="snail")
+        G.add_edges_from((("snail", k), q) for q in members)
+    return G
+
+
+def topology_graph(topology):
+    snails, qubits, edges = topology
+    G = nx.Graph()
+    G.add_nodes_from(qubits, kind="qubit")
+    G.add_nodes_from(snails, kind="snail")
+    G.add_edges_from(edges)
+    return G
+
+
+def brute_force_classes(
+    num_qubits, num_snails, max_degree_qubit, max_degree_snail, connected=True
+):
+    """One graph per isomorphism class of distinct SNAIL qubit sets."""
+    subsets = [
+        subset
+        for size in range(2, max_degree_snail + 1)
+        for subset in combinations(range(num_qubits), size)
+    ]
+    classes = []
+    for snails in combinations(subsets, num_snails):
+        degrees = [sum(q in s for s in snails) for q in range(num_qubits)]
+        if max(degrees) > max_degree_qubit:
+            continue
+        G = incidence_graph(num_qubits, snails)
+        if connected and not nx.is_connected(G):
+            continue
+        if not any(nx.is_isomorphic(G, H, node_match=MATCH_KIND) for H in classes):
+            classes.append(G)
+    return classes
+
+
+@pytest.mark.parametrize(
+    "case",
+    [
+        (4, 2, 4, 4, True),
+        (4, 3, 2, 3, True),
+        (5, 3, 2, 3, True),
+        (5, 3, 3, 3, True),
+        (5, 4, 2, 4, True),
+        (5, 2, 2, 3, False),
+    ],
+)
+def test_enumeration_matches_brute_force(case):
+    num_qubits, num_snails, max_degree_qubit, max_degree_snail, connected = case
+    topologies = list(
+        enumerate_topologies(
+            num_qubits,
+            num_snails,
+            max_degree_qubit,
+            max_degree_snail,
+            connected=connected,
+        )
+    )
+    classes = brute_force_classes(*case)
+    assert len(topologies) == len(classes)
+    # every class is produced exactly once
+    found = [
+        next(
+            i
+            for i, H in enumerate(classes)
+            if nx.is_isomorphic(topology_graph(t), H, node_match=MATCH_KIND)
+        )
+        for t in topologies
+    ]
+    assert sorted(found) == list(range(len(classes)))
+
+
+@pytest.mark.parametrize("case, count", [((6, 4, 2, 3), 17), ((6, 3, 3, 4), 42)])
+def test_enumeration_counts(case, count):
+    # brute-force isomorphism counts, too slow to recompute here
+    assert sum(1 for _ in enumerate_topologies(*case)) == count
+
+
+def test_topology_key_round_trip():
+    for topology in enumerate_topologies(5, 3, 3, 3):
+        key = topology_key(topology)
+        assert topology_key(topology_from_key(key, 5)) == key
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_search_resumes_and_stops_at_limit(tmp_path, workers):
+    path = str(tmp_path / "topologies.csv")
+    expected = {topology_key(t) for t in enumerate_topologies(5, 3, 3, 3)}
+    first = search_topologies(path, 5, 3, 3, 3, workers=workers, limit=4)
+    assert len(first["topology"]) == 4
+    rest = search_topologies(path, 5, 3, 3, 3, workers=workers)
+    assert len(rest["topology"]) == len(expected)
+    assert set(rest["topology"]) == expected
+    assert list(rest["topology"][:4]) == list(first["topology"])
+    again = search_topologies(path, 5, 3, 3, 3, workers=workers)
+    assert len(again["topology"]) == len(expected)
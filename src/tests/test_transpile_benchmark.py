@@ -0,0 +1,50 @@
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import QFTGate
+
+from corral_crowding import topologies
+from corral_crowding.transpile_benchmark import transpile_benchmarks
+
+CHIPS = {"ring": topologies.ring, "corral": topologies.corral}
+METRICS = ("swap_count", "two_qubit_gate_count", "two_qubit_longest_path")
+
+
+@pytest.fixture(scope="module")
+def circuits():
+    qft = QuantumCircuit(5)
+    qft.append(QFTGate(5), range(5))
+    return {"qft_5": qft.decompose()}
+
+
+def rows_by_key(table):
+    return {
+        key: tuple(table[name][i] for name in METRICS)
+        for i, key in enumerate(table["key"])
+    }
+
+
+def test_resume_skips_points_and_isa_adds_keys(tmp_path, circuits):
+    path = str(tmp_path / "benchmarks.csv")
+    serial = transpile_benchmarks(circuits, CHIPS, path, seeds=(0,))
+    assert len(serial["key"]) == 2
+
+    # only the new seed is transpiled, by the pool
+    resumed = transpile_benchmarks(circuits, CHIPS, path, seeds=(0, 1), workers=2)
+    assert len(resumed["key"]) == 4
+    assert list(resumed["key"][:2]) == list(serial["key"])
+    assert list(resumed["runtime_s"][:2]) == list(serial["runtime_s"])
+    reference = transpile_benchmarks(
+        circuits, CHIPS, str(tmp_path / "reference.csv"), seeds=(0, 1)
+    )
+    assert rows_by_key(resumed) == rows_by_key(reference)
+
+    again = transpile_benchmarks(circuits, CHIPS, path, seeds=(0, 1))
+    assert list(again["runtime_s"]) == list(resumed["runtime_s"])
+
+    translated = transpile_benchmarks(
+        circuits, CHIPS, path, seeds=(0, 1), workers=2, isa="cz"
+    )
+    assert len(translated["key"]) == 8
+    assert set(translated["key"][4:]).isdisjoint(resumed["key"])
+    assert list(translated["isa"]) == ["cx"] * 4 + ["cz"] * 4
+    assert all(count > 0 for count in translated["two_qubit_gate_count"])